@@ -0,0 +1,312 @@
+"""Built, precompressed static UI.
+
+``build_assets()`` turns ``app/static`` into a build directory the bridge
+serves at ``/ui``:
+
+- each page's inline ``<style>``/``<script>`` blocks move out into
+  content-hashed files (``home.3f9c2a1b7d.js``), and other files are copied
+  under hashed names that pages' ``"/ui/<name>"`` references are rewritten
+  to, so browsers cache them for a year and only refetch after they change;
+- every text file also gets ``.gz`` (and ``.br`` when the ``brotli`` package
+  is installed) siblings, compressed once at build time instead of per
+  request;
+- ``manifest.json`` records the source fingerprint and the hashed names.
+
+Building is an explicit step, run once per deploy before the workers start;
+the bridge only reads the result (``current_manifest()``) and serves the
+sources when there is no up-to-date build. Builds hold a lock file next to
+the build directory and write every file under a unique temporary name that
+is renamed into place, so concurrent builds cannot clobber each other.
+
+``PrecompressedStaticFiles`` serves the build: it picks the best encoding the
+client accepts, marks hashed files ``immutable`` and everything else
+``no-cache`` (revalidated by ETag). ``inject_snapshot()`` embeds data into a
+page so it can render without another request.
+
+    python -m app.assets    # build app/static into app/static_build
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are not serialized
+    fcntl = None
+
+MANIFEST = "manifest.json"
+BUILD_VERSION = 1
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COMPRESSIBLE = {".html", ".js", ".css", ".json", ".svg", ".txt"}
+MIN_COMPRESS = 256  # bytes; smaller files gain nothing
+
+_INLINE = re.compile(r"<(style|script)>(.*?)</\1>", re.S)
+
+
+def fingerprint(src_dir) -> str:
+    """Hash of every source file's name and content."""
+    digest = hashlib.sha256(str(BUILD_VERSION).encode())
+    for path in sorted(Path(src_dir).rglob("*")):
+        if path.is_file():
+            digest.update(path.relative_to(src_dir).as_posix().encode() + b"\0")
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _hashed_name(stem: str, data: bytes, suffix: str) -> str:
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{suffix}"
+
+
+def _write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+@contextmanager
+def _build_lock(out_dir: Path):
+    """Hold an exclusive lock on ``<out_dir>.lock`` for the duration."""
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_dir.with_name(out_dir.name + ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _compress(path: Path, data: bytes) -> list:
+    if path.suffix not in COMPRESSIBLE or len(data) < MIN_COMPRESS:
+        return []
+    written = [path.name + ".gz"]
+    _write(path.with_name(written[0]), gzip.compress(data, 9, mtime=0))
+    if brotli is not None:
+        written.append(path.name + ".br")
+        _write(path.with_name(written[1]), brotli.compress(data))
+    return written
+
+
+def build_assets(src_dir, out_dir) -> dict:
+    """Build `src_dir` into `out_dir` and return the manifest."""
+    src_dir, out_dir = Path(src_dir), Path(out_dir)
+    with _build_lock(out_dir):
+        return _build(src_dir, out_dir)
+
+
+def _build(src_dir: Path, out_dir: Path) -> dict:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    outputs: Dict[str, bytes] = {}
+    hashed: Dict[str, str] = {}
+    immutable = set()
+
+    # Pages last, so their references to other files can use the hashed names
+    sources = sorted(
+        (path.suffix == ".html", path) for path in src_dir.rglob("*") if path.is_file()
+    )
+    for is_page, path in sources:
+        name = path.relative_to(src_dir).as_posix()
+        data = path.read_bytes()
+        if is_page:
+            stem = name[: -len(".html")]
+
+            def extract(match):
+                kind, body = match.group(1), match.group(2).encode()
+                suffix = ".css" if kind == "style" else ".js"
+                asset = _hashed_name(stem, body, suffix)
+                outputs[asset] = body
+                hashed[f"{stem}{suffix}"] = asset
+                immutable.add(asset)
+                if kind == "style":
+                    return f'<link rel="stylesheet" href="/ui/{asset}">'
+                return f'<script src="/ui/{asset}"></script>'
+
+            html = _INLINE.sub(extract, data.decode())
+            for logical, asset in list(hashed.items()):
+                html = html.replace(f'"/ui/{logical}"', f'"/ui/{asset}"')
+            data = html.encode()
+        else:
+            stem = name[: len(name) - len(path.suffix)]
+            hashed[name] = _hashed_name(stem, data, path.suffix)
+            outputs[hashed[name]] = data
+            immutable.add(hashed[name])
+        outputs[name] = data
+
+    files = set()
+    for name, data in outputs.items():
+        path = out_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write(path, data)
+        files.add(name)
+        files.update(
+            (Path(name).parent / extra).as_posix() for extra in _compress(path, data)
+        )
+
+    manifest = {
+        "version": BUILD_VERSION,
+        "source": fingerprint(src_dir),
+        "assets": hashed,
+        "immutable": sorted(immutable),
+    }
+    _write(out_dir / MANIFEST, json.dumps(manifest, indent=2).encode())
+    files.add(MANIFEST)
+
+    # Drop what earlier builds left behind
+    for path in out_dir.rglob("*"):
+        if path.is_file() and path.relative_to(out_dir).as_posix() not in files:
+            path.unlink()
+    return manifest
+
+
+def read_manifest(out_dir) -> Optional[dict]:
+    try:
+        manifest = json.loads((Path(out_dir) / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == BUILD_VERSION else None
+
+
+def current_manifest(src_dir, out_dir) -> Optional[dict]:
+    """The build's manifest if it matches `src_dir`, else None. Never writes."""
+    manifest = read_manifest(out_dir)
+    if manifest is not None and manifest.get("source") == fingerprint(src_dir):
+        return manifest
+    return None
+
+
+def ensure_built(src_dir, out_dir) -> dict:
+    """Return the build's manifest, rebuilding only if the sources changed."""
+    src_dir, out_dir = Path(src_dir), Path(out_dir)
+    manifest = current_manifest(src_dir, out_dir)
+    if manifest is not None:
+        return manifest
+    with _build_lock(out_dir):
+        # Another process may have finished the build while we waited
+        return current_manifest(src_dir, out_dir) or _build(src_dir, out_dir)
+
+
+def accepted_encodings(headers: Headers) -> set:
+    """Content codings the client accepts (``q=0`` entries excluded)."""
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                pass
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def inject_snapshot(html: str, snapshot: dict, name: str = "QLINK_SNAPSHOT") -> str:
+    """Embed `snapshot` as ``window.<name>`` just before ``</head>``."""
+    data = json.dumps(snapshot, separators=(",", ":")).replace("<", "\\u003c")
+    tag = f"<script>window.{name}={data};</script>"
+    head = html.find("</head>")
+    return html[:head] + tag + html[head:] if head >= 0 else tag + html
+
+
+# Gzipped rendered pages by ETag; a page only changes with its snapshot
+_GZIP_CACHE_SIZE = 16
+_gzip_cache: Dict[str, bytes] = {}
+_gzip_lock = threading.Lock()
+
+
+def _gzipped(etag: str, body: bytes) -> bytes:
+    with _gzip_lock:
+        cached = _gzip_cache.get(etag)
+    if cached is None:
+        cached = gzip.compress(body, 6)
+        with _gzip_lock:
+            while len(_gzip_cache) >= _GZIP_CACHE_SIZE:
+                _gzip_cache.pop(next(iter(_gzip_cache)))
+            _gzip_cache[etag] = cached
+    return cached
+
+
+def html_response(html: str, headers: Headers) -> Response:
+    """A no-cache HTML response with an ETag, gzipped when the client accepts it.
+
+    The gzipped body is reused while the page (and its snapshot) is unchanged,
+    and a matching ``If-None-Match`` gets a 304.
+    """
+    body = html.encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+    extra = {"Cache-Control": REVALIDATE, "Vary": "Accept-Encoding", "ETag": etag}
+    if etag in headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=extra)
+    if len(body) >= MIN_COMPRESS and "gzip" in accepted_encodings(headers):
+        body = _gzipped(etag, body)
+        extra["Content-Encoding"] = "gzip"
+    return Response(body, media_type="text/html", headers=extra)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``.br``/``.gz`` siblings and cache headers."""
+
+    def __init__(self, *args, immutable=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable = set(immutable)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        headers = {"Vary": "Accept-Encoding"}
+        path = full_path
+        for coding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if coding in accepted and os.path.isfile(f"{full_path}{suffix}"):
+                path = f"{full_path}{suffix}"
+                stat_result = os.stat(path)
+                headers["Content-Encoding"] = coding
+                break
+        name = Path(
+            os.path.relpath(
+                os.path.realpath(full_path), os.path.realpath(self.directory)
+            )
+        ).as_posix()
+        headers["Cache-Control"] = IMMUTABLE if name in self.immutable else REVALIDATE
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    here = Path(__file__).resolve().parent
+    built = ensure_built(here / "static", here / "static_build")
+    print(f"Built {len(built['assets'])} hashed assets into {here / 'static_build'}")
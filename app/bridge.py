@@ -16,16 +16,53 @@ Serves a static UI from `app/static` at /ui when the directory exists.
 """
 
 from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import Optional, Set
+
+from app.assets import (
+    PrecompressedStaticFiles,
+    current_manifest,
+    html_response,
+    inject_snapshot,
+)
+from app.eventcodec import available_encodings, encode_event, event_schema
+from app.hub import EventFanout, HubClient, HubError
+from app.linefeed import LineFeedServer
+from app.logs import configure_logging, parse_sample
+from app.metrics import metrics
+from app.planner import Plan, plan_levels, presets_from_index
+from app.project_index import address_index, load_index, read_index
+from app.rules import RuleEngine, compile_rules, read_rules_file
+from app.scenes import (
+    Scene,
+    compile_scenes,
+    format_fade,
+    known_load_ids,
+)
+from app.state import KeypadLedStore, LoadStateStore
+from app.targets import (
+    Backoff,
+    CircuitOpen,
+    Unavailable,
+    VantageTarget,
+    build_registry,
+    enable_keepalive,
+)
+from app.webhooks import WebhookDispatcher, compile_webhooks
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import math
 import os
+import re
 import socket
 import logging
 import threading
 import time
 from datetime import datetime
+from http import HTTPStatus
 from time import perf_counter
 
 try:
@@ -37,10 +74,11 @@ except Exception:
 
 app = FastAPI(title="Vantage QLink Bridge (fixed)")
 
-# static UI mount
+# static UI, mounted at /ui after the routes (see _mount_ui)
 static_dir = os.path.join(os.path.dirname(__file__), "static")
-if os.path.isdir(static_dir):
-    app.mount("/ui", StaticFiles(directory=static_dir, html=True), name="ui")
+ui_build_dir = os.path.join(os.path.dirname(__file__), "static_build")
+# Pages served with a config/state snapshot embedded
+SNAPSHOT_PAGES = ("home.html", "home-v2.html")
 
 
 def _env(name: str, default: str) -> str:
@@ -54,17 +92,207 @@ QLINK_EOL = _env("Q_LINK_EOL", "CR").upper()
 EOL = "\r\n" if QLINK_EOL == "CRLF" else "\r"
 QLINK_TIMEOUT = float(_env("QLINK_TIMEOUT", "2.0"))
 QLINK_FADE = _env("QLINK_FADE", "2.3")
+QLINK_POOL_SIZE = int(_env("QLINK_POOL_SIZE", "2"))
+# Listener reconnect backoff: first retry is immediate, then base*2^n up to max
+QLINK_RECONNECT_BASE = float(_env("QLINK_RECONNECT_BASE", "0.5"))
+QLINK_RECONNECT_MAX = float(_env("QLINK_RECONNECT_MAX", "30"))
+# Listener liveness: probe after this much silence, reconnect after the other
+QLINK_PROBE_INTERVAL = float(_env("QLINK_PROBE_INTERVAL", "15"))
+QLINK_SILENCE_TIMEOUT = float(_env("QLINK_SILENCE_TIMEOUT", "25"))
+# Circuit breaker: open after this many failed commands, probe after RESET s
+QLINK_BREAKER_FAILURES = int(_env("QLINK_BREAKER_FAILURES", "3"))
+QLINK_BREAKER_RESET = float(_env("QLINK_BREAKER_RESET", "10"))
+# Commands allowed to wait for a pooled connection before new ones get 503
+QLINK_MAX_QUEUED = int(_env("QLINK_MAX_QUEUED", "16"))
+# Skip VLO@ writes to loads already at the requested level (per fresh LO events)
+QLINK_ELIDE = _env("QLINK_ELIDE", "0").lower() in ("1", "true", "yes")
+QLINK_STATE_MAX_AGE = float(_env("QLINK_STATE_MAX_AGE", "600"))
+# Threads running local rule actions (app/rules.py)
+QLINK_RULE_WORKERS = int(_env("QLINK_RULE_WORKERS", "4"))
+# Frames queued per /events client; a client this far behind is disconnected
+QLINK_WS_QUEUE = int(_env("QLINK_WS_QUEUE", "256"))
+# Unix socket of a shared hub (app/hub.py); when set this process is a worker
+QLINK_HUB = _env("QLINK_HUB", "")
+# Local event line feed (app/linefeed.py); empty disables each listener
+QLINK_FEED_SOCKET = _env("QLINK_FEED_SOCKET", "")
+QLINK_FEED_TCP = int(_env("QLINK_FEED_TCP", "0"))
+QLINK_FEED_BUFFER = int(_env("QLINK_FEED_BUFFER", "1000"))
+# Serve /ui from a precompressed, content-hashed build of app/static
+QLINK_UI_PRECOMPRESS = _env("QLINK_UI_PRECOMPRESS", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+# Logging (app/logs.py): queued writes, optional rotated file, sampling, JSON
+LOG_FILE = _env("LOG_FILE", "")
+QLINK_LOG_LEVEL = _env("QLINK_LOG_LEVEL", "INFO")
+QLINK_LOG_MAX_BYTES = int(_env("QLINK_LOG_MAX_BYTES", "1000000"))
+QLINK_LOG_BACKUPS = int(_env("QLINK_LOG_BACKUPS", "3"))
+QLINK_LOG_JSON = _env("QLINK_LOG_JSON", "0").lower() in ("1", "true", "yes")
+QLINK_LOG_SAMPLE = _env("QLINK_LOG_SAMPLE", "")
+
+# Vantage project export, compiled to config/project_index.json on change
+QLINK_PROJECT_FILE = _env(
+    "QLINK_PROJECT_FILE",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "Info", "Home Prado Ver.txt"
+    ),
+)
 
 logger = logging.getLogger("qlink")
-if not logger.handlers:
-    logger.addHandler(logging.StreamHandler())
+# High-rate categories, sampled with QLINK_LOG_SAMPLE (see app/logs.py)
+event_log = logging.getLogger("qlink.events")
+command_log = logging.getLogger("qlink.commands")
+configure_logging(
+    logger,
+    level=QLINK_LOG_LEVEL,
+    log_file=LOG_FILE or None,
+    max_bytes=QLINK_LOG_MAX_BYTES,
+    backups=QLINK_LOG_BACKUPS,
+    json_format=QLINK_LOG_JSON,
+    sample=parse_sample(QLINK_LOG_SAMPLE),
+)
+
+
+def _find_config_file(filename: str) -> Optional[str]:
+    """Locate a file in the project's config directory.
+
+    First try relative path, then absolute paths.
+    """
+    config_paths = [
+        os.path.join(os.path.dirname(__file__), "..", "config", filename),
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "..", "config", filename
+        ),
+        f"/home/pi/qlink-bridge/config/{filename}",  # Pi absolute path
+        os.path.join("config", filename),  # CWD relative
+    ]
+    for path in config_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _load_config_json(filename: str) -> dict:
+    """Load a JSON document from the config directory ({} when missing/invalid)."""
+    path = _find_config_file(filename)
+    if not path:
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not load {filename}: {e}")
+        return {}
+
+
+_project_cache: Dict[str, object] = {
+    "key": None,
+    "index": {},
+    "addresses": {},
+    # load id (contractor number) -> master it is wired to
+    "masters": {},
+    "presets": [],
+}
+
+
+def _file_key(path: Optional[str]) -> Optional[Tuple[float, int]]:
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return st.st_mtime, st.st_size
+
+
+def get_project_index() -> dict:
+    """Compiled project index (see app/project_index.py); {} when unavailable.
+
+    The stored index is reused while the project file's content hash matches,
+    so a restart costs one JSON load; files are re-checked only when their
+    mtime or size changes.
+    """
+    index_path = _find_config_file("project_index.json")
+    key = (_file_key(QLINK_PROJECT_FILE), _file_key(index_path))
+    if _project_cache["key"] == key:
+        return _project_cache["index"]
+
+    t0 = perf_counter()
+    rebuilt = False
+    if key[0] is not None:
+        if index_path is None:
+            index_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "..",
+                "config",
+                "project_index.json",
+            )
+        try:
+            index, rebuilt = load_index(QLINK_PROJECT_FILE, index_path)
+        except OSError as e:
+            logger.warning(f"Could not compile project file: {e}")
+            index = read_index(index_path) or {}
+    else:
+        index = (read_index(index_path) if index_path else None) or {}
+    logger.info(
+        "Project index %s: %d stations, %d loads in %.1f ms",
+        "rebuilt" if rebuilt else "loaded",
+        len(index.get("stations", {})),
+        len(index.get("loads", {})),
+        (perf_counter() - t0) * 1000,
+    )
+    addresses = address_index(index)
+    _project_cache.update(
+        key=(_file_key(QLINK_PROJECT_FILE), _file_key(index_path)),
+        index=index,
+        addresses=addresses,
+        masters={load["id"]: address[0] for address, load in addresses.items()},
+        presets=presets_from_index(index),
+    )
+    return index
+
+
+# ===== IP-Enabler targets (see app/targets.py) =====
+targets = build_registry(
+    _load_config_json("enablers.json"),
+    VANTAGE_IP,
+    VANTAGE_PORT,
+    QLINK_POOL_SIZE,
+    probe_interval=QLINK_PROBE_INTERVAL,
+    silence_timeout=QLINK_SILENCE_TIMEOUT,
+    breaker_failures=QLINK_BREAKER_FAILURES,
+    breaker_reset=QLINK_BREAKER_RESET,
+    max_queued=QLINK_MAX_QUEUED,
+)
 
 # ===== Event Monitoring Globals =====
-event_socket: Optional[socket.socket] = None
-event_socket_connected = False
-event_monitoring_enabled = False
-websocket_clients: Set[WebSocket] = set()
-event_listener_thread: Optional[threading.Thread] = None
+# Connected /events clients and the encoding each asked for (app/eventcodec.py)
+websocket_clients: Dict[WebSocket, str] = {}
+# Each client's bounded frame queue and the task sending from it
+_outboxes: Dict[WebSocket, Tuple[asyncio.Queue, asyncio.Task]] = {}
+# Local (non-websocket) consumers of events, e.g. hub subscribers
+event_fanout = EventFanout()
+# Worker mode: enabler access goes through the hub process
+hub_client: Optional[HubClient] = HubClient(QLINK_HUB) if QLINK_HUB else None
+# Last known level per load number, from resolved LO events
+load_state = LoadStateStore()
+# Keypad LED bitmaps per station, from LE/LC events
+led_state = KeypadLedStore()
+# Event loop serving websockets, captured at startup
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_queue: Optional[asyncio.Queue] = None
+# Unix/TCP line feed for local readers, started by the enabler owner
+line_feed: Optional[LineFeedServer] = None
+
+
+def _log_event(event: dict, msg: str, *args) -> None:
+    """One DEBUG qlink.events line, with the parsed event as a structured field.
+
+    Nothing is built unless DEBUG is enabled; the queue handler copies the
+    event only for lines that pass sampling (see app/logs.py).
+    """
+    if event_log.isEnabledFor(logging.DEBUG):
+        event_log.debug(msg, *args, extra={"event": event})
 
 
 def parse_vantage_event(message: str) -> Optional[dict]:
@@ -88,7 +316,9 @@ def parse_vantage_event(message: str) -> Optional[dict]:
                     "serial": parts[5] if len(parts) > 5 else None,
                 }
             )
-            logger.info(f"📍 Button V{parts[2]} btn {parts[3]} {event['state']}")
+            _log_event(
+                event, "📍 Button V%s btn %s %s", parts[2], parts[3], event["state"]
+            )
 
         # Module load change: LO <master> <enclosure> <module> <load> <level>
         elif parts[0] == "LO":
@@ -102,9 +332,7 @@ def parse_vantage_event(message: str) -> Optional[dict]:
                     "level": int(parts[5]),
                 }
             )
-            logger.info(
-                f"💡 Load M{parts[1]}E{parts[2]}M{parts[3]}L{parts[4]} → {parts[5]}%"
-            )
+            _log_event(event, "💡 Load M%sE%sM%sL%s → %s%%", *parts[1:6])
 
         # Station load change: LS <master> <station> <load> <level>
         elif parts[0] == "LS":
@@ -117,7 +345,7 @@ def parse_vantage_event(message: str) -> Optional[dict]:
                     "level": int(parts[4]),
                 }
             )
-            logger.info(f"💡 Station V{parts[2]} load {parts[3]} → {parts[4]}%")
+            _log_event(event, "💡 Station V%s load %s → %s%%", *parts[2:5])
 
         # Variable load change: LV <master> <variable> <level>
         elif parts[0] == "LV":
@@ -129,7 +357,7 @@ def parse_vantage_event(message: str) -> Optional[dict]:
                     "level": int(parts[3]),
                 }
             )
-            logger.info(f"💡 Variable {parts[2]} → {parts[3]}%")
+            _log_event(event, "💡 Variable %s → %s%%", parts[2], parts[3])
 
         # LED state change (keypad): LE <master> <station> <onleds_hex> <blinkleds_hex>
         elif parts[0] == "LE":
@@ -142,7 +370,7 @@ def parse_vantage_event(message: str) -> Optional[dict]:
                     "blink_leds": parts[4],
                 }
             )
-            logger.info(f"🔆 LEDs V{parts[2]} on={parts[3]} blink={parts[4]}")
+            _log_event(event, "🔆 LEDs V%s on=%s blink=%s", *parts[2:5])
 
         # LED state change (LCD): LC <master> <station> <button> <state>
         elif parts[0] == "LC":
@@ -155,7 +383,9 @@ def parse_vantage_event(message: str) -> Optional[dict]:
                     "state": "on" if parts[4] == "1" else "off",
                 }
             )
-            logger.info(f"🔆 LCD V{parts[2]} btn {parts[3]} LED {event['state']}")
+            _log_event(
+                event, "🔆 LCD V%s btn %s LED %s", parts[2], parts[3], event["state"]
+            )
 
         # Response to our monitoring enable commands (ignore)
         elif parts[0] in ("ROD", "ROL", "ROS"):
@@ -172,129 +402,413 @@ def parse_vantage_event(message: str) -> Optional[dict]:
         return None
 
 
+async def _broadcast_events():
+    """Queue events for every websocket client, in arrival order.
+
+    Each client has its own bounded outbox and sender task, so a slow client
+    never delays the others; one that falls QLINK_WS_QUEUE frames behind is
+    disconnected.
+    """
+    while True:
+        event = await _event_queue.get()
+        clients = list(websocket_clients.items())
+        if not clients:
+            continue
+        # Serialized once per encoding; every client gets the same frame
+        frames: Dict[str, object] = {}
+        for client, encoding in clients:
+            entry = _outboxes.get(client)
+            if entry is None:
+                continue
+            frame = frames.get(encoding)
+            if frame is None:
+                frame = frames[encoding] = encode_event(event, encoding)
+                metrics.inc("events_encoded", encoding=encoding)
+            try:
+                entry[0].put_nowait(frame)
+            except asyncio.QueueFull:
+                logger.warning(
+                    "Dropping WebSocket client %d frames behind", QLINK_WS_QUEUE
+                )
+                metrics.inc("websocket_slow_clients")
+                drop_websocket_client(client)
+        # Let the senders run before the next event of a burst
+        await asyncio.sleep(0)
+
+
+def _send_frame(client: WebSocket, frame):
+    if isinstance(frame, bytes):
+        return client.send_bytes(frame)
+    return client.send_text(frame)
+
+
+async def _send_outbox(client: WebSocket, outbox: asyncio.Queue) -> None:
+    """Send one client's frames in order until it is dropped or a send fails."""
+    try:
+        while True:
+            await _send_frame(client, await outbox.get())
+    except asyncio.CancelledError:
+        # Dropped: close the socket so a stalled client learns about it
+        try:
+            await asyncio.wait_for(client.close(code=1013), 1.0)
+        except Exception:
+            pass
+        raise
+    except Exception as e:
+        logger.warning(f"WebSocket send failed: {e}")
+        websocket_clients.pop(client, None)
+        _outboxes.pop(client, None)
+
+
+def add_websocket_client(client: WebSocket, encoding: str) -> asyncio.Queue:
+    """Register an /events client; returns its outbox (event loop only)."""
+    outbox: asyncio.Queue = asyncio.Queue(QLINK_WS_QUEUE)
+    _outboxes[client] = (outbox, asyncio.create_task(_send_outbox(client, outbox)))
+    websocket_clients[client] = encoding
+    return outbox
+
+
+def drop_websocket_client(client: WebSocket) -> None:
+    websocket_clients.pop(client, None)
+    entry = _outboxes.pop(client, None)
+    if entry is not None:
+        entry[1].cancel()
+
+
+def record_led_event(event: dict) -> None:
+    """Apply an LE (station bitmaps) or LC (one LCD button) event to led_state."""
+    if event["type"] == "led_lcd":
+        led_state.set_button(
+            event["master"], event["station"], event["button"], event["state"] == "on"
+        )
+        return
+    try:
+        on, blink = int(event["on_leds"], 16), int(event["blink_leds"], 16)
+    except ValueError:
+        metrics.inc("led_events_invalid", target=event.get("target"))
+        return
+    led_state.update(event["master"], event["station"], on, blink)
+
+
 def broadcast_event_sync(event: dict):
-    """Broadcast event to all connected WebSocket clients (synchronous)"""
-    if not websocket_clients:
+    """Broadcast event to local subscribers and all WebSocket clients.
+
+    Called from listener/subscriber threads; it only hands the event to the
+    server's event loop and never waits on a client.
+    """
+    if "load_id" in event:
+        # Workers see resolved events from the hub, so each process keeps state
+        load_state.update(event["load_id"], event["level"])
+    elif event.get("type") in ("led_keypad", "led_lcd"):
+        record_led_event(event)
+    if line_feed is not None:
+        line_feed.publish(event)
+    event_fanout.publish(event)
+    if websocket_clients and _event_loop is not None:
+        _event_loop.call_soon_threadsafe(_event_queue.put_nowait, event)
+
+
+def resolve_load_event(event: dict) -> None:
+    """Attach the load number and name to an LO event.
+
+    LO events address a load by module position; the project index maps that
+    to the load number used by commands (see get_project_index).
+    """
+    load = _project_cache["addresses"].get(
+        (event["master"], event["enclosure"], event["module"], event["load"])
+    )
+    if load is None:
+        metrics.inc("lo_events_unresolved", target=event.get("target"))
         return
+    metrics.inc("lo_events_resolved", target=event.get("target"))
+    event.update(load_id=load["id"], name=load["name"], room=load["room"])
 
-    disconnected = set()
-    for client in websocket_clients:
-        try:
-            # Use blocking send since we're in a thread
-            import asyncio
 
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(client.send_json(event))
-            loop.close()
-        except Exception as e:
-            logger.warning(f"WebSocket send failed: {e}")
-            disconnected.add(client)
+def split_lines(buffer: str) -> Tuple[List[str], str]:
+    """Split complete CR-terminated lines off `buffer`; returns (lines, rest)."""
+    *lines, rest = buffer.split("\r")
+    return [line.strip() for line in lines if line.strip()], rest
 
-    # Remove disconnected clients
-    for client in disconnected:
-        websocket_clients.discard(client)
 
+def encode_command(cmd: str) -> bytes:
+    """Wire form of one Q-Link command."""
+    return (cmd + EOL).encode("ascii", errors="ignore")
 
-def event_listener_loop():
-    """Background thread that maintains persistent connection and listens for events"""
-    global event_socket, event_socket_connected, event_monitoring_enabled
 
-    logger.info("🎧 Event listener thread started")
+# Monitoring enable commands, pipelined in one write on every connect, and the
+# responses that confirm each of them
+MONITOR_ENABLE = (
+    b"VOS@ 1 1\r"  # Button monitoring with serial numbers
+    b"VOL@ 1\r"  # Load change monitoring
+    b"VOD@ 3\r"  # LED monitoring (all types)
+)
+MONITOR_ACKS = ("ROS", "ROL", "ROD")
+# Liveness probe on a silent listener connection; answered by ROS
+LIVENESS_PROBE = b"VOS@ 1 1\r"
+
+
+def event_listener_loop(target: VantageTarget):
+    """Background thread that maintains persistent connection and listens for events"""
+    logger.info(f"🎧 Event listener thread started for target '{target.name}'")
+    backoff = Backoff(QLINK_RECONNECT_BASE, cap=QLINK_RECONNECT_MAX)
+    # Start of the current outage; time-to-first-event is measured from here
+    outage_started = perf_counter()
 
     while True:
         try:
-            logger.info(
-                f"🔌 Connecting event listener to {VANTAGE_IP}:{VANTAGE_PORT}..."
-            )
+            logger.info(f"🔌 Connecting event listener to {target.ip}:{target.port}...")
 
             # Create persistent socket
-            event_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            event_socket.connect((VANTAGE_IP, VANTAGE_PORT))
-            event_socket.settimeout(None)  # Blocking mode for persistent connection
-            event_socket_connected = True
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            target.event_socket = sock
+            sock.settimeout(QLINK_TIMEOUT)
+            sock.connect((target.ip, target.port))
+            enable_keepalive(sock)
+            target.liveness.reset()
+            target.event_socket_connected = True
 
             logger.info("✅ Event listener connected")
 
-            # Enable monitoring (settings persist, but good to send on each connect)
-            logger.info("📡 Enabling Vantage event monitoring...")
-            event_socket.send(b"VOS@ 1 1\r")  # Button monitoring with serial numbers
-            time.sleep(0.1)
-            event_socket.send(b"VOL@ 1\r")  # Load change monitoring
-            time.sleep(0.1)
-            event_socket.send(b"VOD@ 3\r")  # LED monitoring (all types)
-            time.sleep(0.1)
-
-            event_monitoring_enabled = True
-            logger.info("✅ Event monitoring enabled (VOS@, VOL@, VOD@)")
+            # Enable monitoring (settings persist, but good to send on each connect).
+            # All three go out in one write; their ROS/ROL/ROD replies confirm them.
+            sock.sendall(MONITOR_ENABLE)
+            enable_sent = perf_counter()
+            pending = set(MONITOR_ACKS)
+            resent = False
+            awaiting_first_event = True
 
             # Listen for events continuously
             buffer = ""
             while True:
-                data = event_socket.recv(4096).decode("ascii", errors="ignore")
+                try:
+                    data = sock.recv(4096).decode("ascii", errors="ignore")
+                except socket.timeout:
+                    if not pending:
+                        _idle_probe(target, sock)
+                        continue
+                    if resent:
+                        raise ConnectionError(
+                            "monitoring not confirmed (missing "
+                            + ", ".join(sorted(pending))
+                            + ")"
+                        )
+                    logger.warning(f"⚠️  No {sorted(pending)} yet, re-sending enables")
+                    sock.sendall(MONITOR_ENABLE)
+                    resent = True
+                    continue
 
                 if not data:
                     logger.warning("⚠️  Connection closed by Vantage")
                     raise ConnectionError("Socket closed by remote")
+                if target.liveness.received() and not pending:
+                    sock.settimeout(target.liveness.timeout())
+
+                messages, buffer = split_lines(buffer + data)
+                for message in messages:
+                    if message[:3] in MONITOR_ACKS:
+                        # Response to our monitoring enable commands
+                        if pending:
+                            pending.discard(message[:3])
+                            if not pending:
+                                _monitoring_confirmed(target, sock, enable_sent)
+                                backoff.reset()
+                        continue
+
+                    event = parse_vantage_event(message)
+                    if event:
+                        event["target"] = target.name
+                        if event["type"] == "load_module":
+                            resolve_load_event(event)
+                        check_rules()
+                        rule_engine.dispatch(event)
+                        check_webhooks()
+                        webhooks.publish(event)
+                        if awaiting_first_event:
+                            awaiting_first_event = False
+                            tte = perf_counter() - outage_started
+                            target.last_time_to_first_event = round(tte, 3)
+                            metrics.observe(
+                                "listener_time_to_first_event_seconds",
+                                tte,
+                                target=target.name,
+                            )
+                        broadcast_event_sync(event)
 
-                buffer += data
+        except Exception as e:
+            logger.error(f"❌ Event listener error ({target.name}): {e}")
+            was_connected = target.event_socket_connected
+            if was_connected:
+                outage_started = perf_counter()
+            target.event_socket_connected = False
+            target.event_monitoring_enabled = False
+            if was_connected:
+                _publish_status(target)
+            target.liveness.lost()
+            load_state.mark_stale()
+
+            if target.event_socket:
+                try:
+                    target.event_socket.close()
+                except OSError:
+                    pass
+                target.event_socket = None
 
-                # Process complete messages (ending with \r)
-                while "\r" in buffer:
-                    message, buffer = buffer.split("\r", 1)
-                    message = message.strip()
+            target.reconnects += 1
+            metrics.inc("listener_reconnects", target=target.name)
+            delay = backoff.next_delay()
+            logger.info(f"⏳ Reconnecting in {delay:.1f} seconds...")
+            time.sleep(delay)
 
-                    if message:
-                        event = parse_vantage_event(message)
-                        if event:
-                            broadcast_event_sync(event)
 
-        except Exception as e:
-            logger.error(f"❌ Event listener error: {e}")
-            event_socket_connected = False
-            event_monitoring_enabled = False
+def _idle_probe(target: VantageTarget, sock: socket.socket) -> None:
+    """The listener read timed out: probe the enabler, or give up on silence."""
+    try:
+        probe = target.liveness.idle()
+    except ConnectionError:
+        target.silence_timeouts += 1
+        metrics.inc("listener_silence_timeouts", target=target.name)
+        raise
+    if probe:
+        sock.sendall(LIVENESS_PROBE)
+        metrics.inc("listener_probes", target=target.name)
+    sock.settimeout(target.liveness.timeout())
+
+
+def _publish_status(target: VantageTarget) -> None:
+    """Tell /events clients the default target's listener state changed."""
+    if target is targets.default:
+        broadcast_event_sync(
+            {
+                "type": "status",
+                "connected": target.event_socket_connected,
+                "monitoring": target.event_monitoring_enabled,
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
 
-            if event_socket:
-                try:
-                    event_socket.close()
-                except:
-                    pass
-                event_socket = None
 
-            logger.info("⏳ Reconnecting in 5 seconds...")
-            time.sleep(5)
+def _monitoring_confirmed(target: VantageTarget, sock: socket.socket, sent: float):
+    target.event_monitoring_enabled = True
+    _publish_status(target)
+    # Reads now wake up to probe a silent enabler (see _idle_probe)
+    sock.settimeout(target.liveness.timeout())
+    elapsed = perf_counter() - sent
+    metrics.observe("listener_enable_seconds", elapsed, target=target.name)
+    logger.info(
+        f"✅ Event monitoring enabled (VOS@, VOL@, VOD@) in {elapsed * 1000:.0f} ms"
+    )
 
 
 def start_event_listener():
-    """Start the event listener background thread"""
-    global event_listener_thread
+    """Start one event listener background thread per target"""
+    get_project_index()  # LO events are resolved against it
+    check_rules(force=True)
+    check_webhooks(force=True)
+    for target in targets:
+        if target.listener_thread and target.listener_thread.is_alive():
+            logger.info(f"Event listener for '{target.name}' already running")
+            continue
+
+        target.listener_thread = threading.Thread(
+            target=event_listener_loop,
+            args=(target,),
+            daemon=True,
+            name=f"VantageEventListener-{target.name}",
+        )
+        target.listener_thread.start()
+        logger.info(f"🚀 Event listener thread started for '{target.name}'")
+
+
+def start_line_feed():
+    """Serve the local event line feed if QLINK_FEED_SOCKET/QLINK_FEED_TCP is set"""
+    global line_feed
 
-    if event_listener_thread and event_listener_thread.is_alive():
-        logger.info("Event listener already running")
+    if line_feed is not None or not (QLINK_FEED_SOCKET or QLINK_FEED_TCP):
         return
+    try:
+        line_feed = LineFeedServer(
+            QLINK_FEED_SOCKET or None, QLINK_FEED_TCP or None, QLINK_FEED_BUFFER
+        )
+    except OSError as e:
+        logger.error(f"❌ Could not start event line feed: {e}")
+        return
+    line_feed.start()
+    logger.info(f"📤 Event line feed on {line_feed.addresses}")
+
+
+def _resolve_target(name: Optional[str] = None) -> VantageTarget:
+    try:
+        return targets.get(name)
+    except KeyError as ex:
+        raise HTTPException(status_code=404, detail=ex.args[0]) from ex
 
-    event_listener_thread = threading.Thread(
-        target=event_listener_loop, daemon=True, name="VantageEventListener"
+
+def _load_target(load: int, target: Optional[str] = None) -> str:
+    """`target` if given, else the enabler serving the master `load` is on.
+
+    Loads the project index does not place go to the default target. Callers
+    refresh the index (get_project_index) first.
+    """
+    if target is not None:
+        return target
+    return targets.for_master(_project_cache["masters"].get(load)).name
+
+
+def _unavailable(ex: Unavailable, target: VantageTarget) -> HTTPException:
+    """503 with Retry-After for a command refused without contacting the enabler."""
+    reason = "breaker" if isinstance(ex, CircuitOpen) else "shed"
+    metrics.inc("commands_rejected", reason=reason, target=target.name)
+    return HTTPException(
+        status_code=503,
+        detail=str(ex),
+        headers={"Retry-After": str(max(1, math.ceil(ex.retry_after)))},
     )
-    event_listener_thread.start()
-    logger.info("🚀 Event listener thread started")
 
 
-def qlink_send(cmd: str, timeout: Optional[float] = None) -> str:
+def _hub_error(ex: HubError) -> HTTPException:
+    return HTTPException(status_code=ex.status, detail=ex.detail, headers=ex.headers)
+
+
+def qlink_send(
+    cmd: str, timeout: Optional[float] = None, target: Optional[str] = None
+) -> str:
     """Send a single ASCII command to the Vantage IP-Enabler and return response.
 
-    Raises HTTPException on connect/timeout errors so FastAPI returns proper status.
+    The command goes out on a pooled connection of the named target (default
+    target when omitted). Raises HTTPException on connect/timeout errors so
+    FastAPI returns proper status, and 503 with Retry-After at once while the
+    target's circuit breaker is open or its command queue is full.
     """
     t0 = perf_counter()
     to = timeout or QLINK_TIMEOUT
+    if hub_client is not None:
+        try:
+            reply = hub_client.send(cmd, to, target)
+            metrics.observe("command_seconds", perf_counter() - t0)
+            return reply
+        except HubError as ex:
+            raise _hub_error(ex) from ex
+        finally:
+            dt = (perf_counter() - t0) * 1000
+            name = target or targets.default_name
+            command_log.info(
+                "cmd=%s target=%s via=hub elapsedMs=%.1f",
+                cmd,
+                name,
+                dt,
+                extra={
+                    "cmd": cmd,
+                    "target": name,
+                    "via": "hub",
+                    "elapsed_ms": round(dt, 1),
+                },
+            )
+    t = _resolve_target(target)
     try:
-        with socket.create_connection((VANTAGE_IP, VANTAGE_PORT), timeout=to) as s:
-            s.sendall((cmd + EOL).encode("ascii", errors="ignore"))
-            s.settimeout(to)
-            try:
-                data = s.recv(4096)
-            except socket.timeout:
-                data = b""
+        lines = t.send(encode_command(cmd), 1, to)
+        metrics.observe("command_seconds", perf_counter() - t0)
+    except Unavailable as ex:
+        raise _unavailable(ex, t) from ex
     except socket.timeout as ex:
         raise HTTPException(
             status_code=504, detail="Timeout contacting Vantage IP-Enabler"
@@ -303,13 +817,98 @@ def qlink_send(cmd: str, timeout: Optional[float] = None) -> str:
         raise HTTPException(status_code=502, detail=f"Connect error: {ex}") from ex
     finally:
         dt = (perf_counter() - t0) * 1000
-        logger.info("cmd=%s elapsedMs=%.1f", cmd, dt)
-    return data.decode("ascii", errors="ignore").strip()
+        command_log.info(
+            "cmd=%s target=%s elapsedMs=%.1f",
+            cmd,
+            t.name,
+            dt,
+            extra={"cmd": cmd, "target": t.name, "elapsed_ms": round(dt, 1)},
+        )
+    return lines[0] if lines else ""
+
+
+def qlink_send_burst(
+    payload: bytes,
+    expected: int,
+    timeout: Optional[float] = None,
+    target: Optional[str] = None,
+) -> List[str]:
+    """Send several pre-encoded commands in one write and collect their replies.
+
+    `payload` is a ready-to-send byte string of `expected` CR-terminated
+    commands (see app.scenes). Replies are read until `expected` lines have
+    arrived or the timeout expires, so the call takes as long as the bus needs
+    rather than one connection per command.
+    """
+    to = timeout or QLINK_TIMEOUT
+    if hub_client is not None:
+        try:
+            return hub_client.send_burst(payload, expected, to, target)
+        except HubError as ex:
+            raise _hub_error(ex) from ex
+    t0 = perf_counter()
+    t = _resolve_target(target)
+    lines: List[str] = []
+    try:
+        lines = t.send(payload, expected, to)
+    except Unavailable as ex:
+        raise _unavailable(ex, t) from ex
+    except socket.timeout as ex:
+        raise HTTPException(
+            status_code=504, detail="Timeout contacting Vantage IP-Enabler"
+        ) from ex
+    except OSError as ex:
+        raise HTTPException(status_code=502, detail=f"Connect error: {ex}") from ex
+    finally:
+        dt = (perf_counter() - t0) * 1000
+        command_log.info(
+            "burst cmds=%d replies=%d target=%s elapsedMs=%.1f",
+            expected,
+            len(lines),
+            t.name,
+            dt,
+            extra={
+                "cmd": "burst",
+                "cmds": expected,
+                "replies": len(lines),
+                "target": t.name,
+                "elapsed_ms": round(dt, 1),
+            },
+        )
+    return lines
+
+
+# Bus time charged for an elided command until real ones have been timed
+ELIDED_COMMAND_SECONDS = 0.05
+
+
+def is_redundant(load: int, level: int, force: bool = False) -> bool:
+    """True if `load` is known, from fresh event-fed state, to be at `level`.
+
+    Only with QLINK_ELIDE on and `force` off. Each elided command is counted
+    in ``commands_elided`` and its estimated round trip (the mean of
+    ``command_seconds``) in ``bus_seconds_saved``.
+    """
+    if force or not QLINK_ELIDE:
+        return False
+    if load_state.fresh_level(load, QLINK_STATE_MAX_AGE) != level:
+        return False
+    timed = metrics.summary("command_seconds")
+    cost = timed["sum"] / timed["count"] if timed else ELIDED_COMMAND_SECONDS
+    metrics.inc("commands_elided")
+    metrics.inc("bus_seconds_saved", cost)
+    return True
 
 
 class LevelCmd(BaseModel):
     level: Optional[int] = None
     switch: Optional[str] = None
+    fade: Optional[float] = None
+
+
+def record_command(load: int, level: int, fade: Optional[float] = None) -> None:
+    """Note a level sent to `load` so reads interpolate its fade (app/state.py)."""
+    load_state.update(load, level, source="command", fade=fade or 0.0)
 
 
 @app.get("/about")
@@ -317,38 +916,23 @@ def about():
     return {"name": "qlink-bridge"}
 
 
-@app.get("/config")
-def get_config():
-    """Return configuration including room/load definitions."""
-    import json
+_rooms_cache: Dict[str, object] = {"key": None, "rooms": []}
 
-    # Try to load rooms/loads configuration
-    # First try relative path, then absolute paths
-    config_paths = [
-        os.path.join(os.path.dirname(__file__), "..", "config", "loads.json"),
-        os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "..", "config", "loads.json"
-        ),
-        "/home/pi/qlink-bridge/config/loads.json",  # Pi absolute path
-        "config/loads.json",  # CWD relative
-    ]
 
-    rooms = []
-    config_file = None
+def _config_rooms() -> list:
+    """Rooms from loads.json, re-parsed only when the file changes."""
+    path = _find_config_file("loads.json")
+    key = (path, _file_key(path))
+    if key != _rooms_cache["key"]:
+        rooms = _load_config_json("loads.json").get("rooms", [])
+        _rooms_cache.update(key=key, rooms=rooms)
+    return _rooms_cache["rooms"]
 
-    for path in config_paths:
-        if os.path.exists(path):
-            config_file = path
-            break
-
-    if config_file:
-        try:
-            with open(config_file, "r") as f:
-                data = json.load(f)
-                rooms = data.get("rooms", [])
-        except Exception as e:
-            logger.warning(f"Could not load loads.json: {e}")
 
+@app.get("/config")
+def get_config():
+    """Return configuration including room/load definitions."""
+    rooms = _config_rooms()
     return {"ip": VANTAGE_IP, "port": VANTAGE_PORT, "fade": QLINK_FADE, "rooms": rooms}
 
 
@@ -365,75 +949,622 @@ def root():
     return RedirectResponse(url="/ui/home.html")
 
 
+_page_cache: Dict[str, Tuple[Tuple[float, int], str]] = {}
+
+
+def _read_page(path: str) -> str:
+    key = _file_key(path)
+    if key is None:
+        raise HTTPException(404, detail="page not found")
+    cached = _page_cache.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, encoding="utf-8") as f:
+            cached = _page_cache[path] = (key, f.read())
+    return cached[1]
+
+
+def ui_snapshot() -> dict:
+    """What the home pages need for first paint: /config and /loads/state."""
+    return {"config": get_config(), "loads": load_state.snapshot()}
+
+
+def _snapshot_page(name: str):
+    def page(request: Request):
+        html = _read_page(os.path.join(ui_dir, name))
+        return html_response(inject_snapshot(html, ui_snapshot()), request.headers)
+
+    return page
+
+
+def _mount_ui() -> str:
+    """Mount the static UI at /ui and return the directory it is served from.
+
+    Serves the precompressed build (``python -m app.assets``, run before the
+    workers start) when it matches app/static; nothing is built here, so
+    importing the bridge never writes files. Otherwise the sources are served
+    as they are.
+    """
+    if not os.path.isdir(static_dir):
+        return static_dir
+    if QLINK_UI_PRECOMPRESS:
+        manifest = current_manifest(static_dir, ui_build_dir)
+        if manifest is None:
+            logger.info(
+                "No current UI build, serving app/static uncompressed "
+                "(run `python -m app.assets` to build it)"
+            )
+        else:
+            files = PrecompressedStaticFiles(
+                directory=ui_build_dir, html=True, immutable=manifest["immutable"]
+            )
+            app.mount("/ui", files, name="ui")
+            return ui_build_dir
+    app.mount("/ui", StaticFiles(directory=static_dir, html=True), name="ui")
+    return static_dir
+
+
+# Snapshot pages must be routed before the /ui mount catches them
+for _page in SNAPSHOT_PAGES:
+    app.add_api_route(f"/ui/{_page}", _snapshot_page(_page), include_in_schema=False)
+ui_dir = _mount_ui()
+
+
 @app.get("/send/{cmd}")
-def send_raw(cmd: str):
-    return {"command": cmd, "response": qlink_send(cmd)}
+def send_raw(cmd: str, target: Optional[str] = None):
+    return {"command": cmd, "response": qlink_send(cmd, target=target)}
 
 
 @app.post("/device/{id}/set")
-def set_device(id: int, body: LevelCmd):
-    # Use VLO@ command format (not VLO with fade)
-    # Format: VLO@ {load_id} {level}
+def set_device(
+    id: int, body: LevelCmd, target: Optional[str] = None, force: bool = False
+):
+    # Use VLO@ command format (not VLO)
+    # Format: VLO@ {load_id} {level} [{fade seconds}]
     if body.switch:
         if body.switch.lower() == "on":
-            return {"resp": qlink_send(f"VLO@ {id} 100")}
-        if body.switch.lower() == "off":
-            return {"resp": qlink_send(f"VLO@ {id} 0")}
-        raise HTTPException(400, "switch must be on/off")
-    if body.level is not None:
+            lvl = 100
+        elif body.switch.lower() == "off":
+            lvl = 0
+        else:
+            raise HTTPException(400, "switch must be on/off")
+    elif body.level is not None:
         lvl = max(0, min(100, int(body.level)))
-        return {"resp": qlink_send(f"VLO@ {id} {lvl}")}
-    raise HTTPException(400, "provide switch or level")
+    else:
+        raise HTTPException(400, "provide switch or level")
+    cmd = f"VLO@ {id} {lvl}"
+    if body.fade is not None:
+        if not 0 <= body.fade <= 6553.5:
+            raise HTTPException(400, "fade out of range")
+        cmd += f" {format_fade(body.fade)}"
+    # ?force=true sends even when the load is known to be at this level
+    if is_redundant(id, lvl, force):
+        return {"resp": None, "elided": True}
+    get_project_index()
+    resp = qlink_send(cmd, target=_load_target(id, target))
+    record_command(id, lvl, body.fade)
+    return {"resp": resp, "elided": False}
+
+
+_scene_cache: Dict[str, object] = {"key": None, "scenes": {}, "errors": {}}
+
+
+def _mtime(filename: str) -> Tuple[Optional[str], float]:
+    path = _find_config_file(filename)
+    return path, (os.path.getmtime(path) if path else 0.0)
+
+
+def get_scenes() -> Tuple[Dict[str, Scene], Dict[str, str]]:
+    """Return compiled scenes, recompiling when scenes/loads config, the project
+    index or EOL change."""
+    index = get_project_index()
+    key = (_mtime("scenes.json"), _mtime("loads.json"), index.get("source_hash"), EOL)
+    if _scene_cache["key"] != key:
+        scenes, errors = compile_scenes(
+            _load_config_json("scenes.json"),
+            EOL,
+            known_load_ids(_load_config_json("loads.json"), index),
+        )
+        for name, err in errors.items():
+            logger.warning(f"Scene '{name}' rejected: {err}")
+        _scene_cache.update(key=key, scenes=scenes, errors=errors)
+    return _scene_cache["scenes"], _scene_cache["errors"]
+
+
+@app.get("/scenes")
+def list_scenes():
+    """List compiled scenes and any definitions rejected by validation."""
+    scenes, errors = get_scenes()
+    return {
+        "scenes": [scene.to_dict() for scene in scenes.values()],
+        "errors": errors,
+    }
+
+
+@app.post("/scene/{name}")
+def run_scene(name: str, target: Optional[str] = None, force: bool = False):
+    """Activate a scene as one pipelined burst of VLO@ commands per enabler.
+
+    Each load goes to the enabler serving its master unless ?target= or the
+    scene names one. Loads already at their scene level are left out (see
+    is_redundant).
+    """
+    scenes, errors = get_scenes()
+    scene = scenes.get(name)
+    if scene is None:
+        if name in errors:
+            raise HTTPException(409, f"scene '{name}' is invalid: {errors[name]}")
+        raise HTTPException(404, f"unknown scene '{name}'")
+    t0 = perf_counter()
+    steps = [
+        (step, cmd)
+        for step, cmd in zip(scene.steps, scene.commands)
+        if not is_redundant(step[0], step[1], force)
+    ]
+    commands = [cmd for _, cmd in steps]
+    # One burst per enabler serving the scene's loads
+    bursts: Dict[str, List[str]] = {}
+    for (load, _, _), cmd in steps:
+        name = _load_target(load, target or scene.target)
+        bursts.setdefault(name, []).append(cmd)
+    replies = []
+    for name, group in bursts.items():
+        payload = scene.payload
+        if len(group) < len(scene.commands):
+            payload = "".join(cmd + EOL for cmd in group).encode("ascii")
+        replies += qlink_send_burst(payload, len(group), target=name)
+    for (load, level, fade), _ in steps:
+        record_command(load, level, fade)
+    return {
+        "scene": name,
+        "commands": len(commands),
+        "elided": len(scene.commands) - len(commands),
+        "replies": replies,
+        "complete": len(replies) == len(commands),
+        "elapsedMs": round((perf_counter() - t0) * 1000, 1),
+    }
+
+
+def _run_rule_action(action: dict, event: dict) -> None:
+    if "command" in action:
+        qlink_send(action["command"], target=action.get("target"))
+    else:
+        run_scene(action["scene"], target=action.get("target"))
+
+
+rule_engine = RuleEngine(_run_rule_action, workers=QLINK_RULE_WORKERS)
+# How often (s) the listener looks for a changed rules file
+RULES_CHECK_INTERVAL = 2.0
+_rule_cache: Dict[str, object] = {"key": None, "checked": 0.0, "errors": {}}
+
+
+def _rules_file() -> Optional[str]:
+    for name in ("rules.json", "rules.yaml", "rules.yml"):
+        path = _find_config_file(name)
+        if path:
+            return path
+    return None
+
+
+def check_rules(force: bool = False) -> None:
+    """Reload config/rules.* into the rule engine when the file changed.
+
+    Called for every event, so the file is looked at no more than once per
+    RULES_CHECK_INTERVAL.
+    """
+    now = time.monotonic()
+    if not force and now - _rule_cache["checked"] < RULES_CHECK_INTERVAL:
+        return
+    _rule_cache["checked"] = now
+    path = _rules_file()
+    key = (path, _file_key(path))
+    if key == _rule_cache["key"]:
+        return
+    errors: Dict[str, str] = {}
+    rules = {}
+    if path:
+        try:
+            rules, errors = compile_rules(read_rules_file(path))
+        except (OSError, ValueError) as e:
+            errors = {"*": f"could not read {os.path.basename(path)}: {e}"}
+    for name, err in errors.items():
+        logger.warning(f"Rule '{name}' rejected: {err}")
+    rule_engine.load(rules)
+    _rule_cache.update(key=key, errors=errors)
+    if rules:
+        logger.info(f"📜 {len(rules)} rules loaded from {path}")
+
+
+@app.get("/rules")
+def list_rules():
+    """Loaded rules with their run counts and latency, plus rejected ones."""
+    check_rules(force=True)
+    out = []
+    for rule in rule_engine.rules.values():
+        record = rule.to_dict()
+        record.update(
+            runs=metrics.counter("rule_runs", rule=rule.name),
+            errors=metrics.counter("rule_errors", rule=rule.name),
+            trigger_seconds=metrics.summary("rule_trigger_seconds", rule=rule.name),
+            seconds=metrics.summary("rule_seconds", rule=rule.name),
+        )
+        out.append(record)
+    return {"rules": out, "errors": _rule_cache["errors"]}
+
+
+# Event subscribers from config/webhooks.json (app/webhooks.py)
+webhooks = WebhookDispatcher()
+_webhook_cache: Dict[str, object] = {"key": None, "checked": 0.0, "errors": {}}
+
+
+_webhook_reload_lock = threading.Lock()
+
+
+def check_webhooks(force: bool = False) -> None:
+    """Reload config/webhooks.json when it changed (like check_rules).
+
+    Only the file check runs on the caller (the listener thread); the reload
+    itself runs on its own thread unless `force` asks for it to finish first.
+    """
+    now = time.monotonic()
+    if not force and now - _webhook_cache["checked"] < RULES_CHECK_INTERVAL:
+        return
+    _webhook_cache["checked"] = now
+    path = _find_config_file("webhooks.json")
+    key = (path, _file_key(path))
+    if key == _webhook_cache["key"]:
+        return
+    if force:
+        _reload_webhooks(path, key)
+    elif not _webhook_reload_lock.locked():
+        threading.Thread(
+            target=_reload_webhooks,
+            args=(path, key),
+            daemon=True,
+            name="webhook-reload",
+        ).start()
+
+
+def _reload_webhooks(path: Optional[str], key: tuple) -> None:
+    with _webhook_reload_lock:
+        if key == _webhook_cache["key"]:
+            return
+        endpoints, errors = {}, {}
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    endpoints, errors = compile_webhooks(json.load(f))
+            except (OSError, ValueError) as e:
+                errors = {"*": f"could not read webhooks.json: {e}"}
+        for name, err in errors.items():
+            logger.warning(f"Webhook '{name}' rejected: {err}")
+        webhooks.load(endpoints)
+        _webhook_cache.update(key=key, errors=errors)
+        if endpoints:
+            logger.info(f"🪝 {len(endpoints)} webhooks loaded from {path}")
+
+
+@app.get("/webhooks")
+def list_webhooks():
+    """Subscribed endpoints with queue depth and delivery counts."""
+    return {"webhooks": webhooks.stats(), "errors": _webhook_cache["errors"]}
+
+
+_VGL_REPLY = re.compile(r"^(?:RGL\s+\d+\s+)?(\d{1,3})$")
 
 
 @app.get("/load/{id}/status")
-def get_load_status(id: int):
-    """Get current level of a load (0-100) using VGL@ command"""
-    return {"resp": qlink_send(f"VGL@ {id}")}
+def get_load_status(id: int, target: Optional[str] = None):
+    """Get current level of a load (0-100) using VGL@ command.
+
+    A level read this way also seeds /loads/state, so pages opened after a
+    restart do not have to ask again.
+    """
+    get_project_index()
+    resp = qlink_send(f"VGL@ {id}", target=_load_target(id, target))
+    match = _VGL_REPLY.match(resp.strip())
+    level = int(match.group(1)) if match else None
+    if level is not None:
+        load_state.update(id, level, source="query")
+    return {"resp": resp, "load_id": id, "level": level}
+
+
+@app.get("/loads/state")
+def get_load_states():
+    """Current level of every load, from LO events and commands sent.
+
+    Loads that are fading report their interpolated level, plus the `target`
+    they are heading to.
+    """
+    return {"loads": load_state.snapshot()}
+
+
+@app.get("/load/{id}/state")
+def get_load_state(id: int):
+    """Current level of one load without asking the enabler (see /loads/state)."""
+    state = load_state.get(id)
+    if state is None:
+        raise HTTPException(404, f"no level known for load {id}")
+    return {"id": id, **state}
+
+
+class LevelsCmd(BaseModel):
+    loads: Dict[int, int]
+    fade: Optional[float] = None
+    # Also press buttons whose own fade differs from `fade`
+    any_fade: bool = False
+
+
+def plan_load_levels(body: LevelsCmd) -> Plan:
+    """Plan `body` around keypad presets from the project index."""
+    for load, level in body.loads.items():
+        if not 0 <= level <= 100:
+            raise HTTPException(400, f"load {load} level must be 0-100")
+    if body.fade is not None and not 0 <= body.fade <= 6553.5:
+        raise HTTPException(400, "fade out of range")
+    get_project_index()
+    return plan_levels(
+        body.loads, _project_cache["presets"], body.fade, any_fade=body.any_fade
+    )
+
+
+@app.post("/loads/plan")
+def plan_loads(body: LevelsCmd):
+    """Show how POST /loads/set would reach `loads` without sending anything."""
+    return plan_load_levels(body).to_dict()
+
+
+@app.post("/loads/set")
+def set_loads(body: LevelsCmd, target: Optional[str] = None, force: bool = False):
+    """Set several loads at once with as few commands as possible.
+
+    Keypad buttons that set exactly some of the requested levels are pressed
+    (one VSW@ each, sent to the enabler serving their master); the remaining
+    loads get VLO@ writes to the enabler serving theirs, minus those already
+    at their level (see is_redundant). Commands for each enabler go out as
+    one burst.
+    """
+    t0 = perf_counter()
+    plan = plan_load_levels(body)
+    planned = len(plan.writes)
+    plan.writes = [w for w in plan.writes if not is_redundant(*w, force=force)]
+    # Keyed by resolved target name, so each enabler gets exactly one burst
+    bursts: Dict[str, List[str]] = {}
+    for preset in plan.presets:
+        name = target or targets.for_master(preset.master).name
+        bursts.setdefault(name, []).append(preset.command)
+    writes = plan.commands()[len(plan.presets) :]
+    for (load, _), cmd in zip(plan.writes, writes):
+        bursts.setdefault(_load_target(load, target), []).append(cmd)
+    replies: List[str] = []
+    for name, commands in bursts.items():
+        payload = "".join(cmd + EOL for cmd in commands).encode("ascii")
+        replies += qlink_send_burst(payload, len(commands), target=name)
+    for preset in plan.presets:
+        for load, level in preset.levels:
+            record_command(load, level, preset.fade)
+    for load, level in plan.writes:
+        record_command(load, level, plan.fade)
+    metrics.inc(
+        "commands_saved_by_presets", sum(len(p.levels) - 1 for p in plan.presets)
+    )
+    sent = len(plan.presets) + len(plan.writes)
+    result = plan.to_dict()
+    result.update(
+        commands=sent,
+        elided=planned - len(plan.writes),
+        replies=replies,
+        complete=len(replies) == sent,
+        elapsedMs=round((perf_counter() - t0) * 1000, 1),
+    )
+    return result
+
+
+def _station_master(station: int) -> int:
+    """Master of a station number when no ``?master=`` is given.
+
+    Station numbers repeat across masters (13 is V13 on master 1 and V63 on
+    master 2), so only a number the project index has on exactly one master
+    is resolved; anything else means master 1.
+    """
+    masters = {
+        int(key.partition(":")[0])
+        for key in get_project_index().get("stations", {})
+        if key.partition(":")[2] == str(station)
+    }
+    return masters.pop() if len(masters) == 1 else 1
+
+
+def _led(state: Optional[dict]) -> Optional[str]:
+    if state is None:
+        return None
+    return "blink" if state["blink"] else "on" if state["on"] else "off"
+
+
+def _station_record(master: int, station: int) -> Optional[dict]:
+    """Project index record of one keypad station."""
+    return get_project_index().get("stations", {}).get(f"{master}:{station}")
+
+
+def _button_config(record: Optional[dict], button: int) -> Optional[dict]:
+    """Name and loads of a button, with load addresses resolved to load ids."""
+    config = ((record or {}).get("buttons") or {}).get(str(button))
+    if config is None:
+        return None
+    index_loads = get_project_index().get("loads", {})
+    events = config.get("events") or []
+    addresses = list(
+        dict.fromkeys(load for event in events for load, _ in event.get("loads", []))
+    )
+    return {
+        "name": config.get("name"),
+        "event_type": events[0].get("op") if events else None,
+        "loads": addresses,
+        "load_ids": [
+            index_loads[str(a)]["contractor"]
+            for a in addresses
+            if str(a) in index_loads
+        ],
+    }
 
 
 @app.post("/button/{station}/{button}")
-def press_button(station: int, button: int):
+def press_button(
+    station: int,
+    button: int,
+    master: Optional[int] = None,
+    target: Optional[str] = None,
+):
     """Simulate a button press on a station using VSW@ command.
 
     Uses VSW@ (Vantage Switch) command with state=4 for button press simulation.
     Format: VSW@ <master> <station> <button> <state>
     State 4 = Simulate button press
     State 6 = Simulate press and release (alternative)
+
+    Pass ``?master=`` for stations whose number exists on several masters.
     """
-    # Assuming master=1 for single-master system (or lookup based on station if multi-master)
-    master = 1
+    # The master selects the enabler serving it unless a target is given
+    if master is None:
+        master = _station_master(station)
+    if target is None:
+        target = targets.for_master(master).name
     state = 4  # 4 = button press, 6 = press and release
-    return {"resp": qlink_send(f"VSW@ {master} {station} {button} {state}")}
+    return {
+        "resp": qlink_send(f"VSW@ {master} {station} {button} {state}", target=target)
+    }
 
 
 @app.get("/button/{station}/{button}/status")
-def get_button_status(station: int, button: int):
-    """Get LED status of a button - NOT YET IMPLEMENTED.
+def get_button_status(station: int, button: int, master: Optional[int] = None):
+    """LED state of a keypad button, as last reported by LE/LC events.
+
+    Served from led_state without querying the enabler; `led` is null until
+    the station has reported. Name and loads come from the project index.
+    """
+    if master is None:
+        master = _station_master(station)
+    config = _button_config(_station_record(master, station), button)
+    state = led_state.button(master, station, button)
+    if config is None and state is None:
+        raise HTTPException(404, f"unknown button {button} on station {station}")
+    return {
+        "master": master,
+        "station": station,
+        "button": button,
+        **(config or {"name": None, "event_type": None, "loads": [], "load_ids": []}),
+        "led": _led(state),
+        "updated": state["updated"] if state else None,
+    }
+
+
+@app.get("/station/{station}/leds")
+def get_station_leds(station: int, master: Optional[int] = None):
+    """Every button LED of a keypad station (see /button/.../status)."""
+    if master is None:
+        master = _station_master(station)
+    record = _station_record(master, station)
+    state = led_state.station(master, station)
+    if record is None and state is None:
+        raise HTTPException(404, f"unknown station {station}")
+    numbers = {int(number) for number in (record or {}).get("buttons") or {}}
+    if state:
+        bits = state["on"] | state["blink"]
+        numbers.update(n + 1 for n in range(bits.bit_length()) if bits >> n & 1)
+    buttons = []
+    for number in sorted(numbers):
+        config = _button_config(record, number) or {"name": None}
+        buttons.append(
+            {
+                "button": number,
+                "name": config["name"],
+                "led": _led(led_state.button(master, station, number)),
+            }
+        )
+    return {
+        "master": master,
+        "station": station,
+        "name": (record or {}).get("name"),
+        "room": (record or {}).get("room"),
+        "on_leds": f"{state['on']:02X}" if state else None,
+        "blink_leds": f"{state['blink']:02X}" if state else None,
+        "updated": state["updated"] if state else None,
+        "buttons": buttons,
+    }
 
-    This endpoint may not be needed. The VLED command doesn't appear in
-    official Vantage documentation. Consider using VOD (Output on button press)
-    command for monitoring button state changes instead.
 
-    TODO: Review VOD command and determine if LED status querying is possible.
+def listener_status() -> dict:
+    """Connection state of this process's targets (the owner in hub mode)."""
+    return {
+        "default_target": targets.default_name,
+        "targets": {t.name: t.status() for t in targets},
+        "line_feed": line_feed.stats() if line_feed is not None else None,
+    }
+
+
+# Gauge values of breaker_state in /metrics
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Counters, gauges and timing summaries (see app/metrics.py).
+
+    Breaker and queue gauges describe the process that owns the enabler
+    connections: in worker mode they come from the hub's status, and are left
+    out when the hub cannot be reached.
     """
-    # Placeholder - command format unknown/may not exist
-    raise HTTPException(
-        status_code=501,
-        detail="Button status query not yet implemented - VLED command not found in documentation",
-    )
+    if hub_client is None:
+        gauges = [(t.name, t.breaker.status(), t.queued) for t in targets]
+    else:
+        try:
+            status = hub_client.request({"op": "status"})["targets"]
+        except HubError as ex:
+            logger.warning(f"Could not read hub status for /metrics: {ex.detail}")
+            status = {}
+        gauges = [(name, t["breaker"], t["queued"]) for name, t in status.items()]
+    for name, breaker, queued in gauges:
+        metrics.set("breaker_state", BREAKER_STATES[breaker["state"]], target=name)
+        metrics.set("breaker_trips", breaker["trips"], target=name)
+        metrics.set("commands_queued", queued, target=name)
+    return metrics.snapshot()
 
 
 @app.get("/monitor/status")
 def monitor_status():
     """Get event monitoring status"""
+    status = listener_status()
+    if hub_client is not None:
+        try:
+            status = hub_client.request({"op": "status"})
+            status.pop("ok", None)
+        except HubError as ex:
+            status = {"hub_error": ex.detail}
+    default = status.get("targets", {}).get(status.get("default_target"), {})
     return {
-        "event_listener_connected": event_socket_connected,
-        "monitoring_enabled": event_monitoring_enabled,
+        "event_listener_connected": default.get("event_listener_connected", False),
+        "monitoring_enabled": default.get("monitoring_enabled", False),
         "websocket_clients": len(websocket_clients),
-        "vantage_ip": VANTAGE_IP,
-        "vantage_port": VANTAGE_PORT,
+        "vantage_ip": default.get("ip"),
+        "vantage_port": default.get("port"),
+        "mode": "worker" if hub_client is not None else "standalone",
+        **status,
+    }
+
+
+@app.get("/readyz")
+def readyz():
+    """Ready when every target's listener is connected and recently heard from.
+
+    Answered from the listener's cached liveness (see app/targets.py), so
+    frequent checks never open an enabler connection.
+    """
+    status = monitor_status()
+    ready = {
+        name: {k: t.get(k) for k in ("ready", "liveness")}
+        for name, t in status.get("targets", {}).items()
     }
+    ok = bool(ready) and all(t["ready"] for t in ready.values())
+    return JSONResponse({"ready": ok, "targets": ready}, status_code=200 if ok else 503)
 
 
 @app.get("/settings")
@@ -448,12 +1579,11 @@ def get_settings():
     }
 
 
-@app.post("/settings")
-def update_settings(settings: dict):
-    """Update bridge settings (runtime only - not persisted)
+def apply_settings(settings: dict) -> Tuple[List[str], bool]:
+    """Apply runtime settings in this process; returns (updated, restart_required).
 
-    Note: Changes VANTAGE_IP or VANTAGE_PORT require bridge restart.
-    QLINK_FADE and QLINK_TIMEOUT apply immediately.
+    Address changes repoint the default target only in the process that owns
+    the enabler connections (not in hub workers).
     """
     global VANTAGE_IP, VANTAGE_PORT, QLINK_FADE, QLINK_TIMEOUT, QLINK_EOL, EOL
 
@@ -485,16 +1615,65 @@ def update_settings(settings: dict):
             EOL = "\r\n" if QLINK_EOL == "CRLF" else "\r"
             updated.append("qlink_eol")
 
+    if restart_required and hub_client is None and targets.default_name == "default":
+        targets.default.reconfigure(VANTAGE_IP, VANTAGE_PORT)
+    return updated, restart_required
+
+
+@app.post("/settings")
+def update_settings(settings: dict):
+    """Update bridge settings (runtime only - not persisted)
+
+    Note: Changes VANTAGE_IP or VANTAGE_PORT apply to the default target; new
+    commands use them at once, the event listener on its next reconnect.
+    QLINK_FADE and QLINK_TIMEOUT apply immediately.
+
+    In worker mode the change is made by the hub, which passes it on to every
+    worker over the event feed (see app/hub.py).
+    """
+    if hub_client is not None:
+        try:
+            reply = hub_client.request({"op": "settings", "settings": settings})
+        except HubError as ex:
+            raise _hub_error(ex) from ex
+        apply_settings(reply["settings"])
+        return reply["result"]
+
+    updated, restart_required = apply_settings(settings)
     return {
         "status": "ok",
         "updated": updated,
         "restart_required": restart_required,
-        "message": "Settings updated. Restart bridge for network changes to take effect."
-        if restart_required
-        else "Settings updated successfully.",
+        "message": (
+            "Settings updated. Restart bridge for network changes to take effect."
+            if restart_required
+            else "Settings updated successfully."
+        ),
     }
 
 
+def _on_hub_event(event: dict) -> None:
+    """Hub feed callback: settings changes are applied, events broadcast."""
+    if event.get("type") == "settings":
+        apply_settings(event["settings"])
+    else:
+        broadcast_event_sync(event)
+
+
+def _sync_hub_settings() -> None:
+    """Adopt the hub's settings, on every (re)subscription to its feed."""
+    try:
+        apply_settings(hub_client.request({"op": "settings"})["settings"])
+    except HubError as ex:
+        logger.warning(f"Could not read hub settings: {ex.detail}")
+
+
+@app.get("/events/schema")
+def get_event_schema():
+    """Encodings /events can send and the field layout of compact events."""
+    return {"encodings": available_encodings(), **event_schema()}
+
+
 @app.websocket("/events")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time Vantage event streaming.
@@ -503,21 +1682,29 @@ async def websocket_endpoint(websocket: WebSocket):
     - Button presses/releases (SW events)
     - Load changes (LO, LS, LV events)
     - LED state changes (LE, LC events)
+
+    ?format=compact (positional JSON arrays) or ?format=msgpack (the same
+    arrays as binary MessagePack frames) selects a smaller encoding; see
+    GET /events/schema.
     """
+    encoding = websocket.query_params.get("format", "json")
+    if encoding not in available_encodings():
+        await websocket.close(code=1003, reason=f"unsupported format '{encoding}'")
+        return
     await websocket.accept()
-    websocket_clients.add(websocket)
+    outbox = add_websocket_client(websocket, encoding)
     logger.info(f"✅ WebSocket client connected (total: {len(websocket_clients)})")
 
-    # Send initial status
+    # Send initial status (from the hub in worker mode, so off the event loop)
     try:
-        await websocket.send_json(
-            {
-                "type": "status",
-                "connected": event_socket_connected,
-                "monitoring": event_monitoring_enabled,
-                "timestamp": datetime.now().isoformat(),
-            }
-        )
+        status = await run_in_threadpool(monitor_status)
+        event = {
+            "type": "status",
+            "connected": status["event_listener_connected"],
+            "monitoring": status["monitoring_enabled"],
+            "timestamp": datetime.now().isoformat(),
+        }
+        outbox.put_nowait(encode_event(event, encoding))
     except:
         pass
 
@@ -526,27 +1713,44 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        websocket_clients.discard(websocket)
+        drop_websocket_client(websocket)
         logger.info(
             f"❌ WebSocket client disconnected (total: {len(websocket_clients)})"
         )
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        websocket_clients.discard(websocket)
+        drop_websocket_client(websocket)
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Start event listener on application startup"""
+    """Start event listener (or hub subscription) on application startup"""
+    global _event_loop, _event_queue
+
     logger.info("🚀 Starting Vantage QLink Bridge...")
-    start_event_listener()
+    _event_loop = asyncio.get_running_loop()
+    _event_queue = asyncio.Queue()
+    asyncio.create_task(_broadcast_events())
+    get_project_index()
+    if hub_client is not None:
+        logger.info(f"Worker mode: using hub at {QLINK_HUB}")
+        hub_client.subscribe(_on_hub_event, on_connect=_sync_hub_settings)
+    else:
+        start_event_listener()
+        start_line_feed()
     logger.info("✅ Bridge ready")
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
-        status_code=exc.status_code, content={"ok": False, "detail": exc.detail}
+        status_code=exc.status_code,
+        content={
+            "ok": False,
+            "error": HTTPStatus(exc.status_code).phrase,
+            "detail": exc.detail,
+        },
+        headers=exc.headers,
     )
 
 
@@ -0,0 +1,81 @@
+"""Wire encodings for the ``/events`` websocket.
+
+Clients pick one with ``/events?format=...``:
+
+- ``json`` (default): the parsed event dict, as before;
+- ``compact``: a JSON array ``[type, ts, target, *fields]`` with a numeric
+  type code, the timestamp in epoch milliseconds and the type's fields in a
+  fixed order (``event_schema()``, served at ``GET /events/schema``), without
+  the raw line or any key names;
+- ``msgpack``: the same array as a MessagePack binary frame (needs the
+  optional ``msgpack`` package).
+
+The bridge encodes each event once per encoding in use and sends those same
+bytes to every client that asked for it.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:  # optional: json and compact only
+    msgpack = None
+
+# Field order of each event type in the compact forms; the type code is the
+# position in this table, so only ever append to it
+FIELDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("unknown", ("raw",)),
+    ("status", ("connected", "monitoring")),
+    ("button", ("master", "station", "button", "state", "serial")),
+    ("load_module", ("master", "enclosure", "module", "load", "level", "load_id")),
+    ("load_station", ("master", "station", "load", "level")),
+    ("load_variable", ("master", "variable", "level")),
+    ("led_keypad", ("master", "station", "on_leds", "blink_leds")),
+    ("led_lcd", ("master", "station", "button", "state")),
+)
+TYPE_CODES: Dict[str, int] = {name: code for code, (name, _) in enumerate(FIELDS)}
+# String states sent as 1/0
+FLAGS = {"pressed": 1, "released": 0, "on": 1, "off": 0}
+
+
+def available_encodings() -> List[str]:
+    return ["json", "compact"] + (["msgpack"] if msgpack is not None else [])
+
+
+def event_schema() -> dict:
+    """How to read compact events: type code -> [type, fields...]."""
+    return {
+        "layout": ["type", "ts", "target", "...fields"],
+        "types": {code: [name, *fields] for code, (name, fields) in enumerate(FIELDS)},
+        "flags": FLAGS,
+    }
+
+
+def _millis(timestamp) -> int:
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return 0
+
+
+def compact(event: dict) -> list:
+    """The positional form of a parsed event."""
+    code = TYPE_CODES.get(event.get("type"), 0)
+    row = [code, _millis(event.get("timestamp")), event.get("target")]
+    for field in FIELDS[code][1]:
+        value = event.get(field)
+        row.append(FLAGS.get(value, value) if field == "state" else value)
+    return row
+
+
+def encode_event(event: dict, encoding: str) -> Union[str, bytes]:
+    """Serialize `event`: text for the JSON forms, bytes for MessagePack."""
+    if encoding == "json":
+        return json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+    if encoding == "compact":
+        return json.dumps(compact(event), separators=(",", ":"), ensure_ascii=False)
+    if encoding == "msgpack" and msgpack is not None:
+        return msgpack.packb(compact(event))
+    raise ValueError(f"unsupported event encoding '{encoding}'")
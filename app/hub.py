@@ -0,0 +1,347 @@
+"""Shared event hub for multi-worker deployments.
+
+Running ``uvicorn --workers N`` against the plain bridge would open N enabler
+connections and split websocket clients across N separate event streams. In
+hub mode one process owns every IP-Enabler connection (event listeners and
+command pools) and the HTTP workers talk to it over a Unix socket::
+
+    QLINK_HUB=/run/qlink/hub.sock python -m app.hub
+    QLINK_HUB=/run/qlink/hub.sock uvicorn app.bridge:app --workers 4
+
+The protocol is newline-delimited JSON. A connection either sends
+``{"op": "subscribe"}`` and then receives one ``{"event": {...}}`` line per
+Vantage event, or sends request lines (``send``, ``burst``, ``status``,
+``settings``) and reads one reply line for each. Runtime settings changed
+through any worker are applied by the hub and sent to every worker as a
+``{"type": "settings"}`` event on the feed.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+from collections import deque
+from typing import Callable, Deque, Optional, Set
+
+logger = logging.getLogger("qlink.hub")
+
+DEFAULT_HUB_SOCKET = "/tmp/qlink-hub.sock"
+
+
+class Subscriber:
+    """Bounded per-reader buffer; the oldest item is dropped when it is full."""
+
+    def __init__(self, maxlen: int = 1024):
+        self._items: Deque = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item) -> None:
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Next item, or None on timeout/close."""
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class EventFanout:
+    """Thread-safe publish to any number of bounded subscribers.
+
+    `publish` never blocks: a slow subscriber loses its oldest items instead of
+    stalling the listener thread that produced them.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxlen: int = 1024) -> Subscriber:
+        sub = Subscriber(maxlen)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+        sub.close()
+
+    def publish(self, item) -> None:
+        with self._lock:
+            subscribers = tuple(self._subscribers)
+        for sub in subscribers:
+            sub.put(item)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+
+class HubError(Exception):
+    """A hub request failed; carries the HTTP status the worker should return."""
+
+    def __init__(self, status: int, detail: str, headers: Optional[dict] = None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.headers = headers
+
+
+class HubServer(socketserver.ThreadingUnixStreamServer):
+    """Unix-socket server exposing the owner's event feed and command path."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: str,
+        fanout: EventFanout,
+        handler: Callable[[dict], dict],
+        buffer: int = 4096,
+    ):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.fanout = fanout
+        self.handler = handler
+        self.buffer = buffer
+        super().__init__(path, _HubConnection)
+        os.chmod(path, 0o660)
+
+
+class _HubConnection(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+            except ValueError:
+                self._reply({"ok": False, "status": 400, "detail": "bad request"})
+                continue
+            if request.get("op") == "subscribe":
+                self._stream()
+                return
+            try:
+                reply = self.server.handler(request)
+            except Exception as e:  # never let one request kill the connection
+                logger.exception("hub request failed: %s", e)
+                reply = {"ok": False, "status": 500, "detail": str(e)}
+            self._reply(reply)
+
+    def _reply(self, reply: dict) -> None:
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+    def _stream(self) -> None:
+        sub = self.server.fanout.subscribe(self.server.buffer)
+        try:
+            while True:
+                event = sub.get(timeout=15.0)
+                # An empty line doubles as a keepalive for idle feeds
+                line = json.dumps({"event": event}) if event is not None else ""
+                self.wfile.write(line.encode() + b"\n")
+        except OSError:
+            pass
+        finally:
+            self.server.fanout.unsubscribe(sub)
+
+
+class HubClient:
+    """Worker-side access to a hub: command requests and an event subscription."""
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+        self._idle: "queue.SimpleQueue[socket.socket]" = queue.SimpleQueue()
+        self._subscriber: Optional[threading.Thread] = None
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        return sock
+
+    def request(self, request: dict) -> dict:
+        """Send one request and return its reply; raises HubError on failure.
+
+        A request is resent only when writing it to a pooled connection the
+        hub has since closed fails, i.e. before the hub could have seen it.
+        A lost or late reply is an error: the hub may already have run the
+        command, and a repeated ``VSW@`` or scene must not run twice.
+        """
+        line = json.dumps(request).encode() + b"\n"
+        while True:
+            try:
+                sock, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                sock, reused = None, False
+            try:
+                if sock is None:
+                    sock = self._connect()
+                sock.sendall(line)
+            except OSError as ex:
+                if sock is not None:
+                    sock.close()
+                if reused:
+                    continue  # stale pooled connection; nothing was sent
+                raise HubError(502, f"hub unavailable: {ex}") from ex
+            try:
+                reply = _read_line(sock)
+            except socket.timeout as ex:
+                sock.close()
+                raise HubError(504, "hub did not reply in time") from ex
+            except OSError as ex:
+                sock.close()
+                raise HubError(502, f"hub connection lost: {ex}") from ex
+            self._idle.put(sock)
+            data = json.loads(reply)
+            if not data.get("ok", True):
+                raise HubError(
+                    data.get("status", 502), data.get("detail", ""), data.get("headers")
+                )
+            return data
+
+    def send(self, cmd: str, timeout: float, target: Optional[str]) -> str:
+        return self.request(
+            {"op": "send", "cmd": cmd, "timeout": timeout, "target": target}
+        )["resp"]
+
+    def send_burst(
+        self, payload: bytes, expected: int, timeout: float, target: Optional[str]
+    ) -> list:
+        return self.request(
+            {
+                "op": "burst",
+                "payload": payload.decode("ascii"),
+                "expected": expected,
+                "timeout": timeout,
+                "target": target,
+            }
+        )["replies"]
+
+    def subscribe(
+        self,
+        on_event: Callable[[dict], None],
+        retry: float = 1.0,
+        on_connect: Optional[Callable[[], None]] = None,
+    ):
+        """Deliver hub events to `on_event` from a background thread.
+
+        `on_connect` runs after every (re)subscription, e.g. to resync state
+        the hub may have lost across a restart.
+        """
+        if self._subscriber and self._subscriber.is_alive():
+            return
+
+        def run():
+            while True:
+                try:
+                    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    sock.connect(self.path)
+                    sock.sendall(b'{"op": "subscribe"}\n')
+                    sock.settimeout(60.0)
+                    logger.info("Subscribed to hub event feed at %s", self.path)
+                    if on_connect is not None:
+                        on_connect()
+                    with sock.makefile("rb") as lines:
+                        for raw in lines:
+                            if raw.strip():
+                                on_event(json.loads(raw)["event"])
+                except (OSError, ValueError) as e:
+                    logger.warning("Hub event feed lost: %s", e)
+                threading.Event().wait(retry)
+
+        self._subscriber = threading.Thread(
+            target=run, daemon=True, name="QLinkHubSubscriber"
+        )
+        self._subscriber.start()
+
+
+def _read_line(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            raise ConnectionError("hub closed the connection")
+        chunks.append(data)
+        if data.endswith(b"\n"):
+            return b"".join(chunks)
+
+
+def handle_request(request: dict) -> dict:
+    """Answer one worker request using this process's bridge (the owner)."""
+    from fastapi import HTTPException
+
+    from app import bridge
+
+    op = request.get("op")
+    try:
+        if op == "send":
+            resp = bridge.qlink_send(
+                request["cmd"], request.get("timeout"), request.get("target")
+            )
+            return {"ok": True, "resp": resp}
+        if op == "burst":
+            replies = bridge.qlink_send_burst(
+                request["payload"].encode("ascii"),
+                int(request["expected"]),
+                request.get("timeout"),
+                request.get("target"),
+            )
+            return {"ok": True, "replies": replies}
+        if op == "status":
+            return {"ok": True, **bridge.listener_status()}
+        if op == "settings":
+            # Apply here, then pass the result on to every worker
+            result = None
+            if request.get("settings"):
+                result = bridge.update_settings(request["settings"])
+                bridge.event_fanout.publish(
+                    {"type": "settings", "settings": bridge.get_settings()}
+                )
+            return {"ok": True, "result": result, "settings": bridge.get_settings()}
+    except HTTPException as ex:
+        return {
+            "ok": False,
+            "status": ex.status_code,
+            "detail": ex.detail,
+            "headers": ex.headers,
+        }
+    return {"ok": False, "status": 400, "detail": f"unknown op {op!r}"}
+
+
+def main():
+    """Run the hub: own every enabler connection and serve workers."""
+    from app import bridge
+
+    path = os.getenv("QLINK_HUB") or DEFAULT_HUB_SOCKET
+    # This process is the owner, never a client of itself
+    bridge.hub_client = None
+
+    logging.basicConfig(level=logging.INFO)
+    bridge.start_event_listener()
+    bridge.start_line_feed()
+    server = HubServer(path, bridge.event_fanout, handle_request)
+    logger.info("QLink hub serving %s", path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
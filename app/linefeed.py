@@ -0,0 +1,218 @@
+"""Local line feed of the Vantage event stream.
+
+Local daemons (loggers, Node-RED, scripts) can read events straight off a Unix
+domain socket, and optionally a TCP port bound to localhost, without going
+through HTTP/websockets or opening their own enabler session::
+
+    socat - UNIX-CONNECT:/run/qlink/events.sock
+    nc 127.0.0.1 3042
+
+Each event is written as one line. Readers get the raw Vantage line
+(``SW 1 23 5 1``) by default; sending ``json`` switches that reader to one
+parsed JSON object per line, ``raw`` switches back. Every reader has its own
+bounded buffer: a reader that falls behind loses its oldest lines (counted in
+``stats()``) and never slows the listener or other readers.
+"""
+
+import json
+import logging
+import os
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger("qlink.feed")
+
+
+class _Reader:
+    __slots__ = ("sock", "json", "lines", "pending", "inbuf", "dropped")
+
+    def __init__(self, sock: socket.socket, maxlen: int):
+        self.sock = sock
+        self.json = False
+        self.lines: Deque[bytes] = deque(maxlen=maxlen)
+        self.pending = b""  # partially written line
+        self.inbuf = b""
+        self.dropped = 0
+
+
+class LineFeedServer:
+    """Single-threaded selector loop fanning event lines out to local readers."""
+
+    def __init__(
+        self,
+        unix_path: Optional[str] = None,
+        tcp_port: Optional[int] = None,
+        buffer_lines: int = 1000,
+    ):
+        self.buffer_lines = buffer_lines
+        self.unix_path = unix_path
+        self._sel = selectors.DefaultSelector()
+        self._listeners: List[socket.socket] = []
+        self._readers: Dict[socket.socket, _Reader] = {}
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._wake_pending = False
+        self._thread: Optional[threading.Thread] = None
+        self.published = 0
+
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(unix_path)
+            os.chmod(unix_path, 0o660)
+            self._listen(sock)
+        if tcp_port is not None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("127.0.0.1", int(tcp_port)))
+            self._listen(sock)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+
+    def _listen(self, sock: socket.socket) -> None:
+        sock.listen(16)
+        sock.setblocking(False)
+        self._listeners.append(sock)
+        self._sel.register(sock, selectors.EVENT_READ, "accept")
+
+    @property
+    def addresses(self) -> List:
+        return [s.getsockname() for s in self._listeners]
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="QLinkLineFeed"
+        )
+        self._thread.start()
+
+    def publish(self, event: dict) -> None:
+        """Queue one event for every reader; never blocks on a reader."""
+        with self._lock:
+            if not self._readers:
+                return
+            raw = event.get("raw")
+            if raw is not None:
+                raw = raw.encode("ascii", "ignore") + b"\n"
+            json_line = None
+            for reader in self._readers.values():
+                if reader.json:
+                    if json_line is None:
+                        json_line = json.dumps(event).encode() + b"\n"
+                    line = json_line
+                elif raw is None:
+                    # Bridge-made events (status frames) have no Vantage line
+                    continue
+                else:
+                    line = raw
+                if len(reader.lines) == reader.lines.maxlen:
+                    reader.dropped += 1
+                reader.lines.append(line)
+            self.published += 1
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+        try:
+            self._wake_w.send(b"\0")
+        except BlockingIOError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "readers": len(self._readers),
+                "published": self.published,
+                "dropped": sum(r.dropped for r in self._readers.values()),
+                "buffered": sum(len(r.lines) for r in self._readers.values()),
+            }
+
+    # ----- selector loop -----
+    def _run(self) -> None:
+        while True:
+            for key, mask in self._sel.select():
+                if key.data == "accept":
+                    self._accept(key.fileobj)
+                elif key.data == "wake":
+                    self._on_wake()
+                else:
+                    reader = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(reader)
+                    if mask & selectors.EVENT_WRITE and reader.sock in self._readers:
+                        self._flush(reader)
+
+    def _accept(self, listener: socket.socket) -> None:
+        try:
+            sock, _ = listener.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        reader = _Reader(sock, self.buffer_lines)
+        with self._lock:
+            self._readers[sock] = reader
+        self._sel.register(sock, selectors.EVENT_READ, reader)
+        logger.info("Line feed reader connected (total: %d)", len(self._readers))
+
+    def _on_wake(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self._lock:
+            self._wake_pending = False
+            readers = list(self._readers.values())
+        for reader in readers:
+            self._flush(reader)
+
+    def _read(self, reader: _Reader) -> None:
+        try:
+            data = reader.sock.recv(1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(reader)
+            return
+        reader.inbuf = (reader.inbuf + data)[-1024:]
+        while b"\n" in reader.inbuf:
+            line, reader.inbuf = reader.inbuf.split(b"\n", 1)
+            mode = line.strip().lower()
+            if mode in (b"json", b"raw"):
+                reader.json = mode == b"json"
+
+    def _flush(self, reader: _Reader) -> None:
+        while True:
+            if not reader.pending:
+                with self._lock:
+                    if not reader.lines:
+                        break
+                    reader.pending = b"".join(reader.lines)
+                    reader.lines.clear()
+            try:
+                sent = reader.sock.send(reader.pending)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError:
+                self._close(reader)
+                return
+            reader.pending = reader.pending[sent:]
+            if reader.pending:
+                break
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if reader.pending else 0)
+        self._sel.modify(reader.sock, events, reader)
+
+    def _close(self, reader: _Reader) -> None:
+        with self._lock:
+            self._readers.pop(reader.sock, None)
+        try:
+            self._sel.unregister(reader.sock)
+        except (KeyError, ValueError):
+            pass
+        reader.sock.close()
+        logger.info("Line feed reader disconnected (total: %d)", len(self._readers))
@@ -0,0 +1,146 @@
+"""Logging that never blocks the listener or request threads.
+
+``configure_logging()`` gives the ``qlink`` logger a ``QueueHandler``: a log
+call only formats its message and appends the record to a bounded in-memory
+queue, and a background ``QueueListener`` thread writes records to stderr and,
+with ``LOG_FILE`` set, a size-rotated file. When the writer falls behind (a
+slow SD card) records are dropped and counted as ``log_records_dropped`` in
+``/metrics`` instead of stalling the caller.
+
+High-rate categories log to child loggers, ``qlink.events`` (one DEBUG line
+per enabler event, so only with ``QLINK_LOG_LEVEL=DEBUG``) and
+``qlink.commands`` (one line per command), which can be sampled: ``QLINK_LOG_SAMPLE="events=20,commands=5"`` keeps every 20th event
+line and every 5th command line. Warnings and errors are never sampled.
+``QLINK_LOG_JSON=1`` writes one JSON object per line, including the
+structured fields those lines carry: ``event`` (the parsed event) on event
+lines, and ``cmd``, ``target`` and ``elapsed_ms`` on command lines.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+from app.metrics import metrics
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any ``extra=`` fields included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass one in every N INFO/DEBUG records of each sampled category.
+
+    A category is the logger name below ``qlink.`` (``events`` for
+    ``qlink.events``).
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = {name: rate for name, rate in rates.items() if rate > 1}
+        self._counters = {name: itertools.count() for name in self.rates}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        category = record.name.partition(".")[2]
+        counter = self._counters.get(category)
+        return counter is None or next(counter) % self.rates[category] == 0
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking on a full queue."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs only for records that passed the filters: snapshot dict
+        # `extra` fields the caller may keep changing before the writer runs
+        record = super().prepare(record)
+        for key, value in vars(record).items():
+            if isinstance(value, dict) and key not in _RESERVED:
+                setattr(record, key, dict(value))
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped")
+
+
+def parse_sample(spec: str) -> Dict[str, int]:
+    """Parse ``"events=20,commands=5"`` into ``{"events": 20, "commands": 5}``."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip().isdigit():
+            rates[name.strip()] = int(rate)
+    return rates
+
+
+def configure_logging(
+    logger: logging.Logger,
+    level: str = "INFO",
+    log_file: Optional[str] = None,
+    max_bytes: int = 1_000_000,
+    backups: int = 3,
+    json_format: bool = False,
+    sample: Optional[Dict[str, int]] = None,
+    queue_size: int = 10000,
+) -> Optional[QueueListener]:
+    """Route `logger` through a bounded queue to a background writer.
+
+    Returns the started listener (stopped at exit), or None if `logger` was
+    already configured.
+    """
+    if any(isinstance(h, QueueHandler) for h in logger.handlers):
+        return None
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        try:
+            handlers.append(
+                RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups)
+            )
+        except OSError as e:
+            print(f"Cannot log to {log_file}: {e}", file=sys.stderr)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records: queue.Queue = queue.Queue(queue_size)
+    handler = DroppingQueueHandler(records)
+    if sample:
+        handler.addFilter(SamplingFilter(sample))
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    # The writer owns the output; don't also hand records to the root logger
+    logger.propagate = False
+
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
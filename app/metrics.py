@@ -0,0 +1,81 @@
+"""In-process counters, gauges and timing summaries for ``GET /metrics``.
+
+Names may carry labels, which are folded into the key the way Prometheus
+writes them, e.g. ``listener_reconnects{target=main}``::
+
+    metrics.inc("listener_reconnects", target="main")
+    metrics.observe("listener_time_to_first_event_seconds", 0.42, target="main")
+"""
+
+import threading
+from typing import Dict, Optional
+
+
+def _key(name: str, labels: Dict[str, object]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in sorted(labels.items())) + "}"
+
+
+class Metrics:
+    """Thread-safe metric registry; cheap enough for the event hot path."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one sample of a duration/size (count, sum, last, max)."""
+        key = _key(name, labels)
+        with self._lock:
+            s = self._summaries.get(key)
+            if s is None:
+                self._summaries[key] = {
+                    "count": 1,
+                    "sum": value,
+                    "last": value,
+                    "max": value,
+                }
+            else:
+                s["count"] += 1
+                s["sum"] += value
+                s["last"] = value
+                s["max"] = max(s["max"], value)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def summary(self, name: str, **labels) -> Optional[Dict[str, float]]:
+        with self._lock:
+            s = self._summaries.get(_key(name, labels))
+            return dict(s) if s else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {k: dict(v) for k, v in self._summaries.items()},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,138 @@
+"""Plan multi-load level changes around existing keypad presets.
+
+Many keypad buttons already set a fixed group of loads to fixed levels (a
+``PRESET_OFF`` for a whole floor, a ``PRESET_ON`` scene). When a requested
+change includes everything such a button does, one ``VSW@`` press replaces a
+``VLO@`` write per load. ``plan_levels()`` picks buttons greedily by how many
+of the still-uncovered loads they set, using only buttons whose every effect
+is part of the request, and writes the rest individually.
+
+Presets come from the compiled project index (``app.project_index``); only
+buttons whose press events set listed loads to fixed levels are used
+(``TOGGLE``, ``DIM`` and the like depend on the current state, and
+``ALL_ON``/``ALL_OFF`` act on loads the index does not list).
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.scenes import format_fade
+
+# Press events that always leave their loads at the same levels
+DETERMINISTIC_OPS = ("PRESET_ON", "PRESET_OFF")
+# VSW@ state emulating a button press (as POST /button/... uses)
+PRESS_STATE = 4
+
+
+@dataclass(frozen=True)
+class Preset:
+    master: int
+    station: int
+    button: int
+    name: str
+    # load id (contractor number) -> level the press leaves it at
+    levels: Tuple[Tuple[int, int], ...]
+    fade: float
+
+    @property
+    def command(self) -> str:
+        return f"VSW@ {self.master} {self.station} {self.button} {PRESS_STATE}"
+
+
+@dataclass
+class Plan:
+    presets: List[Preset] = field(default_factory=list)
+    # (load id, level) written with VLO@
+    writes: List[Tuple[int, int]] = field(default_factory=list)
+    fade: Optional[float] = None
+
+    def commands(self) -> List[str]:
+        suffix = f" {format_fade(self.fade)}" if self.fade is not None else ""
+        return [p.command for p in self.presets] + [
+            f"VLO@ {load} {level}{suffix}" for load, level in self.writes
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "presets": [
+                {
+                    "master": p.master,
+                    "station": p.station,
+                    "button": p.button,
+                    "name": p.name,
+                    "loads": [load for load, _ in p.levels],
+                }
+                for p in self.presets
+            ],
+            "writes": [{"id": load, "level": level} for load, level in self.writes],
+            "commands": self.commands(),
+        }
+
+
+def _button_levels(events: list, loads: dict) -> Optional[Dict[int, int]]:
+    """Load id -> level a press leaves, or None when it is not fixed."""
+    levels: Dict[int, int] = {}
+    for event in events:
+        if event["op"] not in DETERMINISTIC_OPS or event["trigger"] != 0:
+            return None
+        for address, level in event["loads"]:
+            load = loads.get(str(address))
+            if load is None or levels.get(load["contractor"], level) != level:
+                return None
+            levels[load["contractor"]] = level
+    return levels
+
+
+def presets_from_index(index: dict) -> List[Preset]:
+    """Buttons of the project index whose press sets fixed load levels."""
+    loads = index.get("loads", {})
+    presets = []
+    for station in index.get("stations", {}).values():
+        for number, button in station["buttons"].items():
+            levels = _button_levels(button["events"], loads)
+            if levels is None or len(levels) < 2:
+                continue
+            presets.append(
+                Preset(
+                    master=station["master"],
+                    station=station["station"],
+                    button=int(number),
+                    name=button["name"],
+                    levels=tuple(sorted(levels.items())),
+                    fade=button["events"][0]["fade"],
+                )
+            )
+    return presets
+
+
+def plan_levels(
+    desired: Dict[int, int],
+    presets: List[Preset],
+    fade: Optional[float] = None,
+    any_fade: bool = False,
+) -> Plan:
+    """Cheapest known way to bring every load in `desired` to its level.
+
+    A preset is usable when each load it sets is in `desired` at that level
+    and its fade matches `fade` (no fade only matches instant presets, unless
+    `any_fade` accepts whatever fade each preset has). It is worth a command
+    only while it covers at least two loads not covered yet.
+    """
+    usable = [
+        p
+        for p in presets
+        if (any_fade or p.fade == (fade or 0))
+        and all(desired.get(load) == level for load, level in p.levels)
+    ]
+    plan = Plan(fade=fade)
+    uncovered = set(desired)
+    while usable:
+        best = max(usable, key=lambda p: sum(load in uncovered for load, _ in p.levels))
+        gain = sum(load in uncovered for load, _ in best.levels)
+        if gain < 2:
+            break
+        plan.presets.append(best)
+        uncovered.difference_update(load for load, _ in best.levels)
+        usable.remove(best)
+    plan.writes = [(load, desired[load]) for load in desired if load in uncovered]
+    return plan
@@ -0,0 +1,299 @@
+"""Compiled runtime index of the Vantage project file.
+
+The project export (``Info/Home Prado Ver.txt``) is a few thousand indented
+``Key: value,...`` lines. It is compiled in one streaming pass into a compact
+JSON index the bridge can load in milliseconds::
+
+    {
+      "version": 2,
+      "source_hash": "<sha256 of the project file>",
+      "stations": {
+        "1:23": {
+          "name": "V23", "master": 1, "station": 23, "serial": "0182024",
+          "room": "Game Room", "floor": "1st Floor",
+          "buttons": {
+            "6": {"name": "Medium", "label": "Medium",
+                  "events": [{"op": "PRESET_ON", "index": 1, "trigger": 0,
+                              "arg": 1, "fade": 2.0,
+                              "loads": [[1111, 60], [1114, 100], ...]}]}
+          }
+        }
+      },
+      "loads": {
+        "1111": {"name": "Pendant", "contractor": 101, "address": [1, 1, 1, 1],
+                 "type": "Incandescent", "room": "Game Room"}
+      },
+      "timers": [{"name": "Midnight", "events": [...]}]
+    }
+
+Stations are keyed ``master:station``; loads are keyed by their module
+address (``MEML``, e.g. 1111 = master 1, enclosure 1, module 1, load 1) and
+carry the contractor number commands use. Event load levels come from the
+``LdA`` percentages (``1111:60%``), defaulting to 100 (0 for the OFF events).
+
+``load_index()`` reuses a stored index while the project file's content hash
+matches and recompiles it otherwise.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+INDEX_VERSION = 2
+
+# Events that turn their loads off whatever the LdA percentage says
+OFF_EVENTS = ("PRESET_OFF", "ALL_OFF")
+
+
+def _fields(rest: str, count: int) -> list:
+    """Split a record of `count` fields whose first (name) field may hold commas."""
+    parts = rest.split(",")
+    extra = len(parts) - count
+    if extra > 0:
+        parts = [",".join(parts[: extra + 1])] + parts[extra + 1 :]
+    return [p.strip() for p in parts]
+
+
+def _int(text: str, default: int = 0) -> int:
+    try:
+        return int(text)
+    except ValueError:
+        return default
+
+
+def _event(rest: str) -> dict:
+    # Event: 1, 0 PRESET_ON 1 2.0 0 0
+    # Event: 1, 0 SWITCH_POINTER 34 0.0 1 23 1 0 0
+    index, _, spec = rest.partition(",")
+    words = spec.split()
+    event = {
+        "op": words[1] if len(words) > 1 else "NOT_DEFINED",
+        "index": _int(index.strip(), 1),
+        "trigger": _int(words[0]) if words else 0,
+        "arg": _int(words[2]) if len(words) > 2 else 0,
+        "fade": float(words[3]) if len(words) > 3 else 0.0,
+        "loads": [],
+    }
+    if event["op"] == "SWITCH_POINTER" and len(words) >= 7:
+        event["switch"] = [_int(w) for w in words[4:7]]
+    return event
+
+
+def _load_assignments(rest: str, op: str) -> Iterable[list]:
+    # LdA: 1111:60%,1114,1115:60%
+    default = 0 if op in OFF_EVENTS else 100
+    for item in rest.split(","):
+        address, _, pct = item.strip().partition(":")
+        if not address.isdigit():
+            continue
+        level = default
+        if pct and op not in OFF_EVENTS:
+            level = _int(pct.rstrip("%"), default)
+        yield [int(address), level]
+
+
+def compile_lines(lines: Iterable[str], source_hash: str = "") -> dict:
+    """Compile project file lines into an index in a single pass."""
+    stations = {}
+    loads = {}
+    timers = []
+    floor = room = None
+    station = button = event = None
+    events = None  # list the next Event: line belongs to
+
+    for line in lines:
+        key, sep, rest = line.strip().partition(":")
+        if not sep:
+            continue
+        rest = rest.strip()
+
+        if key == "LdA":
+            if event is not None:
+                event["loads"].extend(_load_assignments(rest, event["op"]))
+        elif key == "Event":
+            if events is not None:
+                event = _event(rest)
+                events.append(event)
+        elif key == "Btn":
+            if station is None:
+                continue
+            name, number, label1, label2 = _fields(rest, 5)[:4]
+            button = {
+                "name": name,
+                "label": " ".join(part for part in (label1, label2) if part),
+                "events": [],
+            }
+            station["buttons"][number] = button
+            events, event = button["events"], None
+        elif key == "Station":
+            f = _fields(rest, 11)
+            station = {
+                "name": f[0],
+                "master": _int(f[2]),
+                "station": _int(f[3]),
+                "serial": f[4],
+                "room": room,
+                "floor": floor,
+                "buttons": {},
+            }
+            stations[f"{station['master']}:{station['station']}"] = station
+            button = event = events = None
+        elif key == "Load":
+            f = _fields(rest, 12)
+            loads["".join(f[1:5])] = {
+                "name": f[0],
+                "contractor": _int(f[5]),
+                "address": [_int(x) for x in f[1:5]],
+                "type": f[6],
+                "room": room,
+            }
+        elif key == "Time":
+            timer = {"name": _fields(rest, 7)[0], "events": []}
+            timers.append(timer)
+            station = button = event = None
+            events = timer["events"]
+        elif key == "Room":
+            room = rest
+            station = button = event = events = None
+        elif key == "Floor":
+            floor, room = rest, None
+            station = button = event = events = None
+
+    return {
+        "version": INDEX_VERSION,
+        "source_hash": source_hash,
+        "stations": stations,
+        "loads": loads,
+        "timers": timers,
+    }
+
+
+def compile_project(path: str) -> dict:
+    """Stream the project file once, hashing and compiling as it goes."""
+    digest = hashlib.sha256()
+
+    def lines():
+        with open(path, "rb") as f:
+            for raw in f:
+                digest.update(raw)
+                yield raw.decode("utf-8", errors="replace")
+
+    index = compile_lines(lines())
+    index["source_hash"] = digest.hexdigest()
+    return index
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_index(index_path: str) -> Optional[dict]:
+    """Load a stored index, or None if it is missing, unreadable or outdated."""
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def write_index(index: dict, index_path: str) -> None:
+    """Write the index atomically so readers never see a partial file."""
+    tmp = f"{index_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, index_path)
+
+
+def load_index(source_path: str, index_path: str) -> Tuple[dict, bool]:
+    """Return (index, rebuilt); recompiles only when the source hash changed."""
+    index = read_index(index_path)
+    if index is not None and index.get("source_hash") == file_hash(source_path):
+        return index, False
+    index = compile_project(source_path)
+    write_index(index, index_path)
+    return index, True
+
+
+def address_index(index: dict) -> Dict[Tuple[int, int, int, int], dict]:
+    """Map (master, enclosure, module, load) to its ``Load:`` record.
+
+    ``LO`` events address loads by module position; this resolves them to the
+    contractor number used by commands with one dict lookup.
+    """
+    return {
+        tuple(load["address"]): {
+            "id": load["contractor"],
+            "name": load["name"],
+            "room": load["room"],
+        }
+        for load in index.get("loads", {}).values()
+        if len(load.get("address", ())) == 4
+    }
+
+
+def station_buttons(index: dict) -> dict:
+    """Render the index in the station-keyed ``loads.json`` layout.
+
+    Station numbers repeat across masters, so records are keyed
+    ``station_{master}_{station}``.
+    """
+    out = {}
+    for station in index["stations"].values():
+        if not station["buttons"]:
+            continue
+        buttons = {}
+        for number, button in station["buttons"].items():
+            first = button["events"][0] if button["events"] else None
+            assigned = first["loads"] if first else []
+            buttons[f"button_{number}"] = {
+                "name": button["name"],
+                "button": int(number),
+                "event_type": first["op"] if first else None,
+                "fade": first["fade"] if first else None,
+                "loads": [address for address, _ in assigned],
+                "levels": [level for _, level in assigned],
+            }
+        out[f"station_{station['master']}_{station['station']}"] = {
+            "name": station["name"],
+            "station": station["station"],
+            "master": station["master"],
+            "buttons": buttons,
+        }
+    return out
+
+
+def merge_loads_json(existing: dict, generated: dict) -> dict:
+    """Merge generated ``loads.json`` sections into the current document.
+
+    Sections ``generated`` doesn't produce (e.g. ``rooms`` when only the
+    station layout was rebuilt, or the station records when only ``rooms``
+    was) are kept. When ``generated`` has station records they replace the
+    old ones, keeping fields only the old record had (such as ``location``),
+    and stations no longer in the project are dropped. Old records under the
+    pre-master ``station_N`` keys are matched by their ``master`` field.
+    """
+    replace_stations = any(key.startswith("station_") for key in generated)
+    merged = {
+        key: value
+        for key, value in existing.items()
+        if key not in generated
+        and not (replace_stations and key.startswith("station_"))
+    }
+    for key, value in generated.items():
+        old = existing.get(key)
+        if key.startswith("station_") and old is None:
+            legacy = existing.get(f"station_{value.get('station')}")
+            if isinstance(legacy, dict) and legacy.get("master") == value.get("master"):
+                old = legacy
+        if key.startswith("station_") and isinstance(old, dict):
+            value = {**old, **value}
+        merged[key] = value
+    return merged
@@ -0,0 +1,320 @@
+"""Local automation rules run by the bridge on enabler events.
+
+Rules live in ``config/rules.json`` (or ``config/rules.yaml`` when PyYAML is
+installed)::
+
+    {
+      "rules": {
+        "bar-evening": {
+          "when": {"button": {"master": 1, "station": 23, "button": 5}},
+          "do": [
+            {"scene": "evening"},
+            {"delay": 1.5},
+            {"command": "VLO@ 127 0", "target": "main"},
+            {"webhook": "http://hub.local/hooks/bar"}
+          ]
+        },
+        "porch-follows": {
+          "when": {"load": {"id": 127, "level": 0}},
+          "do": [{"command": "VLO@ 324 0"}]
+        }
+      }
+    }
+
+Triggers match parsed events (``parse_vantage_event``):
+
+- ``button``: an ``SW`` event for ``master`` (default 1), ``station`` and
+  ``button`` in ``state`` (``pressed`` by default, or ``released``);
+- ``load``: an ``LO`` event resolved to load ``id``, optionally only at
+  ``level``;
+- ``led``: an ``LE`` event for ``master``/``station``.
+
+Rules are indexed by that key, so matching an event is one dict lookup however
+many rules exist. A matching rule's actions run in order on a small thread
+pool, never on the listener thread. A ``delay`` pauses only that rule: the
+remaining actions are scheduled on a timer, so no pool thread waits. Each run
+is counted and timed in ``/metrics`` (``rule_runs``, ``rule_errors``,
+``rule_trigger_seconds`` from event to first action, and ``rule_seconds``, the
+time spent running actions, delays excluded).
+"""
+
+import json
+import logging
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.metrics import metrics
+
+try:
+    import yaml
+except ImportError:  # optional: JSON rules only
+    yaml = None
+
+logger = logging.getLogger("qlink.rules")
+
+ACTIONS = ("command", "scene", "webhook", "delay")
+WEBHOOK_TIMEOUT = 5.0
+
+TriggerKey = Tuple
+
+
+class RuleError(ValueError):
+    """Raised when a rule definition is malformed."""
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    key: TriggerKey
+    # Only for load triggers: fire at this level only (None = any change)
+    level: Optional[int]
+    actions: Tuple[dict, ...]
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trigger": list(self.key),
+            "level": self.level,
+            "actions": list(self.actions),
+        }
+
+
+def event_key(event: dict) -> Optional[TriggerKey]:
+    """Index key of a parsed event, or None for events rules cannot match."""
+    kind = event.get("type")
+    if kind == "button":
+        return (
+            "button",
+            event["master"],
+            event["station"],
+            event["button"],
+            event["state"],
+        )
+    if kind == "load_module" and "load_id" in event:
+        return ("load", event["load_id"])
+    if kind == "led_keypad":
+        return ("led", event["master"], event["station"])
+    return None
+
+
+def _int(spec: dict, field: str, name: str, default: Optional[int] = None) -> int:
+    value = spec.get(field, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError) as e:
+        raise RuleError(f"rule '{name}' needs an integer '{field}'") from e
+
+
+def _trigger(name: str, when: dict) -> Tuple[TriggerKey, Optional[int]]:
+    if not isinstance(when, dict) or len(when) != 1:
+        raise RuleError(f"rule '{name}' needs one trigger: button, load or led")
+    kind, spec = next(iter(when.items()))
+    if not isinstance(spec, dict):
+        raise RuleError(f"rule '{name}' trigger '{kind}' must be an object")
+    if kind == "button":
+        state = spec.get("state", "pressed")
+        if state not in ("pressed", "released"):
+            raise RuleError(f"rule '{name}' button state must be pressed/released")
+        key = (
+            "button",
+            _int(spec, "master", name, 1),
+            _int(spec, "station", name),
+            _int(spec, "button", name),
+            state,
+        )
+        return key, None
+    if kind == "load":
+        level = spec.get("level")
+        return ("load", _int(spec, "id", name)), (
+            None if level is None else _int(spec, "level", name)
+        )
+    if kind == "led":
+        return ("led", _int(spec, "master", name, 1), _int(spec, "station", name)), None
+    raise RuleError(f"rule '{name}' has an unknown trigger '{kind}'")
+
+
+def _action(name: str, action: dict) -> dict:
+    kinds = [kind for kind in ACTIONS if isinstance(action, dict) and kind in action]
+    if len(kinds) != 1:
+        raise RuleError(
+            f"rule '{name}' action {action!r} needs one of: " + ", ".join(ACTIONS)
+        )
+    kind = kinds[0]
+    if kind == "delay":
+        try:
+            delay = float(action["delay"])
+        except (TypeError, ValueError) as e:
+            raise RuleError(f"rule '{name}' delay must be a number") from e
+        if not 0 <= delay <= 3600:
+            raise RuleError(f"rule '{name}' delay must be 0-3600 s")
+        return {"delay": delay}
+    if not isinstance(action[kind], str) or not action[kind]:
+        raise RuleError(f"rule '{name}' {kind} must be a non-empty string")
+    return dict(action)
+
+
+def compile_rule(name: str, spec: dict) -> Rule:
+    """Validate one rule definition."""
+    if not isinstance(spec, dict):
+        raise RuleError(f"rule '{name}' must be an object")
+    key, level = _trigger(name, spec.get("when"))
+    actions = spec.get("do")
+    if not isinstance(actions, list) or not actions:
+        raise RuleError(f"rule '{name}' must define a non-empty 'do' list")
+    return Rule(
+        name=name,
+        key=key,
+        level=level,
+        actions=tuple(_action(name, action) for action in actions),
+    )
+
+
+def compile_rules(rules_cfg: dict) -> Tuple[Dict[str, Rule], Dict[str, str]]:
+    """Compile a rules document; returns ``(rules, errors)`` like scenes do.
+
+    Rules with ``"enabled": false`` are skipped.
+    """
+    rules: Dict[str, Rule] = {}
+    errors: Dict[str, str] = {}
+    for name, spec in (rules_cfg.get("rules") or {}).items():
+        if isinstance(spec, dict) and spec.get("enabled") is False:
+            continue
+        try:
+            rules[name] = compile_rule(name, spec)
+        except RuleError as e:
+            errors[name] = str(e)
+    return rules, errors
+
+
+def read_rules_file(path: str) -> dict:
+    """Parse a rules file; YAML needs the optional PyYAML package."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuleError(f"{path}: install PyYAML to use YAML rules")
+            try:
+                return yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise RuleError(f"{path}: {e}") from e
+        return json.load(f)
+
+
+def post_webhook(url: str, body: dict, timeout: float = WEBHOOK_TIMEOUT) -> int:
+    """POST `body` as JSON to `url`; returns the HTTP status."""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status
+
+
+class RuleEngine:
+    """Match events against an index of rules and run their actions.
+
+    `run_action(action, event)` performs ``command`` and ``scene`` actions
+    (the bridge supplies it); ``webhook`` and ``delay`` are handled here.
+    """
+
+    def __init__(
+        self,
+        run_action: Callable[[dict, dict], None],
+        workers: int = 4,
+        webhook: Callable[[str, dict], object] = post_webhook,
+    ):
+        self._run_action = run_action
+        self._webhook = webhook
+        self._index: Dict[TriggerKey, List[Rule]] = {}
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="qlink-rule")
+        self._timers_lock = threading.Lock()
+        self._timers: set = set()
+        self.rules: Dict[str, Rule] = {}
+
+    def load(self, rules: Dict[str, Rule]) -> None:
+        index: Dict[TriggerKey, List[Rule]] = {}
+        for rule in rules.values():
+            index.setdefault(rule.key, []).append(rule)
+        self.rules, self._index = dict(rules), index
+
+    def dispatch(self, event: dict) -> int:
+        """Queue every rule matching `event`; returns how many matched."""
+        if not self._index:
+            return 0
+        key = event_key(event)
+        matched = 0
+        for rule in self._index.get(key, ()) if key else ():
+            if rule.level is not None and event.get("level") != rule.level:
+                continue
+            self._pool.submit(self._run, rule, event, perf_counter())
+            matched += 1
+        return matched
+
+    def _run(
+        self,
+        rule: Rule,
+        event: dict,
+        received: float,
+        start: int = 0,
+        busy: float = 0.0,
+    ) -> None:
+        """Run `rule`'s actions from `start` until the end or the next delay.
+
+        `busy` carries the time spent running earlier segments, so
+        ``rule_seconds`` leaves out the delays between them.
+        """
+        began = perf_counter()
+        if start == 0:
+            metrics.observe("rule_trigger_seconds", began - received, rule=rule.name)
+        try:
+            for step in range(start, len(rule.actions)):
+                action = rule.actions[step]
+                if "delay" in action:
+                    busy += perf_counter() - began
+                    self._resume_after(action["delay"], rule, event, step + 1, busy)
+                    return
+                elif "webhook" in action:
+                    self._webhook(
+                        action["webhook"], {"rule": rule.name, "event": event}
+                    )
+                else:
+                    self._run_action(action, event)
+        except Exception as e:
+            metrics.inc("rule_errors", rule=rule.name)
+            logger.warning(f"Rule '{rule.name}' failed: {e}")
+        metrics.inc("rule_runs", rule=rule.name)
+        metrics.observe("rule_seconds", busy + perf_counter() - began, rule=rule.name)
+
+    def _resume_after(
+        self, delay: float, rule: Rule, event: dict, step: int, busy: float
+    ) -> None:
+        def resume():
+            with self._timers_lock:
+                self._timers.discard(timer)
+            try:
+                self._pool.submit(self._run, rule, event, perf_counter(), step, busy)
+            except RuntimeError:  # shut down while waiting
+                pass
+
+        timer = threading.Timer(delay, resume)
+        timer.daemon = True
+        with self._timers_lock:
+            self._timers.add(timer)
+        timer.start()
+
+    def pending(self) -> int:
+        """Rules waiting out a delay."""
+        with self._timers_lock:
+            return len(self._timers)
+
+    def shutdown(self) -> None:
+        with self._timers_lock:
+            timers, self._timers = self._timers, set()
+        for timer in timers:
+            timer.cancel()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,159 @@
+"""Server-side scenes for the QLink bridge.
+
+A scene is a named set of ``load -> level`` changes (with an optional fade).
+Scenes are defined in ``config/scenes.json``::
+
+    {
+      "scenes": {
+        "movie": {
+          "fade": 2.0,
+          "loads": [
+            {"id": 127, "level": 20},
+            {"id": 324, "level": 0, "fade": 0}
+          ]
+        }
+      }
+    }
+
+Load ids are contractor numbers, the ids ``VLO@`` takes. Each scene is
+validated against the contractor numbers known from the project index and the
+``rooms`` section of ``config/loads.json``, and precompiled into the exact bytes
+sent to the IP-Enabler, so activating a scene is a single pipelined write instead
+of one HTTP request per load.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class SceneError(ValueError):
+    """Raised when a scene definition is malformed or references unknown loads."""
+
+
+@dataclass(frozen=True)
+class Scene:
+    name: str
+    # (load_id, level, fade) in the order they are sent
+    steps: Tuple[Tuple[int, int, Optional[float]], ...]
+    commands: Tuple[str, ...]
+    payload: bytes
+    # enabler target from config/enablers.json (None = default target)
+    target: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "loads": [
+                {"id": load, "level": level, "fade": fade}
+                for load, level, fade in self.steps
+            ],
+            "commands": list(self.commands),
+            "target": self.target,
+        }
+
+
+def known_load_ids(loads_cfg: dict, index: Optional[dict] = None) -> Set[int]:
+    """Collect the contractor numbers of every known load.
+
+    Reads the room loads of a loads.json document and, when given, the loads
+    of the compiled project index. Keypad button ``loads`` in the
+    ``station_M_N`` records are module addresses (e.g. 2111), not ids ``VLO@``
+    accepts, so they are deliberately left out.
+    """
+    ids: Set[int] = set()
+    for room in loads_cfg.get("rooms", []) or []:
+        for load in room.get("loads", []) or []:
+            if "id" in load:
+                ids.add(int(load["id"]))
+    for load in ((index or {}).get("loads") or {}).values():
+        if load.get("contractor") is not None:
+            ids.add(int(load["contractor"]))
+    return ids
+
+
+def format_fade(fade: float) -> str:
+    # Vantage accepts 0.1 s increments
+    return f"{round(float(fade), 1):g}"
+
+
+def compile_scene(
+    name: str,
+    spec: dict,
+    eol: str,
+    known_loads: Set[int],
+) -> Scene:
+    """Validate a scene definition and precompile it to command bytes."""
+    if not isinstance(spec, dict):
+        raise SceneError(f"scene '{name}' must be an object")
+    if not known_loads:
+        raise SceneError(f"scene '{name}' cannot be checked: no loads are known")
+    entries = spec.get("loads")
+    if not isinstance(entries, list) or not entries:
+        raise SceneError(f"scene '{name}' must define a non-empty 'loads' list")
+
+    default_fade = spec.get("fade")
+    steps: List[Tuple[int, int, Optional[float]]] = []
+    seen: Set[int] = set()
+    unknown: List[int] = []
+
+    for entry in entries:
+        try:
+            load = int(entry["id"])
+            level = int(entry["level"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise SceneError(f"scene '{name}' has an invalid entry {entry!r}") from e
+        if not 0 <= level <= 100:
+            raise SceneError(f"scene '{name}' load {load} level must be 0-100")
+        if load in seen:
+            raise SceneError(f"scene '{name}' lists load {load} more than once")
+        seen.add(load)
+        if load not in known_loads:
+            unknown.append(load)
+
+        fade = entry.get("fade", default_fade)
+        if fade is not None:
+            try:
+                fade = float(fade)
+            except (TypeError, ValueError) as e:
+                raise SceneError(f"scene '{name}' load {load} has invalid fade") from e
+            if not 0 <= fade <= 6553.5:
+                raise SceneError(f"scene '{name}' load {load} fade out of range")
+        steps.append((load, level, fade))
+
+    if unknown:
+        raise SceneError(
+            f"scene '{name}' references unknown loads: "
+            + ", ".join(str(x) for x in unknown)
+        )
+
+    commands = tuple(
+        f"VLO@ {load} {level}" + (f" {format_fade(fade)}" if fade is not None else "")
+        for load, level, fade in steps
+    )
+    payload = "".join(cmd + eol for cmd in commands).encode("ascii")
+    return Scene(
+        name=name,
+        steps=tuple(steps),
+        commands=commands,
+        payload=payload,
+        target=spec.get("target"),
+    )
+
+
+def compile_scenes(
+    scenes_cfg: dict, eol: str, known_loads: Set[int]
+) -> Tuple[Dict[str, Scene], Dict[str, str]]:
+    """Compile every scene in a scenes.json document.
+
+    Returns ``(scenes, errors)``; invalid scenes are left out of ``scenes`` and
+    their problem is reported in ``errors`` so one bad entry doesn't disable the
+    rest.
+    """
+    scenes: Dict[str, Scene] = {}
+    errors: Dict[str, str] = {}
+    for name, spec in (scenes_cfg.get("scenes") or {}).items():
+        try:
+            scenes[name] = compile_scene(name, spec, eol, known_loads)
+        except SceneError as e:
+            errors[name] = str(e)
+    return scenes, errors
@@ -0,0 +1,164 @@
+"""Last known level of every load, and keypad LED state.
+
+Fed by ``LO`` events once their module address has been resolved to a load
+number (see ``app.project_index.address_index``), so the bridge knows each
+load's level without polling the enabler.
+
+Each record keeps the level a load started from, its target and the fade
+time, so a load that is ramping reads back at its interpolated level. Commands
+sent with a fade start a ramp; the ``LO`` event that follows for the same
+target keeps it, while any other event level takes effect at once. The
+enabler often reports that ``LO`` before the command's reply is read; the
+command then keeps the event-confirmed record and only lends it its fade.
+
+Levels are only trusted for skipping commands (``fresh_level``) while they are
+recent and no event can have been missed since: the listener calls
+``mark_stale()`` whenever it loses its connection.
+
+``KeypadLedStore`` keeps each station's LED bitmaps from ``LE``/``LC`` events.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+def level_at(record: dict, now: float) -> int:
+    """Level of a (possibly fading) record at time `now`."""
+    start, target, fade = record["start"], record["target"], record["fade"]
+    elapsed = now - record["updated"]
+    if fade <= 0 or elapsed >= fade:
+        return target
+    return round(start + (target - start) * max(elapsed, 0.0) / fade)
+
+
+class LoadStateStore:
+    """Thread-safe ``load id -> {start, target, fade, updated, source}`` map."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loads: Dict[int, dict] = {}
+        # Records updated before this (epoch seconds) may have missed events
+        self._valid_after = 0.0
+
+    def update(
+        self, load: int, level: int, source: str = "event", fade: float = 0.0
+    ) -> None:
+        """Record that `load` is going to `level` over `fade` seconds."""
+        now = time.time()
+        with self._lock:
+            previous = self._loads.get(load)
+            if (
+                source == "event"
+                and previous is not None
+                and previous["target"] == level
+                and now - previous["updated"] < previous["fade"]
+            ):
+                # The event for a ramp already under way
+                previous["source"] = source
+                return
+            if (
+                source == "command"
+                and previous is not None
+                and previous["source"] == "event"
+                and previous["target"] == level
+            ):
+                # The event for this command came first: keep it trusted, and
+                # ramp from where the event found the load if still fading
+                if now - previous["updated"] < fade:
+                    previous["fade"] = max(float(fade), previous["fade"])
+                return
+            start = level_at(previous, now) if previous else level
+            self._loads[load] = {
+                "start": start,
+                "target": level,
+                "fade": max(float(fade), 0.0),
+                "updated": now,
+                "source": source,
+            }
+
+    @staticmethod
+    def _view(record: dict, now: float) -> dict:
+        return {
+            "level": level_at(record, now),
+            "target": record["target"],
+            "fading": now - record["updated"] < record["fade"],
+            "updated": record["updated"],
+            "source": record["source"],
+        }
+
+    def get(self, load: int) -> Optional[dict]:
+        """Current (interpolated) level of `load` and where it is heading."""
+        with self._lock:
+            record = self._loads.get(load)
+            return self._view(record, time.time()) if record else None
+
+    def fresh_level(self, load: int, max_age: float) -> Optional[int]:
+        """Target reported by an event within `max_age` s, with none missed since."""
+        with self._lock:
+            record = self._loads.get(load)
+            if record is None or record["source"] != "event":
+                return None
+            updated = record["updated"]
+            if updated < self._valid_after or time.time() - updated > max_age:
+                return None
+            return record["target"]
+
+    def mark_stale(self) -> None:
+        """Stop trusting current levels (events may be lost from here on)."""
+        with self._lock:
+            self._valid_after = time.time()
+
+    def snapshot(self) -> Dict[int, dict]:
+        now = time.time()
+        with self._lock:
+            return {load: self._view(r, now) for load, r in self._loads.items()}
+
+    def __len__(self) -> int:
+        return len(self._loads)
+
+
+class KeypadLedStore:
+    """Thread-safe ``(master, station) -> LED bitmaps`` map.
+
+    Fed by ``LE`` events (hex bitmaps of lit and blinking LEDs, bit ``n - 1``
+    for button ``n``) and ``LC`` events (one LCD button's LED), so a button's
+    LED is two dict lookups and a bit test.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stations: Dict[Tuple[int, int], list] = {}
+
+    def update(self, master: int, station: int, on: int, blink: int) -> None:
+        with self._lock:
+            self._stations[(master, station)] = [on, blink, time.time()]
+
+    def set_button(self, master: int, station: int, button: int, on: bool) -> None:
+        bit = 1 << (button - 1)
+        with self._lock:
+            record = self._stations.setdefault((master, station), [0, 0, 0.0])
+            record[0] = record[0] | bit if on else record[0] & ~bit
+            record[2] = time.time()
+
+    def station(self, master: int, station: int) -> Optional[dict]:
+        with self._lock:
+            record = self._stations.get((master, station))
+            if record is None:
+                return None
+            on, blink, updated = record
+        return {"on": on, "blink": blink, "updated": updated}
+
+    def button(self, master: int, station: int, button: int) -> Optional[dict]:
+        state = self.station(master, station)
+        if state is None:
+            return None
+        bit = 1 << (button - 1)
+        return {
+            "on": bool(state["on"] & bit),
+            "blink": bool(state["blink"] & bit),
+            "updated": state["updated"],
+        }
+
+    def __len__(self) -> int:
+        return len(self._stations)
@@ -0,0 +1,113 @@
+// Live load levels for the home pages.
+//
+// Levels arrive as pushed LO events on the /events websocket. While the
+// socket is down it is reopened with exponential backoff and jitter, and
+// /loads/state (every load in one request) is polled instead; after a
+// reconnect the state is fetched once to catch up on missed events.
+//
+// First paint uses `known` (the levels embedded in the page) or, without it,
+// one /loads/state fetch. Loads in `loadIds` still missing after that (the
+// bridge was restarted and has seen no events yet) are read once each with
+// /load/{id}/status, which asks the enabler (VGL@).
+//
+//   QlinkLive.connect({
+//       onLevel: (id, level) => ...,
+//       onStatus: (status) => ...,   // 'live', 'no-enabler', 'polling', 'offline'
+//       loadIds: [101, 102],         // loads the page shows
+//       known: snapshot.loads,       // optional: levels embedded in the page
+//   });
+const QlinkLive = (() => {
+    const BACKOFF_BASE_MS = 500;
+    const BACKOFF_MAX_MS = 30000;
+
+    function connect({ onLevel, onStatus, loadIds = [], known = null, pollMs = 10000 }) {
+        let attempts = 0;
+        let pollTimer = null;
+        let everOpened = false;
+        const seen = new Set(Object.keys(known || {}).map(Number));
+
+        function level(id, value) {
+            seen.add(id);
+            onLevel(id, value);
+        }
+
+        async function fetchState() {
+            try {
+                const response = await fetch('/loads/state');
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const data = await response.json();
+                for (const [id, state] of Object.entries(data.loads)) {
+                    level(Number(id), state.level);
+                }
+                return true;
+            } catch (error) {
+                return false;
+            }
+        }
+
+        // One VGL@ per load nobody has reported yet, one at a time
+        async function queryMissing() {
+            if (known === null) await fetchState();
+            for (const id of loadIds) {
+                if (seen.has(id)) continue;
+                try {
+                    const response = await fetch(`/load/${id}/status`);
+                    if (!response.ok) continue;
+                    const data = await response.json();
+                    if (data.level !== null && !seen.has(id)) level(id, data.level);
+                } catch (error) {
+                    return;
+                }
+            }
+        }
+
+        async function poll() {
+            onStatus((await fetchState()) ? 'polling' : 'offline');
+        }
+
+        function startPolling() {
+            if (pollTimer === null) {
+                pollTimer = setInterval(poll, pollMs);
+                poll();
+            }
+        }
+
+        function stopPolling() {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+
+        function open() {
+            const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+            const socket = new WebSocket(`${scheme}://${location.host}/events`);
+
+            socket.onopen = () => {
+                attempts = 0;
+                stopPolling();
+                if (everOpened) fetchState();
+                everOpened = true;
+            };
+
+            socket.onmessage = (message) => {
+                const event = JSON.parse(message.data);
+                if (event.type === 'status') {
+                    onStatus(event.connected ? 'live' : 'no-enabler');
+                } else if (event.load_id !== undefined && event.level !== undefined) {
+                    level(event.load_id, event.level);
+                }
+            };
+
+            socket.onclose = () => {
+                startPolling();
+                const delay = Math.min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** attempts);
+                attempts += 1;
+                setTimeout(open, delay / 2 + Math.random() * delay / 2);
+            };
+        }
+
+        open();
+        queryMissing();
+    }
+
+    return { connect };
+})();
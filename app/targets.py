@@ -0,0 +1,602 @@
+"""IP-Enabler targets for the QLink bridge.
+
+A target is one Vantage IP-Enabler (host/port). Each target owns:
+
+- a small pool of persistent command connections, whose bounded checkout also
+  schedules commands so at most ``pool_size`` are in flight per enabler,
+- the state of its own event listener connection (see ``app.bridge``),
+  including a ``Liveness`` record that detects half-open connections by
+  probing when the enabler has been silent and answers readiness checks
+  without touching the network,
+- a ``CircuitBreaker`` that stops commands from waiting out connect timeouts
+  while the enabler is unreachable, and a cap on commands queued for a pooled
+  connection, so a dead or swamped enabler costs callers nothing but a fast
+  ``Unavailable`` error.
+
+Targets are defined in ``config/enablers.json``::
+
+    {
+      "default": "main",
+      "targets": {
+        "main": {"ip": "192.168.1.200", "port": 3041, "masters": [1, 2]},
+        "guest": {"ip": "192.168.1.201", "port": 3041, "masters": [3]}
+      }
+    }
+
+Commands are routed by explicit target name or by the master number of the
+station they address. When the file is absent a single ``default`` target is
+built from ``VANTAGE_IP``/``VANTAGE_PORT``.
+"""
+
+import random
+import socket
+import threading
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+
+# Unsolicited event lines that may share a connection with command replies
+EVENT_PREFIXES = ("SW ", "LO ", "LS ", "LV ", "LE ", "LC ", "ROS", "ROL", "ROD")
+
+
+class PoolTimeout(socket.timeout):
+    """No pooled connection became free within the command timeout."""
+
+
+class ConnectionClosed(ConnectionError):
+    """The enabler closed or reset a command connection.
+
+    ``received`` tells whether any reply bytes arrived first; if none did, the
+    enabler never acted on the command and it is safe to send it again.
+    """
+
+    def __init__(self, message: str, received: bool = False):
+        super().__init__(message)
+        self.received = received
+
+
+class Unavailable(Exception):
+    """A command was refused without contacting the enabler.
+
+    Raised while the circuit breaker is open (``CircuitOpen``) or when too many
+    commands are already waiting for a connection (``Overloaded``);
+    ``retry_after`` suggests when to try again, in seconds.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(Unavailable):
+    pass
+
+
+class Overloaded(Unavailable):
+    pass
+
+
+class ConnectionPool:
+    """Bounded pool of persistent command connections to one IP-Enabler."""
+
+    def __init__(self, ip: str, port: int, size: int = 2):
+        self.ip = ip
+        self.port = port
+        self.size = max(1, int(size))
+        self._idle: Deque[socket.socket] = deque()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.stale = 0
+
+    def acquire(
+        self, timeout: float, fresh: bool = False
+    ) -> Tuple[socket.socket, bool]:
+        """Take a connection; returns ``(sock, reused)``.
+
+        Idle connections the enabler has closed are discarded on the way;
+        ``fresh=True`` skips the idle ones and always opens a new connection.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeout(f"no free connection to {self.ip}:{self.port}")
+        while not fresh:
+            with self._lock:
+                sock = self._idle.popleft() if self._idle else None
+            if sock is None:
+                break
+            if _drain(sock):
+                return sock, True
+            sock.close()
+            self.stale += 1
+        try:
+            sock = socket.create_connection((self.ip, self.port), timeout=timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            enable_keepalive(sock)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.opened += 1
+        return sock, False
+
+    def release(self, sock: socket.socket, broken: bool = False) -> None:
+        if broken:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        else:
+            with self._lock:
+                self._idle.append(sock)
+        self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                try:
+                    self._idle.popleft().close()
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "opened": self.opened,
+            "stale": self.stale,
+        }
+
+
+def _drain(sock: socket.socket) -> bool:
+    """Discard late replies left on a reused connection.
+
+    Returns False when the enabler has closed the connection.
+    """
+    try:
+        sock.setblocking(False)
+        while True:
+            if not sock.recv(4096):
+                return False
+    except (BlockingIOError, InterruptedError):
+        return True
+    except OSError:
+        return False
+    finally:
+        try:
+            sock.setblocking(True)
+        except OSError:
+            pass
+
+
+def _read_lines(sock: socket.socket, expected: int, timeout: float) -> List[str]:
+    """Read up to `expected` CR-terminated replies before `timeout` expires."""
+    lines: List[str] = []
+    buffer = b""
+    received = False
+    deadline = monotonic() + timeout
+    while len(lines) < expected:
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            break
+        sock.settimeout(remaining)
+        try:
+            data = sock.recv(4096)
+        except socket.timeout:
+            break
+        except OSError as e:
+            raise ConnectionClosed(str(e), received) from e
+        if not data:
+            raise ConnectionClosed("connection closed by IP-Enabler", received)
+        received = True
+        buffer += data
+        while b"\r" in buffer and len(lines) < expected:
+            line, buffer = buffer.split(b"\r", 1)
+            text = line.strip().decode("ascii", errors="ignore")
+            if text and not text.startswith(EVENT_PREFIXES):
+                lines.append(text)
+    return lines
+
+
+def enable_keepalive(
+    sock: socket.socket, idle: int = 10, interval: int = 5, count: int = 3
+) -> None:
+    """Have the kernel probe an idle connection and fail it if the peer is gone.
+
+    With the defaults a vanished enabler is detected after about
+    ``idle + interval * count`` = 25 s of silence even when nothing is sent.
+    Options missing on this platform are skipped.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ("TCP_KEEPIDLE", idle),
+        ("TCP_KEEPINTVL", interval),
+        ("TCP_KEEPCNT", count),
+    ):
+        if hasattr(socket, option):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+            except OSError:
+                pass
+
+
+class Liveness:
+    """Silence tracking for a persistent enabler connection.
+
+    The listener reports every read with ``received()``. When nothing has
+    arrived for ``probe_interval`` seconds ``idle()`` asks for a probe (a
+    command the enabler answers), and once ``silence_timeout`` passes with no
+    data at all the connection is considered dead, which catches half-open
+    sockets long before TCP would. ``ready()`` and ``status()`` only read this
+    state, so health checks never open connections.
+    """
+
+    def __init__(self, probe_interval: float = 15.0, silence_timeout: float = 25.0):
+        self.probe_interval = probe_interval
+        self.silence_timeout = max(silence_timeout, probe_interval)
+        self.last_rx: Optional[float] = None
+        self.probe_sent: Optional[float] = None
+        self.probes = 0
+        self.last_probe_rtt: Optional[float] = None
+
+    def reset(self) -> None:
+        """A new connection: count it as fresh data."""
+        self.last_rx = monotonic()
+        self.probe_sent = None
+
+    def lost(self) -> None:
+        self.last_rx = None
+        self.probe_sent = None
+
+    def received(self) -> bool:
+        """Record incoming data; True if it answered an outstanding probe."""
+        now = monotonic()
+        self.last_rx = now
+        if self.probe_sent is None:
+            return False
+        self.last_probe_rtt = now - self.probe_sent
+        self.probe_sent = None
+        return True
+
+    def silent_for(self) -> Optional[float]:
+        return None if self.last_rx is None else monotonic() - self.last_rx
+
+    def idle(self) -> bool:
+        """Called when a read timed out; True when a probe should be sent.
+
+        Raises ConnectionError once the connection has been silent too long.
+        """
+        silent = self.silent_for() or 0.0
+        if silent >= self.silence_timeout:
+            raise ConnectionError(f"no data from enabler for {silent:.1f} s")
+        if self.probe_sent is None and silent >= self.probe_interval:
+            self.probe_sent = monotonic()
+            self.probes += 1
+            return True
+        return False
+
+    def timeout(self) -> float:
+        """How long the next read may block before idle() must run."""
+        silent = self.silent_for() or 0.0
+        deadline = self.silence_timeout if self.probe_sent else self.probe_interval
+        return max(0.05, deadline - silent)
+
+    def ready(self) -> bool:
+        silent = self.silent_for()
+        return silent is not None and silent < self.silence_timeout
+
+    def status(self) -> dict:
+        silent = self.silent_for()
+        return {
+            "silent_for": round(silent, 3) if silent is not None else None,
+            "probes": self.probes,
+            "last_probe_rtt": (
+                round(self.last_probe_rtt, 4)
+                if self.last_probe_rtt is not None
+                else None
+            ),
+        }
+
+
+class CircuitBreaker:
+    """Fail fast after repeated enabler failures.
+
+    ``closed``: commands pass; ``failure_threshold`` consecutive failures open
+    the circuit. ``open``: commands are refused with ``CircuitOpen`` for
+    ``reset_timeout`` seconds. ``half_open``: the first command after that is
+    let through as a probe while the rest keep being refused; its success
+    closes the circuit and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 10.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        if self.state == "closed":
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - monotonic())
+
+    def allow(self) -> None:
+        """Raise CircuitOpen unless a command may go to the enabler now."""
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and self.retry_after() <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            wait = self.retry_after() or 1.0
+        raise CircuitOpen(f"IP-Enabler unavailable ({self.state})", wait)
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self._opened_at = monotonic()
+
+    def abandon(self) -> None:
+        """The command allowed through never reached the enabler."""
+        with self._lock:
+            self._probing = False
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+
+class Backoff:
+    """Reconnect delays: first retry immediately, then exponential with jitter.
+
+    Delays grow ``base * factor**n`` up to ``cap``; each one is drawn from the
+    upper half of that window so many bridges don't retry in lockstep.
+    """
+
+    def __init__(self, base: float = 0.5, factor: float = 2.0, cap: float = 30.0):
+        self.base = base
+        self.factor = factor
+        self.cap = cap
+        self.failures = 0
+
+    def next_delay(self) -> float:
+        self.failures += 1
+        if self.failures == 1:
+            return 0.0
+        ceiling = min(self.cap, self.base * self.factor ** (self.failures - 2))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def reset(self) -> None:
+        self.failures = 0
+
+
+class VantageTarget:
+    """One IP-Enabler with its own command pool and listener state."""
+
+    def __init__(
+        self,
+        name: str,
+        ip: str,
+        port: int,
+        masters: Iterable[int] = (),
+        pool_size: int = 2,
+        probe_interval: float = 15.0,
+        silence_timeout: float = 25.0,
+        breaker_failures: int = 3,
+        breaker_reset: float = 10.0,
+        max_queued: int = 16,
+    ):
+        self.name = name
+        self.ip = ip
+        self.port = int(port)
+        self.masters = frozenset(int(m) for m in masters)
+        self.pool = ConnectionPool(self.ip, self.port, pool_size)
+
+        # Event listener state, owned by the listener thread
+        self.event_socket: Optional[socket.socket] = None
+        self.event_socket_connected = False
+        self.event_monitoring_enabled = False
+        self.listener_thread: Optional[threading.Thread] = None
+        self.reconnects = 0
+        # Seconds from losing the listener connection to the next event
+        self.last_time_to_first_event: Optional[float] = None
+        self.liveness = Liveness(probe_interval, silence_timeout)
+        self.silence_timeouts = 0
+
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        # Commands waiting for a pooled connection, capped at max_queued
+        self.max_queued = max_queued
+        self.queued = 0
+        self.shed = 0
+        self._queue_lock = threading.Lock()
+
+    def send(self, payload: bytes, expected: int, timeout: float) -> List[str]:
+        """Write pre-encoded commands and read up to `expected` replies.
+
+        The connection is returned to the pool only if every reply arrived;
+        otherwise a late reply could be mistaken for the next command's.
+        Raises ``Unavailable`` without touching the network while the
+        breaker is open or ``max_queued`` commands are already waiting.
+        Connection errors, and sends that get no reply at all, count as
+        breaker failures. A reused connection found closed before any reply
+        arrived is retried once on a fresh one, so an enabler reboot costs
+        no failed commands.
+        """
+        with self._queue_lock:
+            if self.queued >= self.max_queued:
+                self.shed += 1
+                raise Overloaded(
+                    f"{self.queued} commands already queued for '{self.name}'", 1.0
+                )
+            self.queued += 1
+        try:
+            self.breaker.allow()
+        except CircuitOpen:
+            with self._queue_lock:
+                self.queued -= 1
+            raise
+        try:
+            try:
+                sock, reused = self.pool.acquire(timeout)
+            finally:
+                with self._queue_lock:
+                    self.queued -= 1
+            lines = self._exchange(sock, reused, payload, expected, timeout)
+        except PoolTimeout:
+            self.breaker.abandon()
+            raise
+        except OSError:
+            self.breaker.failure()
+            raise
+        if expected and not lines:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+        return lines
+
+    def _exchange(
+        self,
+        sock: socket.socket,
+        reused: bool,
+        payload: bytes,
+        expected: int,
+        timeout: float,
+    ) -> List[str]:
+        while True:
+            broken = True
+            try:
+                sock.settimeout(timeout)
+                sock.sendall(payload)
+                lines = _read_lines(sock, expected, timeout)
+                broken = len(lines) < expected
+                return lines
+            except OSError as e:
+                # Only a stale idle connection that never answered is safe to
+                # retry; after a timeout or a partial reply it may have acted
+                if (
+                    not reused
+                    or isinstance(e, socket.timeout)
+                    or getattr(e, "received", False)
+                ):
+                    raise
+            finally:
+                self.pool.release(sock, broken=broken)
+            self.pool.stale += 1
+            sock, reused = self.pool.acquire(timeout, fresh=True)
+
+    def reconfigure(self, ip: str, port: int) -> None:
+        """Point the target at a new address; idle connections are dropped."""
+        self.ip, self.port = ip, int(port)
+        self.pool.close()
+        self.pool = ConnectionPool(self.ip, self.port, self.pool.size)
+
+    def ready(self) -> bool:
+        """Listener connected, monitoring on and data seen recently."""
+        return (
+            self.event_socket_connected
+            and self.event_monitoring_enabled
+            and self.liveness.ready()
+        )
+
+    def status(self) -> dict:
+        return {
+            "ip": self.ip,
+            "port": self.port,
+            "masters": sorted(self.masters),
+            "event_listener_connected": self.event_socket_connected,
+            "monitoring_enabled": self.event_monitoring_enabled,
+            "ready": self.ready(),
+            "liveness": self.liveness.status(),
+            "silence_timeouts": self.silence_timeouts,
+            "reconnects": self.reconnects,
+            "last_time_to_first_event": self.last_time_to_first_event,
+            "pool": self.pool.stats(),
+            "breaker": self.breaker.status(),
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "shed": self.shed,
+        }
+
+
+class TargetRegistry:
+    """Named targets plus routing by master number."""
+
+    def __init__(self, targets: Dict[str, VantageTarget], default: str):
+        if default not in targets:
+            raise ValueError(f"default target '{default}' is not defined")
+        self.targets = targets
+        self.default_name = default
+
+    @property
+    def default(self) -> VantageTarget:
+        return self.targets[self.default_name]
+
+    def get(self, name: Optional[str] = None) -> VantageTarget:
+        if name is None:
+            return self.default
+        try:
+            return self.targets[name]
+        except KeyError:
+            raise KeyError(f"unknown target '{name}'") from None
+
+    def for_master(self, master: Optional[int]) -> VantageTarget:
+        if master is not None:
+            for target in self.targets.values():
+                if master in target.masters:
+                    return target
+        return self.default
+
+    def __iter__(self):
+        return iter(self.targets.values())
+
+
+def build_registry(
+    cfg: dict, default_ip: str, default_port: int, pool_size: int = 2, **options
+) -> TargetRegistry:
+    """Build targets from an enablers.json document (or the env defaults).
+
+    Extra keyword ``options`` (``probe_interval``, ``silence_timeout``,
+    ``breaker_failures``, ``breaker_reset``, ``max_queued``) apply to every
+    target.
+    """
+    specs = cfg.get("targets") or {}
+    if not specs:
+        target = VantageTarget(
+            "default", default_ip, default_port, (), pool_size, **options
+        )
+        return TargetRegistry({"default": target}, "default")
+
+    targets = {
+        name: VantageTarget(
+            name,
+            spec.get("ip", default_ip),
+            spec.get("port", default_port),
+            spec.get("masters", ()),
+            spec.get("pool_size", pool_size),
+            **options,
+        )
+        for name, spec in specs.items()
+    }
+    return TargetRegistry(targets, cfg.get("default") or next(iter(targets)))
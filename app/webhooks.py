@@ -0,0 +1,312 @@
+"""Push Vantage events to subscribed HTTP endpoints.
+
+Subscriptions live in ``config/webhooks.json``::
+
+    {
+      "webhooks": {
+        "homeassistant": {
+          "url": "http://homeassistant.local:8123/api/webhook/vantage",
+          "types": ["button", "load_module"],
+          "match": {"station": [23, 24]},
+          "batch_ms": 50,
+          "max_batch": 100,
+          "headers": {"Authorization": "Bearer ..."}
+        }
+      }
+    }
+
+``types`` and ``match`` (event field -> value or list of values) filter what
+an endpoint receives; both are optional. The listener only hands events to
+``WebhookDispatcher.publish()``, which appends them to each matching
+endpoint's bounded queue and returns; when a queue is full its oldest events
+are dropped (``webhook_dropped``) rather than blocking.
+
+Each endpoint has one delivery thread with one keep-alive connection. It
+waits up to ``batch_ms`` after the first queued event (or until ``max_batch``
+are queued) and POSTs them together as ``{"events": [...]}``. Connection
+errors, 429 and 5xx replies are retried with exponential backoff up to
+``retries`` times; other 4xx replies drop the batch at once.
+
+``WebhookDispatcher.load()`` never waits on a delivery thread. Endpoints whose
+configuration is unchanged are kept as they are; a changed endpoint's queued
+events (and a batch it was still retrying) move to its replacement, and a
+stopped endpoint makes no further attempts.
+"""
+
+import http.client
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.metrics import metrics
+from app.targets import Backoff
+
+logger = logging.getLogger("qlink.webhooks")
+
+
+class WebhookError(ValueError):
+    """Raised when a webhook subscription is malformed."""
+
+
+class WebhookEndpoint:
+    """One subscribed URL with its filter, queue and delivery thread."""
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        types: Optional[List[str]] = None,
+        match: Optional[Dict[str, object]] = None,
+        batch_ms: float = 50,
+        max_batch: int = 100,
+        queue_size: int = 1000,
+        retries: int = 5,
+        timeout: float = 5.0,
+        headers: Optional[Dict[str, str]] = None,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        # What the endpoint was built from; reloads keep unchanged endpoints
+        self.config = {k: v for k, v in locals().items() if k not in ("self", "name")}
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise WebhookError(f"webhook '{name}' needs an http(s) url")
+        if max_batch < 1 or queue_size < 1:
+            raise WebhookError(f"webhook '{name}' max_batch/queue_size must be >= 1")
+        self.name = name
+        self.url = url
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.types = set(types) if types else None
+        self.match = {
+            field: set(value) if isinstance(value, list) else {value}
+            for field, value in (match or {}).items()
+        }
+        self.window = batch_ms / 1000
+        self.max_batch = max_batch
+        self.retries = retries
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.backoff = Backoff(base=backoff_base, cap=backoff_max)
+
+        self._queue: Deque[dict] = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+        self._stopped = False
+        # Endpoint that takes over this one's events once it is stopped
+        self._handoff: Optional["WebhookEndpoint"] = None
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._thread: Optional[threading.Thread] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def matches(self, event: dict) -> bool:
+        if self.types is not None and event.get("type") not in self.types:
+            return False
+        return all(event.get(field) in values for field, values in self.match.items())
+
+    def put(self, event: dict) -> None:
+        with self._cond:
+            handoff = self._handoff if self._stopped else None
+            if handoff is None:
+                if len(self._queue) == self._queue.maxlen:
+                    self.dropped += 1
+                    metrics.inc("webhook_dropped", endpoint=self.name)
+                self._queue.append(event)
+                self._cond.notify()
+                return
+        handoff.put(event)
+
+    def adopt(self, events: List[dict]) -> None:
+        """Queue events handed over by the endpoint this one replaces."""
+        for event in events:
+            self.put(event)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name=f"webhook-{self.name}"
+        )
+        self._thread.start()
+
+    def stop(self, handoff: Optional["WebhookEndpoint"] = None) -> None:
+        """Stop delivering without waiting for the thread.
+
+        Queued events go to `handoff` when given (and are discarded
+        otherwise); a request already on the wire is allowed to finish, but
+        no retry follows it.
+        """
+        with self._cond:
+            self._stopped = True
+            self._handoff = handoff
+            pending = list(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        if handoff is not None:
+            handoff.adopt(pending)
+
+    def _next_batch(self) -> List[dict]:
+        with self._cond:
+            while not self._queue and not self._stopped:
+                self._cond.wait()
+            deadline = time.monotonic() + self.window
+            while len(self._queue) < self.max_batch and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._queue), self.max_batch)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        while not self._stopped:
+            batch = self._next_batch()
+            if batch:
+                self._deliver(batch)
+        self._close()
+
+    def _wait(self, delay: float) -> bool:
+        """Sleep `delay` seconds unless stopped first; True when stopped."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._stopped, delay)
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = (
+                http.client.HTTPSConnection
+                if self._https
+                else http.client.HTTPConnection
+            )
+            self._conn = cls(self._host, self._port, timeout=self.timeout)
+        return self._conn
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _post(self, body: bytes) -> int:
+        conn = self._connection()
+        conn.request("POST", self._path, body, self.headers)
+        response = conn.getresponse()
+        response.read()  # drain so the connection can be reused
+        if response.will_close:
+            self._close()
+        return response.status
+
+    def _deliver(self, batch: List[dict]) -> None:
+        body = json.dumps({"events": batch}, separators=(",", ":")).encode()
+        t0 = time.perf_counter()
+        self.backoff.reset()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                if self._wait(self.backoff.next_delay()):
+                    # Stopped while backing off: the successor (if any) retries
+                    if self._handoff is not None:
+                        self._handoff.adopt(batch)
+                    return
+                metrics.inc("webhook_retries", endpoint=self.name)
+            try:
+                status = self._post(body)
+            except (OSError, http.client.HTTPException) as e:
+                self._close()
+                logger.debug(f"Webhook '{self.name}' failed: {e}")
+                continue
+            if status < 300:
+                self.delivered += len(batch)
+                metrics.inc("webhook_events", len(batch), endpoint=self.name)
+                metrics.inc("webhook_batches", endpoint=self.name)
+                metrics.observe(
+                    "webhook_delivery_seconds",
+                    time.perf_counter() - t0,
+                    endpoint=self.name,
+                )
+                return
+            if status != 429 and status < 500:
+                logger.warning(f"Webhook '{self.name}' rejected a batch: {status}")
+                break
+        self.failed += len(batch)
+        metrics.inc("webhook_failed", len(batch), endpoint=self.name)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "url": self.url,
+            "queued": queued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def compile_webhooks(
+    cfg: dict,
+) -> Tuple[Dict[str, WebhookEndpoint], Dict[str, str]]:
+    """Build endpoints from a webhooks.json document; returns (endpoints, errors)."""
+    endpoints: Dict[str, WebhookEndpoint] = {}
+    errors: Dict[str, str] = {}
+    for name, spec in (cfg.get("webhooks") or {}).items():
+        if not isinstance(spec, dict) or spec.get("enabled") is False:
+            continue
+        spec = {key: value for key, value in spec.items() if key != "enabled"}
+        try:
+            endpoints[name] = WebhookEndpoint(name, **spec)
+        except TypeError as e:
+            errors[name] = f"webhook '{name}': {e}"
+        except WebhookError as e:
+            errors[name] = str(e)
+    return endpoints, errors
+
+
+class WebhookDispatcher:
+    """Fans events out to every endpoint whose filter matches."""
+
+    def __init__(self):
+        self._endpoints: Dict[str, WebhookEndpoint] = {}
+
+    def load(self, endpoints: Dict[str, WebhookEndpoint]) -> None:
+        """Replace the subscriptions without waiting on delivery threads.
+
+        An endpoint whose configuration did not change keeps running (with
+        its queue and counters); a changed one hands its queued events to
+        its replacement; removed ones are stopped.
+        """
+        old = self._endpoints
+        current: Dict[str, WebhookEndpoint] = {}
+        replaced: List[Tuple[WebhookEndpoint, WebhookEndpoint]] = []
+        for name, endpoint in endpoints.items():
+            previous = old.get(name)
+            if previous is not None and previous.config == endpoint.config:
+                current[name] = previous
+                continue
+            endpoint.start()
+            current[name] = endpoint
+            if previous is not None:
+                replaced.append((previous, endpoint))
+        self._endpoints = current
+        for previous, endpoint in replaced:
+            previous.stop(handoff=endpoint)
+        for name, previous in old.items():
+            if name not in current:
+                previous.stop()
+
+    def publish(self, event: dict) -> int:
+        """Queue `event` for matching endpoints; never blocks on delivery."""
+        queued = 0
+        for endpoint in self._endpoints.values():
+            if endpoint.matches(event):
+                endpoint.put(event)
+                queued += 1
+        return queued
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: ep.stats() for name, ep in self._endpoints.items()}
+
+    def stop(self) -> None:
+        self.load({})
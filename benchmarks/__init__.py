@@ -0,0 +1 @@
+"""Microbenchmarks for the bridge hot paths (see ``bench_bridge``)."""
@@ -0,0 +1,235 @@
+"""Microbenchmarks for the bridge hot paths, checked against a baseline.
+
+Usage (from the repository root):
+  python -m benchmarks.bench_bridge                # compare with baseline.json
+  python -m benchmarks.bench_bridge --update       # record a new baseline
+  python -m benchmarks.bench_bridge --only parse   # subset by name prefix
+
+Each benchmark reports the best time per operation (ns/op) over several
+repeats. A benchmark whose time exceeds its baseline by more than
+``--threshold`` (default 1.5x) is a regression and the run exits with status 1.
+Baselines are machine-specific: record one on the machine that runs the
+comparison (the Pi, CI) before relying on the result.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+
+from app import bridge
+from app.scenes import compile_scene
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+
+# name -> factory returning run(n), which performs the operation n times
+BENCHMARKS: Dict[str, Callable[[], Callable[[int], None]]] = {}
+
+
+def benchmark(name: str):
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+
+    return register
+
+
+EVENT_LINES = [
+    "SW 1 23 5 1 0182024",
+    "SW 1 23 5 0 0182024",
+    "LO 2 2 2 5 60",
+    "LS 1 23 4 100",
+    "LE 1 23 3F 00",
+    "LC 1 23 1 2",
+]
+
+
+@benchmark("parse_vantage_event")
+def bench_parse():
+    lines = EVENT_LINES
+
+    def run(n):
+        parse = bridge.parse_vantage_event
+        for i in range(n):
+            parse(lines[i % 6])
+
+    return run
+
+
+@benchmark("split_lines")
+def bench_split_lines():
+    # One recv() worth of events, ending mid-line as real reads do
+    chunk = "\r".join(EVENT_LINES * 10) + "\rSW 1 2"
+
+    def run(n):
+        split = bridge.split_lines
+        for _ in range(n):
+            split(chunk)
+
+    return run
+
+
+@benchmark("config_response")
+def bench_config():
+    def run(n):
+        for _ in range(n):
+            JSONResponse(content=bridge.get_config()).body
+
+    return run
+
+
+@benchmark("encode_command")
+def bench_encode_command():
+    def run(n):
+        encode = bridge.encode_command
+        for i in range(n):
+            encode(f"VLO@ {100 + i % 200} {i % 101}")
+
+    return run
+
+
+@benchmark("compile_scene")
+def bench_compile_scene():
+    spec = {
+        "fade": 2.0,
+        "loads": [{"id": 100 + i, "level": i * 5, "fade": i % 3} for i in range(20)],
+    }
+    known = set(range(100, 120))
+
+    def run(n):
+        for _ in range(n):
+            compile_scene("bench", spec, "\r", known)
+
+    return run
+
+
+class _FakeWebSocket:
+    """Stands in for a websocket that accepts pre-encoded frames."""
+
+    def __init__(self):
+        self.received = 0
+
+    async def send_text(self, data):
+        self.received += 1
+
+
+@benchmark("broadcast_10_clients")
+def bench_broadcast():
+    """Listener hand-off plus fan-out of one event to 10 websocket clients."""
+    event = bridge.parse_vantage_event(EVENT_LINES[0])
+
+    def run(n):
+        async def main():
+            clients = [_FakeWebSocket() for _ in range(10)]
+            saved = (bridge._event_loop, bridge._event_queue)
+            bridge._event_loop = asyncio.get_running_loop()
+            bridge._event_queue = asyncio.Queue()
+            for client in clients:
+                bridge.add_websocket_client(client, "json")
+            task = asyncio.create_task(bridge._broadcast_events())
+            try:
+                for _ in range(n):
+                    bridge.broadcast_event_sync(event)
+                while clients[-1].received < n:
+                    await asyncio.sleep(0)
+            finally:
+                task.cancel()
+                for client in clients:
+                    bridge.drop_websocket_client(client)
+                bridge._event_loop, bridge._event_queue = saved
+
+        asyncio.run(main())
+
+    return run
+
+
+def measure(run: Callable[[int], None], min_time: float, repeat: int) -> float:
+    """Best ns/op over `repeat` runs, each sized to last about `min_time`."""
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        run(n)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time / 10:
+            break
+        n *= 10
+    n = max(1, int(n * min_time / max(elapsed, 1e-9)))
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run(n)
+        best = min(best, (time.perf_counter() - t0) / n)
+    return best * 1e9
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float):
+    rows = []
+    for name, ns in results.items():
+        base = baseline.get(name)
+        ratio = ns / base if base else None
+        rows.append(
+            {
+                "name": name,
+                "ns_per_op": round(ns, 1),
+                "baseline_ns_per_op": base,
+                "ratio": round(ratio, 3) if ratio else None,
+                "regressed": bool(ratio and ratio > threshold),
+            }
+        )
+    return rows
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--threshold", type=float, default=1.5)
+    p.add_argument("--update", action="store_true", help="write a new baseline")
+    p.add_argument("--only", help="run benchmarks whose name starts with this")
+    p.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    p.add_argument("--repeat", type=int, default=5)
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    names: List[str] = [
+        name for name in BENCHMARKS if not args.only or name.startswith(args.only)
+    ]
+    results = {}
+    for name in names:
+        results[name] = measure(BENCHMARKS[name](), args.min_time, args.repeat)
+        print(f"{name:<24} {results[name]:>12.1f} ns/op", file=sys.stderr)
+
+    if args.update:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f).get("benchmarks", {})
+        baseline.update({name: round(ns, 1) for name, ns in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump({"unit": "ns/op", "benchmarks": baseline}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("benchmarks", {})
+    rows = compare(results, baseline, args.threshold)
+    print(json.dumps({"threshold": args.threshold, "results": rows}, indent=2))
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print("Regressed: " + ", ".join(regressed), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""End-to-end event latency and fan-out benchmark for ``/events``.
+
+Runs the mock IP-Enabler in this process and the bridge under uvicorn in a
+subprocess pointed at it, attaches K websocket clients to ``/events`` and
+injects ``SW`` lines at a fixed rate. Each line carries a sequence number in
+its serial field, so every client can time the delivery from the moment the
+mock wrote the line to the moment the JSON event arrived, and count the events
+it never got.
+
+For every (clients, rate) point of the sweep the JSON report lists per-client
+latency percentiles and drops plus the aggregate over all clients, so a
+regression in ``event_listener_loop`` or the broadcast path shows up as
+numbers.
+
+Examples:
+  python scripts/bench_events.py
+  python scripts/bench_events.py --clients 1,10,50 --rates 10,100,500 \\
+      --events 1000 --baud 9600 --output events.json
+
+Clients run on one event loop in this process; at large K their own decoding
+adds to the measured latency, which is the same for every build compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from typing import Dict, List
+
+import websockets
+
+from loadgen import percentile
+from mock_vantage import MockConfig, MockEnabler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_bridge(mock_port: int, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        VANTAGE_IP="127.0.0.1",
+        VANTAGE_PORT=str(mock_port),
+        QLINK_HUB="",
+    )
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.bridge:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_monitoring(base: str, timeout: float = 20.0) -> None:
+    """Block until the bridge's listener has monitoring confirmed."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base + "/monitor/status", timeout=2) as r:
+                if json.load(r).get("monitoring_enabled"):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("bridge did not enable monitoring in time")
+
+
+class Sweep:
+    """Injects one run's events and collects what each client received."""
+
+    def __init__(self, mock: MockEnabler, run: int, events: int, rate: float):
+        self.mock = mock
+        self.run = run
+        self.events = events
+        self.rate = rate
+        self.sent: Dict[int, float] = {}
+
+    def serial(self, seq: int) -> int:
+        # Run number in the high digits so stragglers from a previous run
+        # are never counted in this one
+        return self.run * 10_000_000 + seq
+
+    def inject(self) -> None:
+        start = time.perf_counter()
+        for seq in range(self.events):
+            delay = start + seq / self.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.sent[seq] = time.perf_counter()
+            self.mock.inject(f"SW 1 {1 + seq % 50} {1 + seq % 8} 1 {self.serial(seq)}")
+
+
+async def client(url: str, sweep: Sweep, ready: asyncio.Event, done: asyncio.Event):
+    latencies: List[float] = []
+    seen = set()
+    out_of_order = 0
+    last = -1
+    async with websockets.connect(url, max_queue=None) as ws:
+        # The status message is sent after the server registered this client
+        await ws.recv()
+        ready.set()
+        while not done.is_set():
+            try:
+                message = await asyncio.wait_for(ws.recv(), 0.2)
+            except asyncio.TimeoutError:
+                continue
+            now = time.perf_counter()
+            event = json.loads(message)
+            try:
+                serial = int(event.get("serial") or -1)
+            except ValueError:
+                continue
+            run, seq = divmod(serial, 10_000_000)
+            if run != sweep.run or seq in seen or seq not in sweep.sent:
+                continue
+            seen.add(seq)
+            latencies.append((now - sweep.sent[seq]) * 1000)
+            if seq < last:
+                out_of_order += 1
+            last = max(last, seq)
+            if len(seen) == sweep.events:
+                break
+    return latencies, out_of_order
+
+
+def summarize(latencies: List[float], expected: int) -> dict:
+    values = sorted(latencies)
+    return {
+        "received": len(values),
+        "dropped": expected - len(values),
+        "latency_ms": {
+            "p50": _round(percentile(values, 50)),
+            "p95": _round(percentile(values, 95)),
+            "p99": _round(percentile(values, 99)),
+            "max": _round(values[-1] if values else None),
+        },
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+async def run_point(url, mock, run, clients, rate, events, drain) -> dict:
+    sweep = Sweep(mock, run, events, rate)
+    done = asyncio.Event()
+    readies = [asyncio.Event() for _ in range(clients)]
+    tasks = [asyncio.create_task(client(url, sweep, ready, done)) for ready in readies]
+    await asyncio.gather(*(r.wait() for r in readies))
+
+    injector = threading.Thread(target=sweep.inject, daemon=True)
+    injector.start()
+    await asyncio.get_running_loop().run_in_executor(None, injector.join)
+    await asyncio.wait(tasks, timeout=drain)
+    done.set()
+    results = await asyncio.gather(*tasks)
+
+    per_client = []
+    everything: List[float] = []
+    for latencies, out_of_order in results:
+        summary = summarize(latencies, events)
+        summary["out_of_order"] = out_of_order
+        per_client.append(summary)
+        everything.extend(latencies)
+    aggregate = summarize(everything, events * clients)
+    aggregate["clients_complete"] = sum(1 for c in per_client if not c["dropped"])
+    return {
+        "clients": clients,
+        "rate": rate,
+        "events": events,
+        "aggregate": aggregate,
+        "per_client": per_client,
+    }
+
+
+async def sweep_all(args, mock) -> List[dict]:
+    url = f"ws://127.0.0.1:{args.port}/events"
+    points = []
+    run = 0
+    for k in args.clients:
+        for rate in args.rates:
+            run += 1
+            point = await run_point(url, mock, run, k, rate, args.events, args.drain)
+            agg = point["aggregate"]
+            print(
+                f"clients={k:<4} rate={rate:<6g} p50={agg['latency_ms']['p50']}ms "
+                f"p99={agg['latency_ms']['p99']}ms dropped={agg['dropped']}",
+                file=sys.stderr,
+            )
+            points.append(point)
+    return points
+
+
+def parse_list(kind):
+    return lambda text: [kind(x) for x in text.split(",")]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--clients", type=parse_list(int), default=[1, 10, 50])
+    p.add_argument("--rates", type=parse_list(float), default=[10.0, 100.0])
+    p.add_argument("--events", type=int, default=200, help="events per point")
+    p.add_argument("--drain", type=float, default=5.0, help="seconds to wait")
+    p.add_argument("--baud", type=int, default=0, help="mock serial bus rate")
+    p.add_argument("--port", type=int, default=0, help="bridge port (0=any)")
+    p.add_argument("--output", help="write the JSON report here as well")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    mock = MockEnabler(MockConfig(baud=args.baud))
+    _, mock_port = mock.run_in_thread()
+    args.port = args.port or free_port()
+    bridge = start_bridge(mock_port, args.port)
+    try:
+        wait_monitoring(f"http://127.0.0.1:{args.port}")
+        points = asyncio.run(sweep_all(args, mock))
+    finally:
+        bridge.terminate()
+        bridge.wait(10)
+
+    report = {"baud": args.baud, "points": points}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
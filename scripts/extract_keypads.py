@@ -1,6 +1,7 @@
 import sys
 from pathlib import Path
-from PyPDF2 import PdfReader
+
+from pdf_pages import iter_page_texts
 
 pdf_path = Path(__file__).resolve().parents[1] / "Info" / "list of keypads.pdf"
 
@@ -8,14 +9,9 @@ if not pdf_path.exists():
     print("PDF not found at", pdf_path)
     sys.exit(2)
 
-reader = PdfReader(str(pdf_path))
 out = []
-for i, page in enumerate(reader.pages):
-    try:
-        text = page.extract_text()
-    except Exception as e:
-        text = f"<<error extracting page {i}: {e}>>"
-    out.append(f"--- page {i+1} ---")
-    out.append(text or "")
+for number, text in iter_page_texts(pdf_path):
+    out.append(f"--- page {number} ---")
+    out.append(text)
 
 print("\n".join(out))
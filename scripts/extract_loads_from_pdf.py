@@ -3,18 +3,15 @@
 
 import json
 import re
-from PyPDF2 import PdfReader
+
+from pdf_pages import iter_page_texts
 
 
 def extract_loads_from_pdf(pdf_path):
     """Extract room and load information from the PDF."""
 
-    reader = PdfReader(pdf_path)
-    text = ""
-
-    # Extract all text from PDF
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
+    # Extract all text from PDF (cached per page, see pdf_pages.py)
+    text = "".join(page + "\n" for _, page in iter_page_texts(pdf_path))
 
     print("=" * 60)
     print("PDF CONTENT EXTRACTED")
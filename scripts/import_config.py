@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Import the Vantage exports into config/ in one command.
+
+Replaces running extract_buttons.py, parse_loads_pdf.py, parse_keypads.py and
+auto_fix_keypads.py by hand. The same parsers run as stages of a small DAG:
+
+    project_index  (Info/Home Prado Ver.txt) ──┬──► schedule ──┐
+    schedule_text  (Info/LoadL.pdf) ───────────┘               ├──► loads_json
+    keypad_text    (Info/list of keypads.pdf) ──► keypads ─────┘
+
+Each stage's output is cached under ``.cache/import/`` keyed by a hash of its
+source files and of its dependencies' keys, so a run only re-processes the
+stages whose inputs changed (and the ones downstream of them). Stages whose
+dependencies are done run in parallel on a thread pool; PDF pages are
+additionally extracted on a process pool by pdf_pages.
+
+config/project_index.json and config/loads.json are written atomically, and
+only when their content changed. loads.json carries both layouts the bridge
+reads: ``rooms`` from the load schedule and the ``station_M_N`` keypad records
+from the project file.
+
+Usage:
+  python scripts/import_config.py
+  python scripts/import_config.py --force       # ignore the stage cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from auto_fix_keypads import fix_keypad_rows
+from parse_keypads import parse_keypad_text
+from parse_loads_pdf import group_rooms, index_addresses, iter_page_loads
+from pdf_pages import PROJECT_ROOT, iter_page_texts
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.project_index import (  # noqa: E402
+    compile_project,
+    file_hash,
+    merge_loads_json,
+    read_index,
+    station_buttons,
+    write_index,
+)
+
+CACHE_DIR = PROJECT_ROOT / ".cache" / "import"
+LOADS_JSON = PROJECT_ROOT / "config" / "loads.json"
+PROJECT_INDEX = PROJECT_ROOT / "config" / "project_index.json"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the import.
+
+    ``run(files, deps)`` gets the absolute paths of ``files`` and the outputs
+    of ``deps`` by name, and returns a JSON-serializable output. An
+    ``optional`` stage whose files are missing outputs None instead of
+    failing. Bump ``version`` when ``run`` changes what it produces.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Path], Dict[str, Any]], Any]
+    files: Tuple[str, ...] = ()
+    deps: Tuple[str, ...] = ()
+    optional: bool = False
+    version: int = 1
+
+
+class Result(NamedTuple):
+    key: str
+    output: Any
+    status: str  # "built", "cached" or "skipped"
+    seconds: float
+
+
+def _page_texts(files, deps):
+    (path,) = files.values()
+    return [text for _, text in iter_page_texts(path)]
+
+
+def _project(files, deps):
+    return compile_project(str(files["Info/Home Prado Ver.txt"]))
+
+
+def _schedule(files, deps):
+    pages = enumerate(deps["schedule_text"], 1)
+    return list(iter_page_loads(pages, index_addresses(deps["project_index"])))
+
+
+def _keypads(files, deps):
+    if deps["keypad_text"] is None:
+        return None
+    rows, _ = parse_keypad_text("\n".join(deps["keypad_text"]))
+    fixed, _, _ = fix_keypad_rows(rows)
+    return fixed
+
+
+def _loads_json(files, deps):
+    index = deps["project_index"]
+    keypads = {row["vantage"]: row for row in deps["keypads"] or [] if row["vantage"]}
+    stations = station_buttons(index)
+    for record in stations.values():
+        station = index["stations"][f"{record['master']}:{record['station']}"]
+        record["room"], record["floor"] = station["room"], station["floor"]
+        keypad = keypads.get(record["name"])
+        if keypad:
+            record["location"], record["gang"] = keypad["name"], keypad["gang"]
+    return {"rooms": group_rooms(deps["schedule"]), **stations}
+
+
+STAGES = [
+    Stage("project_index", _project, files=("Info/Home Prado Ver.txt",)),
+    Stage("schedule_text", _page_texts, files=("Info/LoadL.pdf",)),
+    Stage(
+        "keypad_text",
+        _page_texts,
+        files=("Info/list of keypads.pdf",),
+        optional=True,
+    ),
+    Stage("schedule", _schedule, deps=("project_index", "schedule_text")),
+    Stage("keypads", _keypads, deps=("keypad_text",)),
+    Stage(
+        "loads_json",
+        _loads_json,
+        deps=("project_index", "schedule", "keypads"),
+        version=2,
+    ),
+]
+
+
+def _stage_key(stage: Stage, hashes: Iterable[str], deps: Dict[str, Result]) -> str:
+    parts = [stage.name, stage.version, list(hashes), [deps[d].key for d in stage.deps]]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def _write_json(path: Path, data, **kwargs) -> bool:
+    """Write `data` atomically; returns False when the file already matched."""
+    text = json.dumps(data, **kwargs)
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    return True
+
+
+def run_stage(
+    stage: Stage, root: Path, cache_dir: Path, deps: Dict[str, Result], force: bool
+) -> Result:
+    start = time.perf_counter()
+    files = {name: root / name for name in stage.files}
+    if stage.optional and not all(path.exists() for path in files.values()):
+        key = _stage_key(stage, ["missing"], deps)
+        return Result(key, None, "skipped", time.perf_counter() - start)
+
+    key = _stage_key(stage, (file_hash(str(p)) for p in files.values()), deps)
+    cached = cache_dir / f"{stage.name}-{key[:16]}.json"
+    if not force and cached.exists():
+        output = json.loads(cached.read_text(encoding="utf-8"))
+        return Result(key, output, "cached", time.perf_counter() - start)
+
+    output = stage.run(files, {name: deps[name].output for name in stage.deps})
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    _write_json(cached, output, separators=(",", ":"))
+    for old in cache_dir.glob(f"{stage.name}-*.json"):
+        if old != cached:
+            old.unlink()
+    return Result(key, output, "built", time.perf_counter() - start)
+
+
+def run_pipeline(
+    stages: List[Stage],
+    root: Path = PROJECT_ROOT,
+    cache_dir: Path = CACHE_DIR,
+    workers: int = 4,
+    force: bool = False,
+) -> Dict[str, Result]:
+    """Run every stage once its dependencies are done; returns results by name."""
+    pending = {stage.name: stage for stage in stages}
+    unknown = {d for s in stages for d in s.deps} - set(pending)
+    if unknown:
+        raise ValueError(f"unknown stage dependencies: {sorted(unknown)}")
+
+    results: Dict[str, Result] = {}
+    running = {}
+    with ThreadPoolExecutor(workers) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(d in results for d in stage.deps):
+                    deps = {d: results[d] for d in stage.deps}
+                    future = pool.submit(
+                        run_stage, stage, Path(root), Path(cache_dir), deps, force
+                    )
+                    running[future] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"dependency cycle between {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--force", action="store_true", help="ignore the stage cache")
+    p.add_argument("--workers", type=int, default=4, help="stages run at once")
+    p.add_argument("--output", type=Path, default=LOADS_JSON)
+    p.add_argument("--index-output", type=Path, default=PROJECT_INDEX)
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = run_pipeline(STAGES, workers=args.workers, force=args.force)
+    for stage in STAGES:
+        result = results[stage.name]
+        print(f"{stage.name:<14} {result.status:<8} {result.seconds:7.3f}s")
+
+    index = results["project_index"].output
+    stored = read_index(str(args.index_output))
+    if stored is None or stored.get("source_hash") != index["source_hash"]:
+        write_index(index, str(args.index_output))
+        print(f"Wrote {args.index_output}")
+
+    try:
+        existing = json.loads(args.output.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        existing = {}
+    # Keep any sections of loads.json this import doesn't generate
+    loads = merge_loads_json(existing, results["loads_json"].output)
+    if _write_json(args.output, loads, indent=2):
+        print(f"Wrote {args.output}")
+    else:
+        print(f"{args.output} is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""Concurrent HTTP load generator for the QLink bridge.
+
+Drives a bridge with a weighted mix of operations and prints a JSON report
+with latency percentiles, throughput and error rates per operation, so bridge
+builds can be compared against the mock IP-Enabler before deploying to the Pi.
+
+Operations (``--mix`` weights):
+  set     POST /device/{id}/set with a random level
+  status  GET  /load/{id}/status
+  button  POST /button/{station}/{button}
+  raw     GET  /send/{cmd}
+
+Modes:
+  closed loop (default)  N clients, each sends its next request as soon as the
+                         previous one finishes
+  open loop (--rate R)   requests are scheduled at a fixed arrival rate and
+                         latency is measured from the scheduled time, so a
+                         slow bridge shows up as queueing instead of fewer
+                         requests
+
+Usage examples (PowerShell):
+  # start mock server (in one terminal)
+  python .\\scripts\\mock_vantage.py --host 127.0.0.1 --port 2323 --baud 9600
+
+  # point the bridge at the mock and start it (in another terminal)
+  $env:VANTAGE_IP = '127.0.0.1'; $env:VANTAGE_PORT = '2323'
+  python -m uvicorn app.bridge:app --host 127.0.0.1 --port 8000
+
+  # 8 clients for 30 s with a 5 s ramp-up
+  python .\\scripts\\loadgen.py --clients 8 --duration 30 --ramp-up 5
+
+  # open loop at 50 req/s, mostly status reads, report to a file
+  python .\\scripts\\loadgen.py --rate 50 --mix status=8,set=2 --output run.json
+"""
+import argparse
+import http.client
+import json
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote, urlsplit
+
+OPERATIONS = ("set", "status", "button", "raw")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}'")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_buttons(text: str) -> List[Tuple[int, int]]:
+    return [tuple(int(x) for x in item.split(":")) for item in text.split(",")]
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.4999)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def arrival_times(
+    rate: float, ramp_up: float, duration: float, limit: int = 0
+) -> Iterator[float]:
+    """Open-loop arrival offsets (seconds from start).
+
+    The rate ramps linearly from 0 to `rate` over `ramp_up`, then stays at
+    `rate` until `ramp_up + duration`; `limit` caps the count (0 = none).
+    """
+    sent = 0
+    steady = 0
+    total = ramp_up + duration
+    while not limit or sent < limit:
+        # Arrival times for a linearly increasing rate r(t) = rate*t/ramp
+        t = (2 * (sent + 1) * ramp_up / rate) ** 0.5
+        if not ramp_up or t > ramp_up:
+            steady += 1
+            t = ramp_up + steady / rate
+        if t >= total:
+            return
+        yield t
+        sent += 1
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, int] = defaultdict(int)
+
+    def record(self, op: str, latency_ms: float, status: Union[int, str]):
+        """`status` is the HTTP status, or "timeout"/"error" when none came."""
+        with self.lock:
+            self.latencies[op].append(latency_ms)
+            self.statuses[str(status)] += 1
+            if isinstance(status, str) or status >= 400:
+                self.errors[op] += 1
+
+    def report(self, elapsed: float, config: dict) -> dict:
+        def summary(values: List[float], errors: int) -> dict:
+            values = sorted(values)
+            n = len(values)
+            return {
+                "requests": n,
+                "errors": errors,
+                "error_rate": round(errors / n, 4) if n else 0.0,
+                "throughput_rps": round(n / elapsed, 2) if elapsed else 0.0,
+                "latency_ms": {
+                    "mean": round(sum(values) / n, 2) if n else None,
+                    "p50": _round(percentile(values, 50)),
+                    "p95": _round(percentile(values, 95)),
+                    "p99": _round(percentile(values, 99)),
+                    "max": _round(values[-1] if values else None),
+                },
+            }
+
+        with self.lock:
+            everything = [v for values in self.latencies.values() for v in values]
+            return {
+                "config": config,
+                "elapsed_s": round(elapsed, 3),
+                "overall": summary(everything, sum(self.errors.values())),
+                "operations": {
+                    op: summary(values, self.errors[op])
+                    for op, values in sorted(self.latencies.items())
+                },
+                "status_codes": dict(self.statuses),
+            }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+class Client:
+    """One keep-alive HTTP connection issuing bridge operations."""
+
+    def __init__(self, base_url: str, args, rng: random.Random):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.args = args
+        self.rng = rng
+        self.conn: Optional[http.client.HTTPConnection] = None
+        # The connection has served a response, so the bridge may close it
+        self.reused = False
+
+    def request(self, op: str) -> Union[int, str]:
+        """Issue one operation; returns the HTTP status, "timeout" or "error".
+
+        Only a request that could not be written to a kept-alive connection,
+        or a GET whose kept-alive connection was closed before any reply, is
+        sent again on a new connection; a POST that may have reached the
+        bridge never is, and timeouts are never retried.
+        """
+        method, path, body = self._build(op)
+        headers = {"Content-Type": "application/json"} if body else {}
+        while True:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.args.timeout
+                )
+                self.reused = False
+            stale = self.reused
+            sent = False
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                sent = True
+                response = self.conn.getresponse()
+                response.read()
+                self.reused = True
+                return response.status
+            except socket.timeout:
+                self._close()
+                return "timeout"
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ):
+                self._close()
+                if stale and (not sent or method == "GET"):
+                    continue
+                return "error"
+            except (OSError, http.client.HTTPException):
+                self._close()
+                return "error"
+
+    def _close(self) -> None:
+        self.conn.close()
+        self.conn = None
+
+    def _build(self, op: str):
+        rng, args = self.rng, self.args
+        if op == "set":
+            load = rng.choice(args.loads)
+            body = json.dumps({"level": rng.randint(0, 100)})
+            return "POST", f"/device/{load}/set", body
+        if op == "status":
+            return "GET", f"/load/{rng.choice(args.loads)}/status", None
+        if op == "button":
+            station, button = rng.choice(args.buttons)
+            return "POST", f"/button/{station}/{button}", None
+        return "GET", "/send/" + quote(rng.choice(args.raw), safe=""), None
+
+
+def pick(mix: Dict[str, float], rng: random.Random) -> str:
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def run_closed(args, recorder: Recorder) -> float:
+    start = time.perf_counter()
+    end = start + args.ramp_up + args.duration
+    budget = [args.requests] if args.requests else None
+    lock = threading.Lock()
+
+    def worker(i: int):
+        rng = random.Random(args.seed + i)
+        client = Client(args.bridge, args, rng)
+        # Spread client start times evenly over the ramp-up period
+        time.sleep(args.ramp_up * i / args.clients)
+        while time.perf_counter() < end:
+            if budget is not None:
+                with lock:
+                    if budget[0] <= 0:
+                        return
+                    budget[0] -= 1
+            op = pick(args.mix, rng)
+            t0 = time.perf_counter()
+            status = client.request(op)
+            recorder.record(op, (time.perf_counter() - t0) * 1000, status)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), daemon=True)
+        for i in range(args.clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def run_open(args, recorder: Recorder) -> float:
+    """Fixed arrival rate; ramps linearly from 0 to --rate over --ramp-up."""
+    start = time.perf_counter()
+    work: "queue.Queue" = queue.Queue()
+    rng = random.Random(args.seed)
+
+    def worker(i: int):
+        client = Client(args.bridge, args, random.Random(args.seed + i + 1))
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            op, scheduled = item
+            status = client.request(op)
+            # Measured from the scheduled arrival: includes time spent queued
+            recorder.record(op, (time.perf_counter() - scheduled) * 1000, status)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), daemon=True)
+        for i in range(args.clients)
+    ]
+    for t in threads:
+        t.start()
+
+    for t in arrival_times(args.rate, args.ramp_up, args.duration, args.requests):
+        scheduled = start + t
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        work.put((pick(args.mix, rng), scheduled))
+
+    for _ in threads:
+        work.put(None)
+    for th in threads:
+        th.join()
+    return time.perf_counter() - start
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Concurrent HTTP load generator for the QLink bridge"
+    )
+    p.add_argument("--bridge", default="http://127.0.0.1:8000", help="Bridge base URL")
+    p.add_argument("--clients", type=int, default=4, help="concurrent clients")
+    p.add_argument("--duration", type=float, default=10.0, help="seconds at full load")
+    p.add_argument("--ramp-up", type=float, default=0.0, help="seconds to full load")
+    p.add_argument(
+        "--rate", type=float, help="open loop: requests per second (default closed)"
+    )
+    p.add_argument("--requests", type=int, default=0, help="stop after N requests")
+    p.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("set=4,status=4,button=1,raw=1"),
+        help="operation weights, e.g. set=4,status=4,button=1,raw=1",
+    )
+    p.add_argument(
+        "--loads",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=[101, 127, 250],
+        help="load ids for set/status",
+    )
+    p.add_argument(
+        "--buttons",
+        type=parse_buttons,
+        default=parse_buttons("23:5,23:8"),
+        help="station:button pairs for button presses",
+    )
+    p.add_argument("--raw", action="append", help="raw command for /send (repeatable)")
+    p.add_argument("--timeout", type=float, default=10.0)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--output", help="write the JSON report here as well")
+    args = p.parse_args(argv)
+    args.raw = args.raw or ["VGL@ 101"]
+    if args.rate is not None and args.rate <= 0:
+        p.error("--rate must be positive")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    recorder = Recorder()
+    runner = run_open if args.rate else run_closed
+    elapsed = runner(args, recorder)
+    config = {
+        "bridge": args.bridge,
+        "mode": "open" if args.rate else "closed",
+        "clients": args.clients,
+        "rate": args.rate,
+        "duration_s": args.duration,
+        "ramp_up_s": args.ramp_up,
+        "mix": args.mix,
+    }
+    report = recorder.report(elapsed, config)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return 0 if report["overall"]["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,80 +1,304 @@
 #!/usr/bin/env python3
-"""Simple mock Vantage IP-Enabler TCP server for local testing.
+"""Mock Vantage IP-Enabler for local and load testing.
 
-Usage: python scripts/mock_vantage.py [--host HOST] [--port PORT]
+Usage: python scripts/mock_vantage.py [--host HOST] [--port PORT] [options]
 
-This server accepts simple ASCII commands and returns canned responses for
-testing the bridge. It supports VLO (write) and VGL (read) style commands.
+An asyncio server that behaves like the IP-Enabler closely enough to load-test
+the bridge:
+
+- persistent sessions: any number of CR/CRLF-terminated commands per
+  connection, pipelined or not
+- VLO / VGL / VSW plus the monitoring switches VOS / VOL / VOD, with the
+  ``!`` (no response), ``@`` (regular) and ``#`` (detailed) modifiers
+- SW / LO / LE event streams, sent only to sessions that enabled them, both
+  as a result of commands and as background traffic at configurable rates
+- a shared serial bus (``--baud``) that every response and event must cross,
+  plus per-command latency/jitter and randomly dropped connections
+
+Examples:
+  python scripts/mock_vantage.py --port 2323
+  python scripts/mock_vantage.py --port 2323 --baud 9600 --latency 20 \\
+      --jitter 10 --sw-rate 2 --lo-rate 5 --drop-interval 60
 """
 import argparse
-import socket
+import asyncio
+import random
 import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
 
 
-RESP_OK = "OK"
+@dataclass
+class MockConfig:
+    baud: int = 0  # 0 = unlimited bus bandwidth
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    drop_prob: float = 0.0  # chance that any one command kills its session
+    drop_interval: float = 0.0  # mean seconds between random session drops
+    sw_rate: float = 0.0  # background events per second
+    lo_rate: float = 0.0
+    le_rate: float = 0.0
+    masters: int = 2
+    stations: int = 50
 
 
-def handle_client(conn, addr, devices):
-    with conn:
-        data = b""
-        try:
-            data = conn.recv(4096)
-        except Exception:
-            return
-        if not data:
-            return
-        text = data.decode("ascii", errors="ignore").strip()
-        # Strip CR/CRLF
-        text = text.rstrip("\r\n")
-        parts = text.split()
-        if not parts:
-            conn.sendall(b"\r")
-            return
-        cmd = parts[0].upper()
-        if cmd == "VLO" and len(parts) >= 3:
-            # VLO <id> <level> [fade]
-            try:
-                dev = int(parts[1])
-                lvl = int(parts[2])
-                devices[dev] = lvl
-                resp = f"VLO {dev} {lvl}"
-            except Exception:
-                resp = "ERR"
-            conn.sendall((resp + "\r").encode("ascii"))
-            return
-        if cmd == "VGL" and len(parts) >= 2:
+class Session:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.sw = False
+        self.sw_serial = False
+        self.lo = False
+        self.led = False
+
+
+def load_address(load: int):
+    """Module address (master, enclosure, module, load) for a contractor number.
+
+    Four-digit numbers whose digits are valid positions are read digit by digit
+    (2225 -> 2-2-2-5); anything else is spread deterministically over the bus.
+    """
+    digits = str(load)
+    if len(digits) == 4 and "0" not in digits and "9" not in digits:
+        return tuple(int(d) for d in digits)
+    return (1 + load % 2, 1 + (load // 2) % 4, 1 + (load // 8) % 4, 1 + load % 8)
+
+
+class MockEnabler:
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.levels: Dict[int, int] = {}
+        self.sessions: Set[Session] = set()
+        self.commands = 0
+        self.events = 0
+        self.dropped = 0
+        self._bus: Optional[asyncio.Lock] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ----- lifecycle -----
+    async def start(self, host: str = "127.0.0.1", port: int = 2323):
+        self.loop = asyncio.get_running_loop()
+        self._bus = asyncio.Lock()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        cfg = self.config
+        for kind, rate in (
+            ("SW", cfg.sw_rate),
+            ("LO", cfg.lo_rate),
+            ("LE", cfg.le_rate),
+        ):
+            if rate > 0:
+                self._tasks.append(asyncio.create_task(self._generate(kind, rate)))
+        if cfg.drop_interval > 0:
+            self._tasks.append(asyncio.create_task(self._random_drops()))
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for session in list(self.sessions):
+            session.writer.close()
+
+    def run_in_thread(self, host: str = "127.0.0.1", port: int = 0):
+        """Start the mock on a background event loop; returns (host, port)."""
+        ready = threading.Event()
+        address = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            address.extend(loop.run_until_complete(self.start(host, port)))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True, name="MockVantage").start()
+        ready.wait()
+        return tuple(address)
+
+    # ----- event injection -----
+    def inject(self, line: str):
+        """Thread-safe: send a raw event line to every monitoring session."""
+        asyncio.run_coroutine_threadsafe(self.emit(line), self.loop)
+
+    async def emit(self, line: str):
+        kind = line[:2]
+        for session in list(self.sessions):
+            wanted = (
+                session.sw
+                if kind == "SW"
+                else session.lo if kind in ("LO", "LS", "LV") else session.led
+            )
+            if wanted:
+                await self._write(session, line)
+        self.events += 1
+
+    # ----- bus model -----
+    async def _write(self, session: Session, line: str):
+        data = (line + "\r").encode("ascii")
+        async with self._bus:
+            if self.config.baud:
+                # 8N1 framing: 10 bits on the wire per byte
+                await asyncio.sleep(len(data) * 10 / self.config.baud)
             try:
-                dev = int(parts[1])
-                lvl = devices.get(dev, 0)
-                resp = f"VGL {dev} {lvl}"
+                session.writer.write(data)
             except Exception:
-                resp = "ERR"
-            conn.sendall((resp + "\r").encode("ascii"))
-            return
-        # default echo
-        conn.sendall((RESP_OK + "\r").encode("ascii"))
-
-
-def run_server(host: str, port: int):
-    devices = {}
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.bind((host, port))
-    sock.listen(5)
-    print(f"Mock Vantage listening on {host}:{port}")
-    try:
+                return
+        try:
+            await session.writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _delay(self):
+        cfg = self.config
+        delay = cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    # ----- sessions -----
+    async def _handle(self, reader, writer):
+        session = Session(writer)
+        self.sessions.add(session)
+        try:
+            while True:
+                try:
+                    raw = await reader.readuntil(b"\r")
+                except asyncio.IncompleteReadError:
+                    return
+                text = raw.decode("ascii", errors="ignore").strip()
+                if not text:
+                    continue
+                self.commands += 1
+                if self.config.drop_prob and random.random() < self.config.drop_prob:
+                    self.dropped += 1
+                    writer.transport.abort()
+                    return
+                await self._delay()
+                reply = await self._execute(session, text)
+                if reply is not None:
+                    await self._write(session, reply)
+        except (ConnectionError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    async def _execute(self, session: Session, text: str) -> Optional[str]:
+        parts = text.split()
+        head = parts[0].upper()
+        name, modifier = head[:3], head[3:] or "@"
+        args = parts[1:]
+        try:
+            regular, detailed, events = self._command(session, name, args)
+        except (IndexError, ValueError):
+            regular = detailed = "ERR"
+            events = []
+        for event in events:
+            await self.emit(event)
+        if modifier == "!":
+            return None
+        return detailed if modifier == "#" else regular
+
+    def _command(self, session: Session, name: str, args):
+        if name == "VLO":
+            load, level = int(args[0]), max(0, min(100, int(args[1])))
+            fade = f" {args[2]}" if len(args) > 2 else ""
+            self.levels[load] = level
+            m, e, mod, ld = load_address(load)
+            event = f"LO {m} {e} {mod} {ld} {level}"
+            return str(level), f"RLO {load} {level}{fade}", [event]
+        if name == "VGL":
+            load = int(args[0])
+            level = self.levels.get(load, 0)
+            return str(level), f"RGL {load} {level}", []
+        if name == "VSW":
+            master, station, button, state = (int(x) for x in args[:4])
+            presses = {4: ["1"], 5: ["0"], 6: ["1", "0"]}.get(state, [])
+            events = [self._sw(master, station, button, p) for p in presses]
+            return str(state), f"RSW {master} {station} {button} {state}", events
+        if name == "VOS":
+            session.sw_serial = args[0] == "1"
+            session.sw = args[-1] == "1"
+            return f"ROS {' '.join(args)}", f"ROS {' '.join(args)}", []
+        if name == "VOL":
+            session.lo = args[0] == "1"
+            return f"ROL {args[0]}", f"ROL {args[0]}", []
+        if name == "VOD":
+            session.led = args[0] != "0"
+            return f"ROD {args[0]}", f"ROD {args[0]}", []
+        raise ValueError(name)
+
+    def _sw(self, master, station, button, state) -> str:
+        return f"SW {master} {station} {button} {state} 0182024"
+
+    # ----- background traffic -----
+    async def _generate(self, kind: str, rate: float):
+        cfg = self.config
         while True:
-            conn, addr = sock.accept()
-            t = threading.Thread(target=handle_client, args=(conn, addr, devices))
-            t.daemon = True
-            t.start()
-    finally:
-        sock.close()
+            await asyncio.sleep(random.expovariate(rate))
+            master = random.randint(1, cfg.masters)
+            station = random.randint(1, cfg.stations)
+            if kind == "SW":
+                line = self._sw(master, station, random.randint(1, 8), 1)
+            elif kind == "LO":
+                line = "LO {} {} {} {} {}".format(
+                    master,
+                    random.randint(1, 4),
+                    random.randint(1, 4),
+                    random.randint(1, 8),
+                    random.choice((0, 20, 60, 100)),
+                )
+            else:
+                line = f"LE {master} {station} {random.randint(0, 255):02X} 00"
+            await self.emit(line)
 
+    async def _random_drops(self):
+        while True:
+            await asyncio.sleep(random.expovariate(1 / self.config.drop_interval))
+            if self.sessions:
+                victim = random.choice(list(self.sessions))
+                self.dropped += 1
+                victim.writer.transport.abort()
 
-if __name__ == "__main__":
-    p = argparse.ArgumentParser()
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
     p.add_argument("--host", default="127.0.0.1")
     p.add_argument("--port", type=int, default=2323)
-    args = p.parse_args()
-    run_server(args.host, args.port)
+    p.add_argument("--baud", type=int, default=0, help="serial bus rate (0=off)")
+    p.add_argument("--latency", type=float, default=0.0, help="ms per command")
+    p.add_argument("--jitter", type=float, default=0.0, help="+/- ms per command")
+    p.add_argument("--drop-prob", type=float, default=0.0)
+    p.add_argument("--drop-interval", type=float, default=0.0)
+    p.add_argument("--sw-rate", type=float, default=0.0, help="SW events/s")
+    p.add_argument("--lo-rate", type=float, default=0.0, help="LO events/s")
+    p.add_argument("--le-rate", type=float, default=0.0, help="LE events/s")
+    return p.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    mock = MockEnabler(
+        MockConfig(
+            baud=args.baud,
+            latency_ms=args.latency,
+            jitter_ms=args.jitter,
+            drop_prob=args.drop_prob,
+            drop_interval=args.drop_interval,
+            sw_rate=args.sw_rate,
+            lo_rate=args.lo_rate,
+            le_rate=args.le_rate,
+        )
+    )
+    host, port = await mock.start(args.host, args.port)
+    print(f"Mock Vantage listening on {host}:{port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
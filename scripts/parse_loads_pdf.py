@@ -1,73 +1,146 @@
 #!/usr/bin/env python3
-"""Parse LoadL.pdf with proper structure recognition"""
+"""Parse LoadL.pdf with proper structure recognition
+
+Pages come from pdf_pages.iter_page_texts (cached per page, extracted in
+parallel) and loads are parsed as each page arrives. A load record is anchored
+on its "<floor> <power> <type> <M-E-Mod-L>" columns, which survive the PDF's
+text extraction even when the name and room columns run together; records may
+continue onto the next page.
+
+When config/project_index.json exists (scripts/extract_buttons.py) the
+contractor number, name and room come from the project file's Load: record with
+the same address, which is exact where the PDF text is not. Without it, a
+record whose number, name and room sit on one line is split into name and room
+the way the original line parser did (``LINE``); others get room "Unknown".
+"""
 
 import json
+import os
 import re
-from PyPDF2 import PdfReader
+import sys
 from collections import defaultdict
-
-
-def parse_loads_pdf(pdf_path):
-    """Parse the Vantage load schedule PDF."""
-
-    reader = PdfReader(pdf_path)
-    text = "".join(page.extract_text() for page in reader.pages)
-    lines = text.split("\n")
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from pdf_pages import PROJECT_ROOT, iter_page_texts
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.project_index import merge_loads_json  # noqa: E402
+
+FLOORS = ["1st Floor", "2nd Floor", "Exterior", "Equipment"]
+
+# Extraction sometimes splits words ("Exte rior"), so floors match loosely
+_FLOOR = "|".join(r"\s?".join(map(re.escape, f.replace(" ", ""))) for f in FLOORS)
+_FLOOR_NAMES = {f.replace(" ", ""): f for f in FLOORS}
+
+RECORD = re.compile(
+    r"(?P<head>.*?)"
+    r"(?P<floor>" + _FLOOR + r")\s*"
+    r"(?P<power>\d+)\s+(?P<fixture>[A-Za-z.]+(?: [A-Z]{2})?)\s+"
+    r"(?P<address>\d+-\d+-\d+-\d+)(?:\(\d+-\d+-\d+\))?"
+    r"\s*Module\s*\d*\s*(?:Yes|No)?",
+    re.S,
+)
+HEADER = re.compile(r"\A.*?toVacation\s*", re.S)
+FOOTER = re.compile(r"Page \d+ of \d+ Load Schedul.*?htm\s?l", re.S)
+CONTRACTOR = re.compile(r"(?m)^(\d{3})(.*)")
+# The original line-based parser: "<id> <name> <room> <floor> <power> <type>"
+LINE = re.compile(
+    r"^(\d+)\s+(.+?)\s+(.*?)\s+(" + "|".join(FLOORS) + r")\s+(\d+)\s+(\w+)"
+)
+
+
+def load_addresses(index_path: Path) -> Dict[str, dict]:
+    """'M-E-Mod-L' -> Load: record from the compiled project index, if any."""
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return index_addresses(index)
+
+
+def index_addresses(index: dict) -> Dict[str, dict]:
+    """'M-E-Mod-L' -> Load: record of a compiled project index."""
+    return {
+        "-".join(str(x) for x in load["address"]): load
+        for load in index.get("loads", {}).values()
+        if "address" in load
+    }
+
+
+def classify(name: str, fixture: str) -> str:
+    if fixture.lower().startswith("motor"):
+        return "motor"
+    if fixture.endswith("ND") or any(x in name.lower() for x in ("switch", "relay")):
+        return "switch"
+    return "dimmer"
+
+
+def _record(match, known: Dict[str, dict]) -> Optional[dict]:
+    fields = match.groupdict()
+    floor = _FLOOR_NAMES["".join(fields["floor"].split())]
+    project = known.get(fields["address"])
+    # The contractor number starts the last line of the head that begins with
+    # one; anything before it is spill-over from the previous record
+    heads = CONTRACTOR.findall(fields["head"])
+    if project:
+        load_id, name, room = project["contractor"], project["name"], project["room"]
+    elif heads:
+        load_id = int(heads[-1][0])
+        rest = fields["head"][fields["head"].rfind(heads[-1][0]) + 3 :].strip()
+        name, room = " ".join(rest.split()), None
+        line = "\n" not in rest and LINE.match(
+            f"{load_id} {rest} {floor} {fields['power']} {fields['fixture']}"
+        )
+        if line:
+            name, room = line.group(2), line.group(3) or None
+    else:
+        return None
+    return {
+        "id": load_id,
+        "name": name,
+        "room": room or "Unknown",
+        "type": classify(name, fields["fixture"]),
+        "fixture": fields["fixture"],
+        "floor": floor,
+        "power": int(fields["power"]),
+        "address": fields["address"],
+    }
+
+
+def iter_page_loads(
+    pages: Iterable[Tuple[int, str]], known: Dict[str, dict]
+) -> Iterator[dict]:
+    """Yield loads from (page number, text) pairs, in schedule order."""
+    pending = ""
+    for number, text in pages:
+        if number == 1:
+            text = HEADER.sub("", text, count=1)
+        pending += FOOTER.sub("\n", text)
+        end = 0
+        for match in RECORD.finditer(pending):
+            end = match.end()
+            load = _record(match, known)
+            if load:
+                yield load
+        pending = pending[end:]
+
+
+def iter_loads(pdf_path, index_path: Optional[Path] = None) -> Iterator[dict]:
+    """Yield loads in schedule order as their pages are extracted."""
+    known = load_addresses(index_path or PROJECT_ROOT / "config/project_index.json")
+    yield from iter_page_loads(iter_page_texts(pdf_path), known)
+
+
+def group_rooms(loads: Iterable[dict]) -> list:
+    """Group loads into the ``rooms`` layout of loads.json, ordered by floor."""
 
     # Group loads by room
     room_loads = defaultdict(list)
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-
-        # Look for load entries: starts with number, has room name, floor, power, type
-        # Format: "NUMBER NAME Room Floor POWER Type Address"
-        match = re.match(
-            r"^(\d+)\s+(.+?)\s+(.*?)\s+(1st Floor|2nd Floor|Exterior|Equipment)\s+(\d+)\s+(\w+)",
-            line,
-        )
-
-        if match:
-            load_id = int(match.group(1))
-            load_name = match.group(2).strip()
-            room_floor = match.group(3).strip()
-            floor = match.group(4)
-            power = match.group(5)
-            load_type_raw = match.group(6)
-
-            # Clean up room name - remove extra spaces and line breaks
-            room = room_floor.replace("\n", " ").strip()
-
-            # If room is empty, it might be on the previous line
-            if not room and i > 0:
-                prev_line = lines[i - 1].strip()
-                # Check if previous line looks like a room name
-                if prev_line and not prev_line[0].isdigit():
-                    room = prev_line
-
-            # Determine load type (dimmer vs switch)
-            load_type = (
-                "switch"
-                if "switch" in load_name.lower() or "relay" in load_name.lower()
-                else "dimmer"
-            )
-
-            # Skip motor/fan loads for now (can add back if needed)
-            if load_type_raw.lower() in ["motor"]:
-                load_type = "motor"
-
-            room_loads[room].append(
-                {
-                    "id": load_id,
-                    "name": load_name,
-                    "type": load_type,
-                    "floor": floor,
-                    "power": int(power),
-                }
-            )
-
-        i += 1
+    for load in loads:
+        load = dict(load)
+        room_loads[load.pop("room")].append(load)
 
     # Convert to rooms structure, organized by floor
     rooms_by_floor = defaultdict(list)
@@ -83,12 +156,17 @@ def parse_loads_pdf(pdf_path):
 
     # Create final structure with floors organized
     all_rooms = []
-    for floor in ["1st Floor", "2nd Floor", "Exterior", "Equipment"]:
+    for floor in FLOORS:
         all_rooms.extend(rooms_by_floor.get(floor, []))
 
     return all_rooms
 
 
+def parse_loads_pdf(pdf_path):
+    """Parse the Vantage load schedule PDF."""
+    return group_rooms(iter_loads(pdf_path))
+
+
 if __name__ == "__main__":
     pdf_path = "Info/LoadL.pdf"
 
@@ -116,11 +194,16 @@ if __name__ == "__main__":
     if len(rooms) > 10:
         print(f"\n... and {len(rooms) - 10} more rooms")
 
-    # Save to JSON
-    config = {"rooms": rooms}
+    # Save to JSON, keeping the station sections scripts/extract_buttons.py wrote
     output_path = "config/loads.json"
-
-    with open(output_path, "w") as f:
-        json.dump(config, f, indent=2)
+    try:
+        with open(output_path, encoding="utf-8") as f:
+            existing = json.load(f)
+    except (OSError, ValueError):
+        existing = {}
+    tmp = f"{output_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(merge_loads_json(existing, {"rooms": rooms}), f, indent=2)
+    os.replace(tmp, output_path)
 
     print(f"\n✅ Saved to {output_path}")
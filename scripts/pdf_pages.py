@@ -0,0 +1,99 @@
+"""Cached, parallel page text extraction for the Vantage report PDFs.
+
+Text is cached per page under ``.cache/pdf/<content hash>/``, so re-reading an
+unchanged PDF never touches PyPDF2, and an updated PDF (new hash) is extracted
+again with its pages spread over a process pool. Pages are yielded in order as
+soon as they are available, so parsers can stream records while later pages
+are still being extracted.
+
+    for number, text in iter_page_texts("Info/LoadL.pdf"):
+        ...
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = PROJECT_ROOT / ".cache" / "pdf"
+
+_reader = None  # one PdfReader per worker process
+
+
+def pdf_hash(pdf_path) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _open(pdf_path):
+    from PyPDF2 import PdfReader
+
+    return PdfReader(str(pdf_path))
+
+
+def _init_worker(pdf_path) -> None:
+    global _reader
+    _reader = _open(pdf_path)
+
+
+def _extract(page: int, reader=None) -> str:
+    return (reader or _reader).pages[page].extract_text() or ""
+
+
+def _write(path: Path, text: str) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def iter_page_texts(
+    pdf_path, workers: Optional[int] = None, cache_dir: Path = CACHE_DIR
+) -> Iterator[Tuple[int, str]]:
+    """Yield (page number from 1, text) for every page, in page order."""
+    cache = Path(cache_dir) / pdf_hash(pdf_path)[:16]
+    cache.mkdir(parents=True, exist_ok=True)
+    meta = cache / "meta.json"
+    reader = None
+    if meta.exists():
+        pages = json.loads(meta.read_text())["pages"]
+    else:
+        reader = _open(pdf_path)
+        pages = len(reader.pages)
+        _write(meta, json.dumps({"pages": pages}))
+
+    def cached(page: int) -> Path:
+        return cache / f"{page + 1:04d}.txt"
+
+    missing = [page for page in range(pages) if not cached(page).exists()]
+    workers = min(workers or os.cpu_count() or 1, len(missing))
+    pool = None
+    futures = {}
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(pdf_path,)
+        )
+        futures = {page: pool.submit(_extract, page) for page in missing}
+    elif missing and reader is None:
+        reader = _open(pdf_path)
+
+    try:
+        for page in range(pages):
+            path = cached(page)
+            if page in futures:
+                text = futures[page].result()
+                _write(path, text)
+            elif page in missing:
+                text = _extract(page, reader)
+                _write(path, text)
+            else:
+                text = path.read_text(encoding="utf-8")
+            yield page + 1, text
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
@@ -9,6 +9,9 @@ echo "Starting Qlink Bridge..."
 cd ~/qlink-bridge
 source venv/bin/activate
 
+# Build the precompressed UI once, before uvicorn starts
+python -m app.assets
+
 # Start uvicorn in background
 nohup uvicorn app.bridge:app --host 0.0.0.0 --port 8000 > ~/qlink-bridge.log 2>&1 &
 
@@ -44,6 +44,8 @@ Environment=VANTAGE_PORT=$VANTAGE_PORT
 Environment=Q_LINK_EOL=${Q_LINK_EOL:-}
 Environment=QLINK_TIMEOUT=${QLINK_TIMEOUT:-}
 Environment=LOG_FILE=/var/log/qlink-bridge.log
+# Build the precompressed UI once, before any worker starts
+ExecStartPre=$REMOTE_DIR/.venv/bin/python -m app.assets
 ExecStart=$REMOTE_DIR/.venv/bin/uvicorn app.bridge:app --host 0.0.0.0 --port 8000
 Restart=always
 RestartSec=2
@@ -1,7 +1,12 @@
 import json
+import os
+
 from fastapi.testclient import TestClient
 
-from app.bridge import app, qlink_send
+import app.bridge as bridge
+from app.bridge import app
+from app.scenes import compile_scene
+from app.targets import TargetRegistry, VantageTarget
 
 
 client = TestClient(app)
@@ -16,7 +21,7 @@ def test_about():
 
 def test_send_raw(monkeypatch):
     # Stub qlink_send to avoid network
-    monkeypatch.setattr("app.bridge.qlink_send", lambda cmd: "OK")
+    monkeypatch.setattr("app.bridge.qlink_send", lambda cmd, **kwargs: "OK")
     r = client.get("/send/TESTCMD")
     assert r.status_code == 200
     data = r.json()
@@ -43,14 +48,111 @@ def test_config_endpoint():
     r = client.get("/config")
     assert r.status_code == 200
     data = r.json()
-    assert data["name"] == "qlink-bridge"
-    assert "version" in data
-    assert "timeout" in data
+    assert {"ip", "port", "fade", "rooms"} <= set(data)
+    assert isinstance(data["rooms"], list)
 
 
-def test_manifest_endpoint():
-    r = client.get("/manifest")
-    assert r.status_code == 200
+def test_config_rooms_reloaded_only_on_change(tmp_path, monkeypatch):
+    path = tmp_path / "loads.json"
+    path.write_text(json.dumps({"rooms": [{"name": "Den", "loads": []}]}))
+    monkeypatch.setattr("app.bridge._find_config_file", lambda name: str(path))
+    reads = []
+    real = bridge._load_config_json
+    monkeypatch.setattr(
+        "app.bridge._load_config_json", lambda name: reads.append(name) or real(name)
+    )
+    assert client.get("/config").json()["rooms"][0]["name"] == "Den"
+    assert client.get("/config").json()["rooms"][0]["name"] == "Den"
+    assert reads == ["loads.json"]
+
+    path.write_text(json.dumps({"rooms": [{"name": "Bar", "loads": []}]}))
+    os.utime(path, (1, 1))
+    assert client.get("/config").json()["rooms"][0]["name"] == "Bar"
+
+
+def test_http_error_is_structured():
+    r = client.get("/load/1/status", params={"target": "nope"})
+    assert r.status_code == 404
     data = r.json()
-    assert data["name"] == "qlink-bridge"
-    assert "endpoints" in data and isinstance(data["endpoints"], list)
+    assert data == {
+        "ok": False,
+        "error": "Not Found",
+        "detail": "unknown target 'nope'",
+    }
+
+
+def test_open_breaker_returns_503(monkeypatch):
+    import socket
+
+    from app.targets import build_registry
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()  # nothing listens: connects are refused
+    registry = build_registry({}, "127.0.0.1", port, breaker_failures=1)
+    monkeypatch.setattr("app.bridge.targets", registry)
+
+    assert client.get("/send/VGL@ 101").status_code == 502
+    r = client.get("/send/VGL@ 101")
+    assert r.status_code == 503 and r.headers["Retry-After"] == "10"
+    assert r.json()["ok"] is False
+    status = client.get("/monitor/status").json()
+    assert status["targets"]["default"]["breaker"]["state"] == "open"
+    gauges = client.get("/metrics").json()
+    assert 2 in [v for k, v in gauges["gauges"].items() if "breaker_state" in k]
+
+
+def test_press_button_master(monkeypatch):
+    index = {"stations": {"1:13": {}, "2:13": {}, "2:63": {}}}
+    monkeypatch.setattr("app.bridge.get_project_index", lambda: index)
+    sent = []
+    monkeypatch.setattr(
+        "app.bridge.qlink_send", lambda cmd, **kw: sent.append(cmd) or "R:V 0"
+    )
+    client.post("/button/13/5")  # on both masters: master 1, as before
+    client.post("/button/13/5", params={"master": 2})
+    client.post("/button/63/1")  # only on master 2
+    assert sent == ["VSW@ 1 13 5 4", "VSW@ 2 13 5 4", "VSW@ 2 63 1 4"]
+
+
+def test_load_commands_go_to_the_enabler_of_their_master(monkeypatch):
+    registry = TargetRegistry(
+        {
+            "main": VantageTarget("main", "127.0.0.1", 9, masters=[1, 2]),
+            "guest": VantageTarget("guest", "127.0.0.1", 9, masters=[3]),
+        },
+        "main",
+    )
+    monkeypatch.setattr(bridge, "targets", registry)
+    monkeypatch.setattr(bridge, "get_project_index", lambda: {})
+    monkeypatch.setitem(bridge._project_cache, "masters", {101: 1, 301: 3})
+    monkeypatch.setitem(bridge._project_cache, "presets", [])
+    monkeypatch.setattr(bridge, "load_state", bridge.LoadStateStore())
+    sent = []
+    monkeypatch.setattr(
+        bridge, "qlink_send", lambda cmd, target=None, **kw: sent.append(target) or "0"
+    )
+    bursts = []
+
+    def fake_burst(payload, expected, timeout=None, target=None):
+        bursts.append((payload.decode().split(), target))
+        return ["R"] * expected
+
+    monkeypatch.setattr(bridge, "qlink_send_burst", fake_burst)
+
+    client.post("/device/301/set", json={"level": 10})
+    client.get("/load/301/status")
+    client.post("/device/101/set", json={"level": 10})
+    client.post("/device/301/set?target=main", json={"level": 20})
+    assert sent == ["guest", "guest", "main", "main"]
+
+    client.post("/loads/set", json={"loads": {"101": 50, "301": 50}})
+    assert sorted(target for _, target in bursts) == ["guest", "main"]
+
+    bursts.clear()
+    loads = [{"id": 101, "level": 0}, {"id": 301, "level": 0}]
+    scene = compile_scene("mix", {"loads": loads}, "\r", {101, 301})
+    monkeypatch.setattr(bridge, "get_scenes", lambda: ({"mix": scene}, {}))
+    assert client.post("/scene/mix").json()["complete"]
+    assert sorted(target for _, target in bursts) == ["guest", "main"]
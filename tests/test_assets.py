@@ -0,0 +1,120 @@
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+
+from app import assets, bridge
+
+PAGE = (
+    "<html><head><style>body { color: red; }</style></head>"
+    '<body><script src="/ui/live.js"></script>'
+    "<script>console.log('" + "x" * 300 + "');</script></body></html>"
+)
+
+
+def test_build_extracts_hashed_assets(tmp_path):
+    src, out = tmp_path / "static", tmp_path / "build"
+    src.mkdir()
+    (src / "page.html").write_text(PAGE)
+    (src / "live.js").write_text("const QlinkLive = {};")
+
+    manifest = assets.build_assets(src, out)
+    js = manifest["assets"]["page.js"]
+    assert js in manifest["immutable"] and js.startswith("page.")
+    html = (out / "page.html").read_text()
+    assert f'<script src="/ui/{js}"></script>' in html and "<style>" not in html
+    # References to other files point at their hashed copies
+    live = manifest["assets"]["live.js"]
+    assert live.startswith("live.") and f'src="/ui/{live}"' in html
+    assert (
+        gzip.decompress((out / f"{js}.gz").read_bytes())
+        .decode()
+        .startswith("console.log")
+    )
+
+    # Unchanged sources are not rebuilt; changed ones replace stale files
+    assert assets.ensure_built(src, out) == manifest
+    (src / "page.html").write_text(PAGE.replace("red", "blue"))
+    rebuilt = assets.ensure_built(src, out)
+    assert rebuilt["assets"]["page.css"] != manifest["assets"]["page.css"]
+    assert not (out / manifest["assets"]["page.css"]).exists()
+
+
+def test_snapshot_escapes_script_end():
+    html = assets.inject_snapshot("<head></head>", {"name": "</script>"})
+    snapshot = html[html.index("=") + 1 : html.index(";</script>")]
+    assert "</script>" not in snapshot and json.loads(snapshot)["name"] == "</script>"
+
+
+def test_home_page_embeds_snapshot():
+    client = TestClient(bridge.app)
+    bridge.load_state.update(101, 60)
+    r = client.get("/ui/home.html", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200 and r.headers["cache-control"] == "no-cache"
+    assert r.headers["content-encoding"] == "gzip"
+    snapshot = r.text.split("window.QLINK_SNAPSHOT=", 1)[1].split(";</script>")[0]
+    data = json.loads(snapshot)
+    assert "rooms" in data["config"] and data["loads"]["101"]["level"] == 60
+
+    # Unchanged snapshot: same ETag, compressed once, and revalidates to 304
+    etag = r.headers["etag"]
+    compressed = assets._gzip_cache[etag]
+    again = client.get("/ui/home.html", headers={"Accept-Encoding": "gzip"})
+    assert again.headers["etag"] == etag and assets._gzip_cache[etag] is compressed
+    r = client.get("/ui/home.html", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    bridge.load_state.update(101, 61)
+    r = client.get("/ui/home.html", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+
+
+def test_concurrent_builds_do_not_clobber(tmp_path):
+    src, out = tmp_path / "static", tmp_path / "build"
+    src.mkdir()
+    (src / "page.html").write_text(PAGE)
+    (src / "live.js").write_text("const QlinkLive = {};")
+
+    with ThreadPoolExecutor(4) as pool:
+        manifests = list(pool.map(lambda _: assets.ensure_built(src, out), range(8)))
+    assert all(m == manifests[0] for m in manifests)
+    assert assets.current_manifest(src, out) == manifests[0]
+    assert not list(out.rglob("*.tmp"))
+    for name in manifests[0]["assets"].values():
+        assert (out / name).is_file()
+
+
+def test_mounting_the_ui_never_builds(tmp_path, monkeypatch):
+    src, out = tmp_path / "static", tmp_path / "build"
+    src.mkdir()
+    (src / "page.html").write_text(PAGE)
+    monkeypatch.setattr(bridge, "static_dir", str(src))
+    monkeypatch.setattr(bridge, "ui_build_dir", str(out))
+    monkeypatch.setattr(bridge.app.router, "routes", list(bridge.app.routes))
+    assert bridge._mount_ui() == str(src) and not out.exists()
+
+    assets.build_assets(src, out)
+    assert bridge._mount_ui() == str(out)
+
+
+def test_hashed_assets_are_precompressed_and_immutable(tmp_path):
+    out = tmp_path / "build"
+    manifest = assets.build_assets(bridge.static_dir, out)
+    app = Starlette()
+    app.mount(
+        "/ui",
+        assets.PrecompressedStaticFiles(
+            directory=out, html=True, immutable=manifest["immutable"]
+        ),
+    )
+    client = TestClient(app)
+    url = "/ui/" + manifest["assets"]["home.js"]
+    r = client.get(url, headers={"Accept-Encoding": "br, gzip"})
+    assert r.status_code == 200 and "immutable" in r.headers["cache-control"]
+    assert r.headers["content-encoding"] in ("br", "gzip")
+    assert r.headers["content-type"].startswith(("text/javascript", "application/"))
+
+    r = client.get("/ui/settings.html", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["cache-control"] == "no-cache"
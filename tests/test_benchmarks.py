@@ -0,0 +1,15 @@
+from benchmarks.bench_bridge import BENCHMARKS, compare
+
+
+def test_benchmarks_run():
+    # One iteration each, so the suite keeps working as the code changes
+    for name, factory in BENCHMARKS.items():
+        factory()(1)
+
+
+def test_compare_flags_regressions():
+    rows = compare({"a": 150.0, "b": 100.0, "c": 10.0}, {"a": 100.0, "b": 100.0}, 1.3)
+    by_name = {row["name"]: row for row in rows}
+    assert by_name["a"]["regressed"] and by_name["a"]["ratio"] == 1.5
+    assert not by_name["b"]["regressed"]
+    assert by_name["c"]["ratio"] is None and not by_name["c"]["regressed"]
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import app.bridge as bridge
+from app.eventcodec import TYPE_CODES, compact, encode_event, event_schema
+
+
+def test_compact_event_layout():
+    event = bridge.parse_vantage_event("SW 1 23 5 1 0182024")
+    event["target"] = "main"
+    row = compact(event)
+    assert row[0] == TYPE_CODES["button"] and row[2] == "main"
+    assert row[3:] == [1, 23, 5, 1, "0182024"]
+    assert abs(row[1] / 1000 - time.time()) < 60
+    fields = event_schema()["types"][row[0]][1:]
+    assert dict(zip(fields, row[3:]))["station"] == 23
+    # Much smaller than the full dict
+    assert len(encode_event(event, "compact")) * 2 < len(encode_event(event, "json"))
+
+
+def test_msgpack_encodes_the_compact_array():
+    msgpack = pytest.importorskip("msgpack")
+    event = bridge.parse_vantage_event("LO 2 1 1 1 75")
+    assert msgpack.unpackb(encode_event(event, "msgpack")) == compact(event)
+
+
+class _Client:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, data):
+        self.frames.append(data)
+
+    async def send_bytes(self, data):
+        self.frames.append(data)
+
+
+def test_each_encoding_is_serialized_once(monkeypatch):
+    encoded = []
+
+    def counting_encode(event, encoding):
+        encoded.append(encoding)
+        return encode_event(event, encoding)
+
+    monkeypatch.setattr(bridge, "encode_event", counting_encode)
+    clients = {_Client(): "json", _Client(): "json", _Client(): "compact"}
+    event = bridge.parse_vantage_event("LS 1 23 2 40")
+
+    async def main():
+        monkeypatch.setattr(bridge, "_event_loop", asyncio.get_running_loop())
+        monkeypatch.setattr(bridge, "_event_queue", asyncio.Queue())
+        monkeypatch.setattr(bridge, "websocket_clients", {})
+        monkeypatch.setattr(bridge, "_outboxes", {})
+        for client, encoding in clients.items():
+            bridge.add_websocket_client(client, encoding)
+        task = asyncio.create_task(bridge._broadcast_events())
+        bridge.broadcast_event_sync(event)
+        while not all(client.frames for client in clients):
+            await asyncio.sleep(0)
+        task.cancel()
+        for client in clients:
+            bridge.drop_websocket_client(client)
+
+    asyncio.run(main())
+    assert sorted(encoded) == ["compact", "json"]
+    first, second, third = (client.frames[0] for client in clients)
+    assert first is second and json.loads(first)["type"] == "load_station"
+    assert json.loads(third)[0] == TYPE_CODES["load_station"]
+
+
+class _StalledClient(_Client):
+    async def send_text(self, data):
+        await asyncio.Event().wait()  # never completes
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+def test_slow_client_is_dropped_without_delaying_others(monkeypatch):
+    fast, slow = _Client(), _StalledClient()
+    event = bridge.parse_vantage_event("LS 1 23 2 40")
+
+    async def main():
+        monkeypatch.setattr(bridge, "QLINK_WS_QUEUE", 2)
+        monkeypatch.setattr(bridge, "_event_loop", asyncio.get_running_loop())
+        monkeypatch.setattr(bridge, "_event_queue", asyncio.Queue())
+        monkeypatch.setattr(bridge, "websocket_clients", {})
+        monkeypatch.setattr(bridge, "_outboxes", {})
+        bridge.add_websocket_client(fast, "json")
+        bridge.add_websocket_client(slow, "json")
+        task = asyncio.create_task(bridge._broadcast_events())
+        for _ in range(5):
+            bridge.broadcast_event_sync(event)
+        while len(fast.frames) < 5:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        assert list(bridge.websocket_clients) == [fast]
+        bridge.drop_websocket_client(fast)
+
+    asyncio.run(asyncio.wait_for(main(), 5))
+    assert slow.closed == 1013
+
+
+def test_events_socket_negotiates_format():
+    client = TestClient(bridge.app)
+    with client.websocket_connect("/events?format=compact") as ws:
+        status = json.loads(ws.receive_text())
+        assert status[0] == TYPE_CODES["status"] and len(status) == 5
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/events?format=xml") as ws:
+            ws.receive_text()
+    assert closed.value.code == 1003
+    assert "compact" in client.get("/events/schema").json()["encodings"]
@@ -0,0 +1,131 @@
+import socket
+import threading
+
+import pytest
+
+from app.hub import EventFanout, HubClient, HubError, HubServer
+
+
+def test_fanout_drops_oldest_for_slow_subscriber():
+    fanout = EventFanout()
+    sub = fanout.subscribe(maxlen=2)
+    for i in range(3):
+        fanout.publish(i)
+    assert sub.dropped == 1
+    assert [sub.get(0), sub.get(0), sub.get(0)] == [1, 2, None]
+
+
+@pytest.fixture
+def hub(tmp_path):
+    fanout = EventFanout()
+
+    def handle(request):
+        if request["op"] == "send":
+            return {"ok": True, "resp": request["cmd"].split()[-1]}
+        return {"ok": False, "status": 504, "detail": "timeout"}
+
+    server = HubServer(str(tmp_path / "hub.sock"), fanout, handle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, fanout
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_requests_and_errors(hub):
+    server, _ = hub
+    client = HubClient(server.server_address)
+    assert client.send("VGL@ 42", 1.0, None) == "42"
+    assert client.send("VGL@ 43", 1.0, None) == "43"
+    with pytest.raises(HubError) as info:
+        client.request({"op": "burst"})
+    assert info.value.status == 504
+
+
+def test_stale_connection_is_resent_but_late_reply_is_not(tmp_path):
+    calls = []
+
+    def handle(request):
+        calls.append(request["cmd"])
+        if request["cmd"] == "slow":
+            threading.Event().wait(0.5)
+        return {"ok": True, "resp": request["cmd"]}
+
+    server = HubServer(str(tmp_path / "hub.sock"), EventFanout(), handle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = HubClient(server.server_address, timeout=0.2)
+    try:
+        assert client.send("one", 1.0, None) == "one"
+        # A pooled connection that can no longer be written to
+        stale = client._idle.get_nowait()
+        stale.shutdown(socket.SHUT_WR)
+        client._idle.put(stale)
+        assert client.send("two", 1.0, None) == "two"
+        with pytest.raises(HubError) as info:
+            client.send("slow", 1.0, None)
+        assert info.value.status == 504
+        threading.Event().wait(0.6)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert calls == ["one", "two", "slow"]
+
+
+def test_client_subscription_receives_events(hub):
+    server, fanout = hub
+    received = []
+    got = threading.Event()
+
+    def on_event(event):
+        received.append(event)
+        got.set()
+
+    HubClient(server.server_address).subscribe(on_event)
+    for _ in range(50):
+        if len(fanout):
+            break
+        threading.Event().wait(0.02)
+    fanout.publish({"type": "button", "station": 23})
+    assert got.wait(2.0)
+    assert received == [{"type": "button", "station": 23}]
+
+
+def test_settings_change_is_passed_to_workers(monkeypatch):
+    import app.bridge as bridge
+    from app.hub import handle_request
+
+    monkeypatch.setattr(bridge, "QLINK_FADE", bridge.QLINK_FADE)
+    monkeypatch.setattr(bridge, "hub_client", None)  # this process is the hub
+    sub = bridge.event_fanout.subscribe()
+    try:
+        reply = handle_request({"op": "settings", "settings": {"qlink_fade": "3.5"}})
+        event = sub.get(1.0)
+    finally:
+        bridge.event_fanout.unsubscribe(sub)
+    assert reply["result"]["updated"] == ["qlink_fade"]
+    assert event == {"type": "settings", "settings": reply["settings"]}
+    assert handle_request({"op": "settings"})["settings"]["qlink_fade"] == "3.5"
+
+    # A worker applies the settings event instead of broadcasting it
+    monkeypatch.setattr(bridge, "broadcast_event_sync", pytest.fail)
+    bridge._on_hub_event({"type": "settings", "settings": {"qlink_fade": "1.0"}})
+    assert bridge.QLINK_FADE == "1.0"
+
+
+def test_worker_metrics_report_the_hubs_breakers(monkeypatch):
+    import app.bridge as bridge
+    from fastapi.testclient import TestClient
+
+    class Hub:
+        def request(self, request):
+            assert request == {"op": "status"}
+            breaker = {"state": "open", "trips": 4}
+            return {
+                "ok": True,
+                "targets": {"remote": {"breaker": breaker, "queued": 3}},
+            }
+
+    monkeypatch.setattr(bridge, "hub_client", Hub())
+    gauges = TestClient(bridge.app).get("/metrics").json()["gauges"]
+    assert gauges["breaker_state{target=remote}"] == 2
+    assert gauges["breaker_trips{target=remote}"] == 4
+    assert gauges["commands_queued{target=remote}"] == 3
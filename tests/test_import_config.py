@@ -0,0 +1,99 @@
+import json
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import import_config  # noqa: E402
+from import_config import Stage, run_pipeline  # noqa: E402
+
+PROJECT = """\
+Floor: 1st Floor
+  Room: Bar
+    Station: V23,255,1,23,0182024,1,1948280182,0,1,0,1
+      Btn: Bar,1,Bar,,1
+        Event: 1, 0 PRESET_ON 1 2.0 0 0
+          LdA: 1121:60%
+    Load: Bar pendant,1,1,2,1,127,Incandescent,0,800,,1,100
+"""
+
+SCHEDULE = [
+    "Load Schedule\ntoVacation\n"
+    "127 ?? Bar 1st Floor 800 Incande 1-1-2-1(1-1-2) \nModule \n2Yes\n"
+]
+
+
+def _stages(calls, barrier=None):
+    def source(name):
+        def run(files, deps):
+            calls.append(name)
+            if barrier:
+                barrier.wait()
+            return files[f"{name}.txt"].read_text()
+
+        return Stage(name, run, files=(f"{name}.txt",))
+
+    def join(files, deps):
+        calls.append("join")
+        return deps["a"] + deps["b"]
+
+    return [source("a"), source("b"), Stage("join", join, deps=("a", "b"))]
+
+
+def test_only_changed_sources_rebuild(tmp_path):
+    (tmp_path / "a.txt").write_text("1")
+    (tmp_path / "b.txt").write_text("2")
+    cache = tmp_path / "cache"
+    calls = []
+
+    results = run_pipeline(_stages(calls), root=tmp_path, cache_dir=cache)
+    assert results["join"].output == "12" and sorted(calls) == ["a", "b", "join"]
+
+    calls.clear()
+    results = run_pipeline(_stages(calls), root=tmp_path, cache_dir=cache)
+    assert calls == [] and {r.status for r in results.values()} == {"cached"}
+
+    (tmp_path / "b.txt").write_text("3")
+    results = run_pipeline(_stages(calls), root=tmp_path, cache_dir=cache)
+    assert calls == ["b", "join"] and results["join"].output == "13"
+    assert results["a"].status == "cached"
+    # Superseded cache entries are pruned
+    assert len(list(cache.glob("b-*.json"))) == 1
+
+
+def test_independent_stages_run_in_parallel(tmp_path):
+    (tmp_path / "a.txt").write_text("1")
+    (tmp_path / "b.txt").write_text("2")
+    # Both source stages must be running at once to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    results = run_pipeline(
+        _stages([], barrier), root=tmp_path, cache_dir=tmp_path / "cache"
+    )
+    assert results["join"].output == "12"
+
+
+def test_import_writes_both_layouts(tmp_path, monkeypatch):
+    info = tmp_path / "Info"
+    info.mkdir()
+    (info / "Home Prado Ver.txt").write_text(PROJECT)
+    (info / "LoadL.pdf").write_bytes(b"%PDF-1.4 schedule")
+    monkeypatch.setattr(
+        import_config, "iter_page_texts", lambda path: enumerate(SCHEDULE, 1)
+    )
+
+    results = run_pipeline(
+        import_config.STAGES, root=tmp_path, cache_dir=tmp_path / "cache"
+    )
+    # The keypad station list is optional
+    assert results["keypad_text"].status == "skipped"
+    loads = results["loads_json"].output
+    assert loads["rooms"][0]["name"] == "Bar"
+    assert loads["rooms"][0]["loads"][0]["id"] == 127
+    station = loads["station_1_23"]
+    assert station["room"] == "Bar" and station["buttons"]["button_1"]["loads"]
+
+    output = tmp_path / "loads.json"
+    assert import_config._write_json(output, loads, indent=2)
+    assert not import_config._write_json(output, loads, indent=2)
+    assert json.loads(output.read_text()) == loads
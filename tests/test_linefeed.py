@@ -0,0 +1,60 @@
+import json
+import socket
+import time
+
+from app.linefeed import LineFeedServer
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _readline(sock):
+    data = b""
+    while not data.endswith(b"\n"):
+        data += sock.recv(1)
+    return data
+
+
+def test_raw_and_json_readers(tmp_path):
+    feed = LineFeedServer(str(tmp_path / "feed.sock"), buffer_lines=10)
+    feed.start()
+    raw = socket.socket(socket.AF_UNIX)
+    raw.connect(str(tmp_path / "feed.sock"))
+    parsed = socket.socket(socket.AF_UNIX)
+    parsed.connect(str(tmp_path / "feed.sock"))
+    parsed.sendall(b"json\n")
+    raw.settimeout(2)
+    parsed.settimeout(2)
+    assert _wait_for(lambda: feed.stats()["readers"] == 2)
+    time.sleep(0.05)  # let the mode switch be read
+
+    # A status frame has no Vantage line: JSON readers only, no blank raw line
+    status = {"type": "status", "connected": False}
+    feed.publish(status)
+    event = {"type": "button", "station": 23, "raw": "SW 1 23 5 1"}
+    feed.publish(event)
+    assert _readline(raw) == b"SW 1 23 5 1\n"
+    assert json.loads(_readline(parsed)) == status
+    assert json.loads(_readline(parsed)) == event
+
+
+def test_slow_reader_drops_oldest_lines():
+    feed = LineFeedServer(tcp_port=0, buffer_lines=2)
+    reader = socket.create_connection(feed.addresses[0])
+    # Not started: nothing is flushed, so the reader's buffer fills up
+    feed._accept(feed._listeners[0])
+    for i in range(5):
+        feed.publish({"raw": f"LO 1 1 1 1 {i}"})
+    assert feed.stats() == {
+        "readers": 1,
+        "published": 5,
+        "dropped": 3,
+        "buffered": 2,
+    }
+    reader.close()
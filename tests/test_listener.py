@@ -0,0 +1,158 @@
+import socket
+import threading
+import time
+
+import app.bridge as bridge
+from app.targets import Backoff, TargetRegistry, VantageTarget
+
+
+def test_backoff_immediate_then_exponential(monkeypatch):
+    monkeypatch.setattr("app.targets.random.uniform", lambda lo, hi: hi)
+    backoff = Backoff(base=0.5, cap=3.0)
+    assert [backoff.next_delay() for _ in range(6)] == [0.0, 0.5, 1.0, 2.0, 3.0, 3.0]
+    backoff.reset()
+    assert backoff.next_delay() == 0.0
+
+
+def test_listener_pipelines_enables_and_measures_first_event(monkeypatch):
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+    received = []
+
+    def enabler():
+        conn, _ = srv.accept()
+        buf = b""
+        while buf.count(b"\r") < 3:
+            buf += conn.recv(4096)
+        received.append(buf)
+        conn.sendall(b"ROS 1 1\rROL 1\rROD 3\rSW 1 23 5 1\r")
+        time.sleep(5)
+
+    threading.Thread(target=enabler, daemon=True).start()
+    events = []
+    monkeypatch.setattr("app.bridge.broadcast_event_sync", events.append)
+    target = VantageTarget("test", *srv.getsockname())
+    threading.Thread(
+        target=bridge.event_listener_loop, args=(target,), daemon=True
+    ).start()
+
+    deadline = time.monotonic() + 2
+    while not events and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert received == [b"VOS@ 1 1\rVOL@ 1\rVOD@ 3\r"]
+    assert target.event_monitoring_enabled
+    assert events[0]["type"] == "button" and events[0]["target"] == "test"
+    assert target.last_time_to_first_event is not None
+
+
+def test_status_frames_follow_the_default_listener(monkeypatch):
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+
+    def enabler():
+        conn, _ = srv.accept()
+        srv.close()
+        conn.recv(4096)
+        conn.sendall(b"ROS 1 1\rROL 1\rROD 3\r")
+        time.sleep(0.2)
+        conn.close()
+
+    threading.Thread(target=enabler, daemon=True).start()
+    events = []
+    monkeypatch.setattr("app.bridge.broadcast_event_sync", events.append)
+    target = VantageTarget("test", *srv.getsockname())
+    monkeypatch.setattr(bridge, "targets", TargetRegistry({"test": target}, "test"))
+    monkeypatch.setattr("app.bridge.load_state", bridge.LoadStateStore())
+    # Park the loop after the immediate (refused) retry
+    monkeypatch.setattr("app.bridge.QLINK_RECONNECT_BASE", 3600)
+    monkeypatch.setattr("app.bridge.QLINK_RECONNECT_MAX", 3600)
+    threading.Thread(
+        target=bridge.event_listener_loop, args=(target,), daemon=True
+    ).start()
+
+    deadline = time.monotonic() + 2
+    while target.reconnects < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [(e["type"], e["connected"], e["monitoring"]) for e in events[:2]] == [
+        ("status", True, True),
+        ("status", False, False),
+    ]
+
+
+def test_lo_events_resolve_to_load_numbers(monkeypatch):
+    addresses = {(1, 1, 1, 1): {"id": 101, "name": "Pendant", "room": "Game Room"}}
+    monkeypatch.setitem(bridge._project_cache, "addresses", addresses)
+    monkeypatch.setattr("app.bridge.load_state", bridge.LoadStateStore())
+    unresolved = bridge.metrics.counter("lo_events_unresolved", target="t")
+
+    event = bridge.parse_vantage_event("LO 1 1 1 1 60")
+    event["target"] = "t"
+    bridge.resolve_load_event(event)
+    bridge.broadcast_event_sync(event)
+    assert event["load_id"] == 101 and event["name"] == "Pendant"
+    assert bridge.load_state.get(101)["level"] == 60
+
+    other = bridge.parse_vantage_event("LO 2 4 4 8 0")
+    other["target"] = "t"
+    bridge.resolve_load_event(other)
+    assert "load_id" not in other
+    assert bridge.metrics.counter("lo_events_unresolved", target="t") == unresolved + 1
+
+
+def _enabler(answer_probes, received):
+    """Acks the monitoring enables, then answers probes or stays silent."""
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+
+    def serve():
+        conn, _ = srv.accept()
+        conn.recv(4096)
+        conn.sendall(b"ROS 1 1\rROL 1\rROD 3\r")
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                return
+            received.append(data)
+            if answer_probes:
+                conn.sendall(b"ROS 1 1\r")
+
+    threading.Thread(target=serve, daemon=True).start()
+    return srv.getsockname()
+
+
+def _listen(address):
+    target = VantageTarget("probe", *address, probe_interval=0.1, silence_timeout=0.3)
+    threading.Thread(
+        target=bridge.event_listener_loop, args=(target,), daemon=True
+    ).start()
+    return target
+
+
+def test_silent_enabler_is_dropped():
+    probes = []
+    target = _listen(_enabler(False, probes))
+    deadline = time.monotonic() + 3
+    while not target.silence_timeouts and time.monotonic() < deadline:
+        time.sleep(0.02)
+    # Probed once after the quiet interval, then given up on
+    assert probes and probes[0] == bridge.LIVENESS_PROBE
+    assert target.silence_timeouts == 1 and not target.ready()
+
+
+def test_answered_probes_keep_listener_ready(monkeypatch):
+    probes = []
+    target = _listen(_enabler(True, probes))
+    time.sleep(0.8)
+    assert target.ready() and target.silence_timeouts == 0
+    assert target.liveness.probes >= 3
+    assert target.liveness.last_probe_rtt is not None
+
+    registry = TargetRegistry({"probe": target}, "probe")
+    monkeypatch.setattr("app.bridge.targets", registry)
+    assert bridge.readyz().status_code == 200
+    target.event_monitoring_enabled = False
+    assert bridge.readyz().status_code == 503
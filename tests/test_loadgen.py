@@ -0,0 +1,102 @@
+import importlib.util
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "loadgen", Path(__file__).resolve().parents[1] / "scripts" / "loadgen.py"
+)
+loadgen = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(loadgen)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert loadgen.percentile(values, 50) == 50
+    assert loadgen.percentile(values, 95) == 95
+    assert loadgen.percentile(values, 100) == 100
+    assert loadgen.percentile([7.0], 99) == 7.0
+    assert loadgen.percentile([], 50) is None
+
+
+def test_arrival_times_ramp_then_steady_rate():
+    steady = list(loadgen.arrival_times(rate=10, ramp_up=0, duration=1))
+    assert steady == pytest.approx([0.1 * n for n in range(1, 10)])
+
+    ramped = list(loadgen.arrival_times(rate=10, ramp_up=2, duration=1))
+    gaps = [b - a for a, b in zip(ramped, ramped[1:])]
+    ramp = [g for t, g in zip(ramped, gaps) if t < 2]
+    assert ramp == sorted(ramp, reverse=True)  # arrivals speed up
+    assert gaps[-1] == pytest.approx(0.1)
+    # Half the full rate on average over the ramp, then the full rate
+    assert 17 <= len(ramped) <= 20
+    assert len(list(loadgen.arrival_times(10, 0, 10, limit=5))) == 5
+
+
+class _Bridge(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _answer(self):
+        self.server.seen.append(self.command)
+        if self.path == "/slow":
+            time.sleep(0.5)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        # Hang up without announcing it, like an expired keep-alive
+        self.close_connection = True
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bridge_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Bridge)
+    server.seen = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, timeout=2.0):
+    args = SimpleNamespace(timeout=timeout)
+    client = loadgen.Client(f"http://127.0.0.1:{server.server_address[1]}", args, None)
+    return client
+
+
+def test_posts_are_never_resent(bridge_server, monkeypatch):
+    client = _client(bridge_server)
+    monkeypatch.setattr(client, "_build", lambda op: ("POST", "/set", "{}"))
+    results = []
+    for _ in range(5):
+        results.append(client.request("set"))
+        time.sleep(0.05)  # the bridge hangs up on the kept-alive connection
+    assert set(results) <= {200, "error"}
+    # Resent only if the bridge never got it: one POST per 200, none twice
+    assert bridge_server.seen == ["POST"] * results.count(200)
+
+
+def test_gets_retry_a_closed_connection_but_not_a_timeout(bridge_server, monkeypatch):
+    client = _client(bridge_server, timeout=0.2)
+    monkeypatch.setattr(client, "_build", lambda op: ("GET", f"/{op}", None))
+    assert client.request("status") == 200
+    time.sleep(0.05)
+    assert client.request("status") == 200
+    assert client.request("slow") == "timeout"
+    time.sleep(0.5)
+    assert bridge_server.seen == ["GET", "GET", "GET"]
+
+    recorder = loadgen.Recorder()
+    recorder.record("status", 1.0, 200)
+    recorder.record("status", 200.0, "timeout")
+    report = recorder.report(1.0, {})
+    assert report["overall"]["errors"] == 1
+    assert report["status_codes"] == {"200": 1, "timeout": 1}
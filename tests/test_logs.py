@@ -0,0 +1,98 @@
+import json
+import logging
+import queue
+import time
+
+import app.bridge as bridge
+from app.logs import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+    configure_logging,
+    parse_sample,
+)
+from app.metrics import metrics
+
+
+def _record(name, level=logging.INFO, msg="x"):
+    return logging.LogRecord(name, level, __file__, 1, msg, (), None)
+
+
+def test_sampling_keeps_one_in_n_per_category():
+    sampler = SamplingFilter(parse_sample("events=3, commands=1,bogus"))
+    kept = [sampler.filter(_record("qlink.events")) for _ in range(6)]
+    assert kept == [True, False, False, True, False, False]
+    assert all(sampler.filter(_record("qlink.commands")) for _ in range(3))
+    assert sampler.filter(_record("qlink.events", logging.WARNING))
+
+
+def test_json_lines_carry_extra_fields():
+    record = _record("qlink.commands", msg="cmd=%s")
+    record.args = ("VLO@ 1 2",)
+    record.target = "main"
+    line = json.loads(JsonFormatter().format(record))
+    assert line["msg"] == "cmd=VLO@ 1 2" and line["target"] == "main"
+    assert line["level"] == "INFO" and line["logger"] == "qlink.commands"
+
+
+def test_queued_records_snapshot_dict_fields():
+    records = queue.Queue()
+    event = {"type": "button"}
+    record = _record("qlink.events")
+    record.event = event
+    DroppingQueueHandler(records).handle(record)
+    event["target"] = "main"  # the listener keeps filling the event in
+    assert records.get_nowait().event == {"type": "button"}
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    dropped = metrics.counter("log_records_dropped")
+    handler.handle(_record("qlink"))
+    handler.handle(_record("qlink"))
+    assert metrics.counter("log_records_dropped") == dropped + 1
+
+
+def test_records_reach_the_rotated_file(tmp_path):
+    log = logging.getLogger("qlink-test-logs")
+    path = tmp_path / "bridge.log"
+    listener = configure_logging(log, log_file=str(path), json_format=True)
+    assert configure_logging(log) is None  # already set up
+    assert listener is not None
+    log.info("hello %s", "pi")
+    # Written by the listener thread, shortly after the call returns
+    for _ in range(100):
+        if path.read_text():
+            break
+        time.sleep(0.01)
+    assert json.loads(path.read_text())["msg"] == "hello pi"
+
+
+def test_event_and_command_lines_carry_fields(monkeypatch):
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    for name in ("qlink.events", "qlink.commands"):
+        logging.getLogger(name).addHandler(handler)
+        monkeypatch.setattr(logging.getLogger(name), "level", logging.DEBUG)
+    monkeypatch.setattr(bridge.targets.default, "send", lambda *a: ["R:V 0"])
+    try:
+        bridge.parse_vantage_event("SW 1 23 5 1")
+        bridge.qlink_send("VGL@ 101")
+        # Worker mode: the command goes through the hub, logged the same way
+        hub = type("Hub", (), {"send": lambda self, *a: "R:V 0"})()
+        monkeypatch.setattr(bridge, "hub_client", hub)
+        bridge.qlink_send("VGL@ 102")
+    finally:
+        for name in ("qlink.events", "qlink.commands"):
+            logging.getLogger(name).removeHandler(handler)
+
+    event, command, via_hub = records
+    assert via_hub.name == "qlink.commands" and via_hub.cmd == "VGL@ 102"
+    assert via_hub.via == "hub" and via_hub.target == bridge.targets.default_name
+    assert event.event["type"] == "button" and event.event["station"] == 23
+    assert command.cmd == "VGL@ 101"
+    assert command.target == bridge.targets.default.name
+    assert command.elapsed_ms >= 0
+    line = json.loads(JsonFormatter().format(command))
+    assert {"cmd", "target", "elapsed_ms"} <= set(line)
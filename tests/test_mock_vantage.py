@@ -0,0 +1,59 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location(
+    "mock_vantage", Path(__file__).resolve().parents[1] / "scripts" / "mock_vantage.py"
+)
+mock_vantage = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mock_vantage)
+
+
+async def _session(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def line():
+        data = await asyncio.wait_for(reader.readuntil(b"\r"), 2)
+        return data.decode().strip()
+
+    return reader, writer, line
+
+
+def test_persistent_session_and_modifiers():
+    async def run():
+        mock = mock_vantage.MockEnabler()
+        _, port = await mock.start("127.0.0.1", 0)
+        _, writer, line = await _session(port)
+        # pipelined: three commands in one write, one with no response
+        writer.write(b"VLO@ 101 50\rVLO! 102 20\rVGL# 102\r")
+        assert await line() == "50"
+        assert await line() == "RGL 102 20"
+        writer.write(b"VSW# 1 23 5 4\r")
+        assert await line() == "RSW 1 23 5 4"
+        writer.close()
+        await mock.stop()
+
+    asyncio.run(run())
+
+
+def test_events_only_reach_monitoring_sessions():
+    async def run():
+        mock = mock_vantage.MockEnabler()
+        _, port = await mock.start("127.0.0.1", 0)
+        _, monitor, monitor_line = await _session(port)
+        _, control, control_line = await _session(port)
+        monitor.write(b"VOS@ 1 1\rVOL@ 1\r")
+        assert await monitor_line() == "ROS 1 1"
+        assert await monitor_line() == "ROL 1"
+
+        control.write(b"VLO@ 2225 40\r")
+        assert await control_line() == "40"
+        assert await monitor_line() == "LO 2 2 2 5 40"
+
+        mock.inject("SW 1 23 5 1 0182024")
+        assert await monitor_line() == "SW 1 23 5 1 0182024"
+        monitor.close()
+        control.close()
+        await mock.stop()
+
+    asyncio.run(run())
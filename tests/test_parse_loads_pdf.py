@@ -0,0 +1,58 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import parse_loads_pdf  # noqa: E402
+import pdf_pages  # noqa: E402
+
+PAGES = [
+    "Tek Tjia Load Schedule\nTotal Loads: 3\nPowerType AddressWired \ntoVacation\n"
+    "127 ?? Bar 1st Floor 800 Incande 1-1-2-1(1-1-2) \nModule \n2Yes\n"
+    '3373 6"\ndownlitesBar 1st Floor 270 Incande 2-2-3-5(2-2-3) \nModule \n3Yes\n'
+    '106 2 4"lvUnder \nBridge1st Floor 400 Mag LV'
+    "Page 1 of 2 Load Schedul e\n10/15/2025 file:///C:/LoadList.htm l",
+    " 2-2-3-2(2-2-3) \nModule \n3Yes\n"
+    "335 downlite Breakfast Exte rior 100 FlMagND 2-2-3-3Module \n3Yes"
+    "Page 2 of 2 Load Schedul e\n10/15/2025 file:///C:/LoadList.htm l",
+]
+
+
+def _cached_pdf(tmp_path, monkeypatch):
+    """A PDF whose page text is already cached, so PyPDF2 is never needed."""
+    pdf = tmp_path / "LoadL.pdf"
+    pdf.write_bytes(b"%PDF-1.4 schedule")
+    cache = tmp_path / "cache" / pdf_pages.pdf_hash(pdf)[:16]
+    cache.mkdir(parents=True)
+    (cache / "meta.json").write_text(json.dumps({"pages": len(PAGES)}))
+    for number, text in enumerate(PAGES, 1):
+        (cache / f"{number:04d}.txt").write_text(text)
+    monkeypatch.setattr(
+        parse_loads_pdf,
+        "iter_page_texts",
+        lambda path: pdf_pages.iter_page_texts(path, cache_dir=tmp_path / "cache"),
+    )
+    return pdf
+
+
+def test_streams_records_across_pages(tmp_path, monkeypatch):
+    pdf = _cached_pdf(tmp_path, monkeypatch)
+    loads = list(parse_loads_pdf.iter_loads(pdf, tmp_path / "missing.json"))
+    assert [load["id"] for load in loads] == [127, 337, 106, 335]
+    assert loads[2]["fixture"] == "Mag LV" and loads[2]["address"] == "2-2-3-2"
+    assert loads[3]["floor"] == "Exterior" and loads[3]["type"] == "switch"
+    assert loads[1]["power"] == 270
+    # No project index: one-line records are split into name and room
+    assert (loads[0]["name"], loads[0]["room"]) == ("??", "Bar")
+    assert (loads[3]["name"], loads[3]["room"]) == ("downlite", "Breakfast")
+    assert loads[1]["room"] == "Unknown"
+
+
+def test_names_come_from_project_index(tmp_path, monkeypatch):
+    pdf = _cached_pdf(tmp_path, monkeypatch)
+    index = tmp_path / "project_index.json"
+    load = {"name": "3 6in downlites", "contractor": 337, "room": "Bar"}
+    index.write_text(json.dumps({"loads": {"2235": {**load, "address": [2, 2, 3, 5]}}}))
+    loads = list(parse_loads_pdf.iter_loads(pdf, index))
+    assert loads[1]["name"] == "3 6in downlites" and loads[1]["room"] == "Bar"
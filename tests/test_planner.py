@@ -0,0 +1,127 @@
+from fastapi.testclient import TestClient
+
+import app.bridge as bridge
+from app.planner import plan_levels, presets_from_index
+
+
+def _event(op, loads, fade=0.0, trigger=0):
+    return {"op": op, "trigger": trigger, "fade": fade, "loads": loads}
+
+
+def _load(contractor):
+    return {"contractor": contractor, "address": [], "name": "", "room": ""}
+
+
+INDEX = {
+    "loads": {str(address): _load(address - 1000) for address in range(1111, 1118)},
+    "stations": {
+        "31": {
+            "master": 1,
+            "station": 31,
+            "buttons": {
+                # Whole floor off
+                "8": {
+                    "name": "1st Fl Off",
+                    "events": [
+                        _event("PRESET_OFF", [[a, 0] for a in range(1111, 1116)])
+                    ],
+                },
+                # Kitchen scene
+                "1": {
+                    "name": "Cook",
+                    "events": [_event("PRESET_ON", [[1111, 100], [1112, 60]])],
+                },
+                # Fades over 3 s
+                "5": {
+                    "name": "Dinner",
+                    "events": [_event("PRESET_ON", [[1113, 40], [1114, 40]], 3.0)],
+                },
+                # Depends on the current level
+                "2": {
+                    "name": "Toggle",
+                    "events": [_event("TOGGLE", [[1113, 100], [1114, 100]])],
+                },
+            },
+        },
+        "40": {
+            "master": 2,
+            "station": 40,
+            "buttons": {
+                "3": {
+                    "name": "Hall Off",
+                    "events": [_event("PRESET_OFF", [[1116, 0], [1117, 0]])],
+                },
+                # Unknown address: the press's effect cannot be planned around
+                "4": {
+                    "name": "Stray",
+                    "events": [_event("PRESET_OFF", [[1116, 0], [9999, 0]])],
+                },
+            },
+        },
+    },
+}
+
+
+def test_presets_keep_deterministic_buttons_only():
+    presets = {p.name: p for p in presets_from_index(INDEX)}
+    assert sorted(presets) == ["1st Fl Off", "Cook", "Dinner", "Hall Off"]
+    assert presets["Cook"].levels == ((111, 100), (112, 60))
+    assert presets["Hall Off"].command == "VSW@ 2 40 3 4"
+
+
+def test_plan_uses_presets_that_match_exactly():
+    presets = presets_from_index(INDEX)
+    desired = {load: 0 for load in range(111, 118)}
+    desired[118] = 40
+    plan = plan_levels(desired, presets)
+    assert [p.name for p in plan.presets] == ["1st Fl Off", "Hall Off"]
+    assert plan.commands()[2:] == ["VLO@ 118 40"]
+
+    # One level differs from the preset: every load is written instead
+    desired[111] = 20
+    plan = plan_levels(desired, presets)
+    assert [p.name for p in plan.presets] == ["Hall Off"]
+    assert len(plan.writes) == 6
+
+    # A preset fading differently from the requested fade is not used
+    plan = plan_levels({116: 0, 117: 0}, presets, fade=1)
+    assert plan.commands() == ["VLO@ 116 0 1", "VLO@ 117 0 1"]
+
+    # Without a fade only instant presets are used, unless any fade is accepted
+    plan = plan_levels({113: 40, 114: 40}, presets)
+    assert plan.presets == [] and len(plan.writes) == 2
+    plan = plan_levels({113: 40, 114: 40}, presets, fade=3)
+    assert [p.name for p in plan.presets] == ["Dinner"]
+    plan = plan_levels({113: 40, 114: 40}, presets, any_fade=True)
+    assert [p.name for p in plan.presets] == ["Dinner"]
+
+
+def test_set_loads_bursts_per_enabler(monkeypatch):
+    monkeypatch.setitem(bridge._project_cache, "presets", presets_from_index(INDEX))
+    monkeypatch.setattr(bridge, "get_project_index", lambda: INDEX)
+    bursts = []
+
+    def fake_burst(payload, expected, timeout=None, target=None):
+        bursts.append((payload, target))
+        return ["R"] * expected
+
+    monkeypatch.setattr(bridge, "qlink_send_burst", fake_burst)
+    client = TestClient(bridge.app)
+    body = {"loads": {"111": 100, "112": 60, "113": 30}}
+
+    r = client.post("/loads/plan", json=body)
+    assert r.json()["commands"] == ["VSW@ 1 31 1 4", "VLO@ 113 30"]
+    assert bursts == []
+
+    r = client.post("/loads/set", json=body)
+    assert r.status_code == 200 and r.json()["complete"] is True
+    assert r.json()["commands"] == 2
+    eol = bridge.EOL.encode()
+    # The press goes to the enabler serving master 1, writes to the default
+    # Master 1 is served by the default enabler: press and write share a burst
+    assert bridge.targets.for_master(1) is bridge.targets.default
+    assert bursts == [
+        (b"VSW@ 1 31 1 4" + eol + b"VLO@ 113 30" + eol, bridge.targets.default_name)
+    ]
+
+    assert client.post("/loads/set", json={"loads": {"111": 101}}).status_code == 400
@@ -0,0 +1,119 @@
+from app.project_index import (
+    address_index,
+    compile_lines,
+    load_index,
+    merge_loads_json,
+    station_buttons,
+)
+
+PROJECT = """\
+Floor: 1st Floor
+  Room: Game Room
+    Station: V23,255,1,23,0182024,1,1948280182,0,1,0,1
+      Btn: Pendant ,2,Pendant,,1
+        Event: 1, 0 DIM 34 2.0 3.0 1 0
+          LdA: 1111
+      Btn: Medium,6,Medium,,1
+        Event: 1, 0 PRESET_ON 1 2.0 0 0
+          LdA: 1111:60%,1114
+          LdA: 2141:20%
+      Btn: Game Room Off,8,Game,Room Of,1
+        Event: 1, 0 PRESET_OFF 2 3.0
+          LdA: 1111:60%,1114
+    Load: Pendant,1,1,1,1,101,Incandescent,0,200,,1,100
+    Load: 4 6" downlites, east,1,1,1,5,104,Incandescent,0,360,,1,100
+  Time: Midnight,1,1,0,*** **, **** ******* 11:59:00 PM, 0
+        Event: 1, 0 PRESET_ON 1 5.0 0 0
+          LdA: 1328:50%
+"""
+
+
+def test_compile_lines():
+    index = compile_lines(PROJECT.splitlines())
+    station = index["stations"]["1:23"]
+    assert station["room"] == "Game Room" and station["serial"] == "0182024"
+
+    medium = station["buttons"]["6"]["events"][0]
+    assert medium["op"] == "PRESET_ON" and medium["fade"] == 2.0
+    # Continuation LdA lines accumulate and keep their percentages
+    assert medium["loads"] == [[1111, 60], [1114, 100], [2141, 20]]
+    off = station["buttons"]["8"]["events"][0]
+    assert off["loads"] == [[1111, 0], [1114, 0]]
+
+    assert index["loads"]["1111"]["contractor"] == 101
+    assert index["loads"]["1115"]["name"] == '4 6" downlites, east'
+    assert index["timers"][0]["events"][0]["loads"] == [[1328, 50]]
+
+
+def test_station_buttons_layout():
+    layout = station_buttons(compile_lines(PROJECT.splitlines()))
+    button = layout["station_1_23"]["buttons"]["button_6"]
+    assert button["event_type"] == "PRESET_ON"
+    assert button["loads"] == [1111, 1114, 2141]
+    assert button["levels"] == [60, 100, 20]
+
+
+def test_station_buttons_keeps_stations_apart_across_masters():
+    index = compile_lines(PROJECT.splitlines())
+    station = index["stations"]["1:23"]
+    index["stations"]["2:23"] = {**station, "master": 2, "name": "V223"}
+    layout = station_buttons(index)
+    assert layout["station_1_23"]["master"] == 1
+    assert layout["station_2_23"]["name"] == "V223"
+
+
+def test_station_layout_merges_into_loads_json():
+    layout = station_buttons(compile_lines(PROJECT.splitlines()))
+    existing = {
+        "rooms": [{"name": "Bar", "loads": [{"id": 127}]}],
+        "station_1_23": {"station": 23, "location": "Bar door", "buttons": {}},
+        "station_1_99": {"station": 99, "buttons": {}},
+    }
+    merged = merge_loads_json(existing, layout)
+    assert merged["rooms"] == existing["rooms"]
+    assert merged["station_1_23"]["location"] == "Bar door"
+    assert merged["station_1_23"]["buttons"] == layout["station_1_23"]["buttons"]
+    assert "station_1_99" not in merged
+
+    # Rebuilding only the rooms (scripts/parse_loads_pdf.py) keeps the stations
+    rooms = merge_loads_json(merged, {"rooms": [{"name": "Bar", "loads": []}]})
+    assert rooms["rooms"][0]["name"] == "Bar"
+    assert rooms["station_1_23"] == merged["station_1_23"]
+
+
+def test_station_layout_merge_reads_pre_master_keys():
+    layout = station_buttons(compile_lines(PROJECT.splitlines()))
+    existing = {
+        "station_23": {"station": 23, "master": 1, "location": "Bar door"},
+    }
+    merged = merge_loads_json(existing, layout)
+    assert merged["station_1_23"]["location"] == "Bar door"
+    assert "station_23" not in merged
+
+    existing["station_23"]["master"] = 2
+    assert "location" not in merge_loads_json(existing, layout)["station_1_23"]
+
+
+def test_load_index_rebuilds_on_content_change(tmp_path):
+    source = tmp_path / "project.txt"
+    index_path = tmp_path / "project_index.json"
+    source.write_text(PROJECT)
+
+    first, rebuilt = load_index(str(source), str(index_path))
+    assert rebuilt and first["source_hash"]
+    again, rebuilt = load_index(str(source), str(index_path))
+    assert not rebuilt and again == first
+
+    source.write_text(PROJECT.replace("1111:60%", "1111:70%"))
+    changed, rebuilt = load_index(str(source), str(index_path))
+    assert rebuilt and changed["source_hash"] != first["source_hash"]
+
+
+def test_address_index():
+    addresses = address_index(compile_lines(PROJECT.splitlines()))
+    assert addresses[(1, 1, 1, 1)] == {
+        "id": 101,
+        "name": "Pendant",
+        "room": "Game Room",
+    }
+    assert addresses[(1, 1, 1, 5)]["id"] == 104
@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import app.bridge as bridge
+from app.metrics import metrics
+from app.rules import RuleEngine, compile_rules
+
+RULES = {
+    "rules": {
+        "bar": {
+            "when": {"button": {"master": 1, "station": 23, "button": 5}},
+            "do": [
+                {"command": "VLO@ 127 100"},
+                {"delay": 0.01},
+                {"webhook": "http://127.0.0.1:9/hook"},
+            ],
+        },
+        "porch": {
+            "when": {"load": {"id": 127, "level": 0}},
+            "do": [{"scene": "porch_off"}],
+        },
+        "off": {"enabled": False, "when": {}, "do": []},
+        "bad": {"when": {"button": {"station": 23}}, "do": [{"command": "x"}]},
+    }
+}
+
+
+def test_compile_rules_isolates_errors():
+    rules, errors = compile_rules(RULES)
+    assert sorted(rules) == ["bar", "porch"] and list(errors) == ["bad"]
+    assert rules["bar"].key == ("button", 1, 23, 5, "pressed")
+    assert rules["porch"].key == ("load", 127) and rules["porch"].level == 0
+    assert "'button'" in errors["bad"]
+
+
+def test_engine_runs_matching_rules_in_order():
+    done = threading.Event()
+    ran = []
+
+    def run_action(action, event):
+        ran.append(action)
+
+    def webhook(url, body):
+        ran.append(body["rule"])
+        done.set()
+
+    engine = RuleEngine(run_action, webhook=webhook)
+    engine.load(compile_rules(RULES)[0])
+
+    released = {"type": "button", "master": 1, "station": 23, "button": 5}
+    assert engine.dispatch({**released, "state": "released"}) == 0
+    assert engine.dispatch({"type": "load_module", "load_id": 127, "level": 50}) == 0
+    assert engine.dispatch({**released, "state": "pressed"}) == 1
+    assert done.wait(2)
+    assert ran == [{"command": "VLO@ 127 100"}, "bar"]
+    engine.shutdown()
+
+
+def test_delay_does_not_hold_a_worker():
+    rules, _ = compile_rules(
+        {
+            "rules": {
+                "slow": {
+                    "when": {"led": {"station": 1}},
+                    "do": [{"delay": 0.3}, {"command": "slow"}],
+                },
+                "fast": {"when": {"led": {"station": 2}}, "do": [{"command": "fast"}]},
+            }
+        }
+    )
+    ran = []
+    done = threading.Event()
+
+    def run_action(action, event):
+        ran.append(action["command"])
+        if len(ran) == 2:
+            done.set()
+
+    engine = RuleEngine(run_action, workers=1)
+    engine.load(rules)
+    engine.dispatch({"type": "led_keypad", "master": 1, "station": 1})
+    engine.dispatch({"type": "led_keypad", "master": 1, "station": 2})
+    assert done.wait(2)
+    # The only worker was free while "slow" waited out its delay
+    assert ran == ["fast", "slow"] and engine.pending() == 0
+    engine.shutdown()
+
+
+def test_rule_seconds_excludes_delays():
+    rules, _ = compile_rules(
+        {
+            "rules": {
+                "timed": {
+                    "when": {"led": {"station": 3}},
+                    "do": [{"delay": 0.3}, {"command": "after"}],
+                }
+            }
+        }
+    )
+    engine = RuleEngine(lambda action, event: None, workers=1)
+    engine.load(rules)
+    runs = metrics.counter("rule_runs", rule="timed")
+    engine.dispatch({"type": "led_keypad", "master": 1, "station": 3})
+    deadline = time.monotonic() + 2
+    while metrics.counter("rule_runs", rule="timed") == runs:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert metrics.summary("rule_seconds", rule="timed")["last"] < 0.3
+    engine.shutdown()
+
+
+def test_bridge_runs_rules_from_config(tmp_path, monkeypatch):
+    (tmp_path / "rules.json").write_text(json.dumps(RULES))
+    monkeypatch.setattr(
+        "app.bridge._find_config_file",
+        lambda name: str(tmp_path / name) if (tmp_path / name).exists() else None,
+    )
+    monkeypatch.setitem(bridge._rule_cache, "key", None)
+    sent = threading.Event()
+    monkeypatch.setattr(
+        "app.bridge.qlink_send", lambda cmd, **kw: sent.set() or f"R:{cmd}"
+    )
+    monkeypatch.setattr(bridge.rule_engine, "_webhook", lambda url, body: None)
+    try:
+        bridge.check_rules(force=True)
+        event = bridge.parse_vantage_event("SW 1 23 5 1 0182024")
+        assert bridge.rule_engine.dispatch(event) == 1
+        assert sent.wait(2)
+
+        body = TestClient(bridge.app).get("/rules").json()
+        assert list(body["errors"]) == ["bad"]
+        assert {rule["name"] for rule in body["rules"]} == {"bar", "porch"}
+    finally:
+        bridge.rule_engine.load({})
+        bridge._rule_cache["key"] = None
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.bridge as bridge
+from app.bridge import app
+from app.scenes import SceneError, compile_scene, compile_scenes, known_load_ids
+
+
+client = TestClient(app)
+
+LOADS = {
+    "rooms": [
+        {
+            "name": "Bar",
+            "loads": [{"id": 127, "name": "Main"}, {"id": 324, "name": "Cabinet"}],
+        }
+    ],
+    "station_2_23": {
+        "station": 23,
+        "master": 2,
+        "buttons": {"button_5": {"button": 5, "loads": [2111, 2112]}},
+    },
+}
+
+
+def test_known_load_ids_are_contractor_numbers():
+    # Button loads (2111, 2112) are module addresses, not VLO@ ids
+    assert known_load_ids(LOADS) == {127, 324}
+    index = {"loads": {"2111": {"name": "Pendant", "contractor": 101}}}
+    assert known_load_ids({}, index) == {101}
+
+
+def test_compile_scene_payload():
+    scene = compile_scene(
+        "evening",
+        {"fade": 2, "loads": [{"id": 127, "level": 60}, {"id": 2111, "level": 0}]},
+        "\r",
+        {127, 2111},
+    )
+    assert scene.commands == ("VLO@ 127 60 2", "VLO@ 2111 0 2")
+    assert scene.payload == b"VLO@ 127 60 2\rVLO@ 2111 0 2\r"
+
+
+def test_compile_scene_rejects_unknown_loads():
+    with pytest.raises(SceneError, match="unknown loads: 999"):
+        compile_scene("bad", {"loads": [{"id": 999, "level": 10}]}, "\r", {127})
+
+
+def test_compile_scenes_isolates_errors():
+    scenes, errors = compile_scenes(
+        {
+            "scenes": {
+                "ok": {"loads": [{"id": 127, "level": 100}]},
+                "bad": {"loads": [{"id": 127, "level": 150}]},
+                "slow": {"fade": "slow", "loads": [{"id": 127, "level": 1}]},
+                "list": [{"id": 127, "level": 1}],
+            }
+        },
+        "\r",
+        {127},
+    )
+    assert list(scenes) == ["ok"]
+    assert sorted(errors) == ["bad", "list", "slow"]
+
+
+def test_scenes_are_rejected_without_known_loads():
+    with pytest.raises(SceneError, match="no loads are known"):
+        compile_scene("bar", {"loads": [{"id": 127, "level": 10}]}, "\r", set())
+
+
+def test_run_scene_sends_one_burst(tmp_path, monkeypatch):
+    (tmp_path / "loads.json").write_text(json.dumps(LOADS))
+    (tmp_path / "scenes.json").write_text(
+        json.dumps({"scenes": {"bar": {"loads": [{"id": 127, "level": 50}]}}})
+    )
+    monkeypatch.setattr(
+        "app.bridge._find_config_file",
+        lambda name: str(tmp_path / name) if (tmp_path / name).exists() else None,
+    )
+    monkeypatch.setitem(bridge._scene_cache, "key", None)
+    bursts = []
+
+    def fake_burst(payload, expected, timeout=None, target=None):
+        bursts.append((payload, expected))
+        return ["50"]
+
+    monkeypatch.setattr("app.bridge.qlink_send_burst", fake_burst)
+    r = client.post("/scene/bar")
+    assert r.status_code == 200
+    assert r.json()["complete"] is True
+    assert bursts == [(b"VLO@ 127 50\r", 1)]
+
+    assert client.post("/scene/missing").status_code == 404
+
+
+def test_run_scene_elides_loads_already_at_level(tmp_path, monkeypatch):
+    scenes = {"bar": {"loads": [{"id": 127, "level": 50}, {"id": 324, "level": 0}]}}
+    (tmp_path / "loads.json").write_text(json.dumps(LOADS))
+    (tmp_path / "scenes.json").write_text(json.dumps({"scenes": scenes}))
+    monkeypatch.setattr(
+        "app.bridge._find_config_file",
+        lambda name: str(tmp_path / name) if (tmp_path / name).exists() else None,
+    )
+    monkeypatch.setitem(bridge._scene_cache, "key", None)
+    monkeypatch.setattr("app.bridge.QLINK_ELIDE", True)
+    monkeypatch.setattr("app.bridge.load_state", bridge.LoadStateStore())
+    bridge.load_state.update(127, 50)
+    bursts = []
+
+    def fake_burst(payload, expected, timeout=None, target=None):
+        bursts.append((payload, expected))
+        return ["0"] * expected
+
+    monkeypatch.setattr("app.bridge.qlink_send_burst", fake_burst)
+    data = client.post("/scene/bar").json()
+    assert data["commands"] == 1 and data["elided"] == 1 and data["complete"]
+    assert bursts == [(b"VLO@ 324 0\r", 1)]
+
+    bridge.load_state.update(324, 0)
+    data = client.post("/scene/bar").json()
+    assert data["commands"] == 0 and len(bursts) == 1
+    client.post("/scene/bar?force=true")
+    assert bursts[-1][1] == 2
@@ -0,0 +1,190 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import app.bridge as bridge
+from app.state import KeypadLedStore, LoadStateStore
+
+client = TestClient(bridge.app)
+
+
+def test_fresh_level_requires_recent_uninterrupted_events():
+    store = LoadStateStore()
+    store.update(101, 100)
+    store.update(102, 50, source="command")
+    assert store.fresh_level(101, 60) == 100
+    # Only event-reported levels are trusted, and only while recent
+    assert store.fresh_level(102, 60) is None
+    assert store.fresh_level(101, -1) is None
+    # A listener outage may have hidden changes
+    store.mark_stale()
+    assert store.fresh_level(101, 60) is None
+    time.sleep(0.01)
+    store.update(101, 0)
+    assert store.fresh_level(101, 60) == 0
+
+
+def test_redundant_set_is_elided_unless_forced(monkeypatch):
+    monkeypatch.setattr("app.bridge.QLINK_ELIDE", True)
+    monkeypatch.setattr("app.bridge.load_state", LoadStateStore())
+    bridge.load_state.update(101, 100)
+    sent = []
+    monkeypatch.setattr(
+        "app.bridge.qlink_send", lambda cmd, **kw: sent.append(cmd) or "R:V 0"
+    )
+    elided = bridge.metrics.counter("commands_elided")
+    saved = bridge.metrics.counter("bus_seconds_saved")
+
+    r = client.post("/device/101/set", json={"switch": "on"})
+    assert r.json() == {"resp": None, "elided": True} and sent == []
+    assert bridge.metrics.counter("commands_elided") == elided + 1
+    assert bridge.metrics.counter("bus_seconds_saved") > saved
+
+    r = client.post("/device/101/set?force=true", json={"level": 100})
+    assert r.json()["elided"] is False and sent == ["VLO@ 101 100"]
+    client.post("/device/101/set", json={"level": 40})
+    assert sent[-1] == "VLO@ 101 40"
+
+    monkeypatch.setattr("app.bridge.QLINK_ELIDE", False)
+    client.post("/device/101/set", json={"level": 100})
+    assert sent[-1] == "VLO@ 101 100"
+
+
+def test_fading_level_is_interpolated(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.state.time.time", lambda: now[0])
+    store = LoadStateStore()
+    store.update(101, 0)
+    store.update(101, 100, source="command", fade=4)
+    now[0] += 1
+    assert store.get(101)["level"] == 25 and store.get(101)["fading"] is True
+    # The LO event for the same target keeps the ramp
+    store.update(101, 100)
+    now[0] += 1
+    state = store.get(101)
+    assert state["level"] == 50 and state["target"] == 100
+    assert state["source"] == "event" and store.fresh_level(101, 60) == 100
+    # A new command ramps down from wherever the load is now
+    store.update(101, 0, source="command", fade=2)
+    now[0] += 1
+    assert store.get(101)["level"] == 25
+    now[0] += 5
+    assert store.snapshot()[101]["level"] == 0
+    assert store.snapshot()[101]["fading"] is False
+
+
+def test_event_before_command_reply_stays_trusted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.state.time.time", lambda: now[0])
+    store = LoadStateStore()
+    store.update(101, 0)
+    now[0] += 10
+    # The LO event is read before the VLO@ reply is processed
+    store.update(101, 100)
+    store.update(101, 100, source="command", fade=4)
+    assert store.fresh_level(101, 60) == 100
+    now[0] += 1
+    state = store.get(101)
+    assert state["level"] == 25 and state["fading"] and state["source"] == "event"
+    now[0] += 4
+    assert store.get(101)["level"] == 100 and store.fresh_level(101, 60) == 100
+
+
+def test_repeated_set_is_elided_after_the_event(monkeypatch):
+    monkeypatch.setattr("app.bridge.load_state", LoadStateStore())
+    monkeypatch.setattr("app.bridge.QLINK_ELIDE", True)
+    monkeypatch.setattr(bridge, "get_project_index", lambda: {})
+    monkeypatch.setitem(bridge._project_cache, "presets", [])
+    bursts = []
+
+    def fake_burst(payload, expected, timeout=None, target=None):
+        bursts.append(payload)
+        # The enabler reports the LO event before the reply is handled
+        bridge.load_state.update(101, 60)
+        return ["R"] * expected
+
+    monkeypatch.setattr(bridge, "qlink_send_burst", fake_burst)
+    body = {"loads": {"101": 60}}
+    assert client.post("/loads/set", json=body).json()["commands"] == 1
+    data = client.post("/loads/set", json=body).json()
+    assert data["commands"] == 0 and data["elided"] == 1 and len(bursts) == 1
+
+
+def test_set_with_fade_records_ramp(monkeypatch):
+    monkeypatch.setattr("app.bridge.load_state", LoadStateStore())
+    sent = []
+    monkeypatch.setattr(
+        "app.bridge.qlink_send", lambda cmd, **kw: sent.append(cmd) or "R:V 0"
+    )
+    assert client.get("/load/101/state").status_code == 404
+    bridge.load_state.update(101, 0)
+
+    client.post("/device/101/set", json={"level": 80, "fade": 30})
+    assert sent == ["VLO@ 101 80 30"]
+    state = client.get("/load/101/state").json()
+    assert state["target"] == 80 and state["fading"] is True
+    assert state["level"] < 80 and state["source"] == "command"
+
+
+def test_queried_level_seeds_the_store(monkeypatch):
+    monkeypatch.setattr("app.bridge.load_state", LoadStateStore())
+    replies = {"VGL@ 101": "RGL 101 40", "VGL@ 102": "75", "VGL@ 103": "ERR"}
+    monkeypatch.setattr("app.bridge.qlink_send", lambda cmd, **kw: replies[cmd])
+
+    assert client.get("/load/101/status").json()["level"] == 40
+    assert client.get("/load/102/status").json()["level"] == 75
+    assert client.get("/load/103/status").json()["level"] is None
+    loads = client.get("/loads/state").json()["loads"]
+    assert loads["101"]["level"] == 40 and loads["101"]["source"] == "query"
+    assert set(loads) == {"101", "102"}
+
+
+def test_led_bitmaps_from_le_and_lc_events():
+    store = KeypadLedStore()
+    assert store.button(1, 23, 1) is None
+    store.update(1, 23, 0x05, 0x04)
+    assert store.button(1, 23, 1)["on"] and not store.button(1, 23, 2)["on"]
+    assert store.button(1, 23, 3)["blink"]
+    store.set_button(1, 23, 2, True)
+    store.set_button(1, 23, 1, False)
+    assert store.station(1, 23)["on"] == 0x06
+
+
+def test_button_status_served_from_led_events(monkeypatch):
+    station = {
+        "name": "V23",
+        "master": 1,
+        "station": 23,
+        "room": "Bar",
+        "buttons": {
+            "5": {
+                "name": "Bar",
+                "events": [{"op": "PRESET_ON", "loads": [[1121, 100]]}],
+            },
+            "6": {"name": "Off", "events": []},
+        },
+    }
+    index = {
+        # Same station number on master 2 is a different keypad
+        "stations": {"1:23": station, "2:23": {"name": "V73", "buttons": {}}},
+        "loads": {"1121": {"contractor": 127}},
+    }
+    monkeypatch.setattr("app.bridge.get_project_index", lambda: index)
+    monkeypatch.setattr("app.bridge.led_state", KeypadLedStore())
+
+    r = client.get("/button/23/5/status")
+    assert r.status_code == 200 and r.json()["led"] is None
+    assert r.json()["name"] == "Bar" and r.json()["loads"] == [1121]
+    assert r.json()["load_ids"] == [127] and r.json()["event_type"] == "PRESET_ON"
+    assert client.get("/button/99/1/status").status_code == 404
+    assert client.get("/button/23/5/status?master=2").status_code == 404
+
+    bridge.broadcast_event_sync(bridge.parse_vantage_event("LE 1 23 10 00"))
+    assert client.get("/button/23/5/status").json()["led"] == "on"
+    bridge.broadcast_event_sync(bridge.parse_vantage_event("LC 1 23 6 1"))
+    leds = client.get("/station/23/leds").json()
+    assert leds["on_leds"] == "30" and leds["room"] == "Bar"
+    assert [(b["button"], b["led"]) for b in leds["buttons"]] == [
+        (5, "on"),
+        (6, "on"),
+    ]
@@ -0,0 +1,166 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from app.targets import CircuitBreaker, CircuitOpen, Overloaded, build_registry
+
+
+@pytest.fixture
+def enabler():
+    """Tiny persistent-session enabler that answers every command with `1`."""
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+    accepted = []
+
+    def serve(conn):
+        with conn:
+            buf = b""
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    return
+                buf += data
+                while b"\r" in buf:
+                    _, buf = buf.split(b"\r", 1)
+                    conn.sendall(b"SW 1 2 3 1\r1\r")  # stray event, then reply
+
+    def accept():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            accepted.append(conn)
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield srv.getsockname(), accepted
+    srv.close()
+
+
+def test_default_target_from_env_values():
+    registry = build_registry({}, "10.0.0.5", 3041)
+    assert registry.default.name == "default"
+    assert (registry.default.ip, registry.default.port) == ("10.0.0.5", 3041)
+
+
+def test_routing_by_master():
+    registry = build_registry(
+        {
+            "default": "main",
+            "targets": {
+                "main": {"ip": "10.0.0.5", "masters": [1, 2]},
+                "guest": {"ip": "10.0.0.6", "masters": [3]},
+            },
+        },
+        "127.0.0.1",
+        3041,
+    )
+    assert registry.for_master(3).name == "guest"
+    assert registry.for_master(2).name == "main"
+    assert registry.for_master(9).name == "main"
+    with pytest.raises(KeyError):
+        registry.get("nope")
+
+
+def test_pool_reuses_connection_and_skips_events(enabler):
+    (host, port), accepted = enabler
+    target = build_registry({}, host, port).default
+    assert target.send(b"VGL@ 101\r", 1, 1.0) == ["1"]
+    assert target.send(b"VLO@ 101 5\rVLO@ 102 5\r", 2, 1.0) == ["1", "1"]
+    assert target.pool.opened == 1
+
+
+@pytest.fixture
+def dead_port():
+    """A local port nothing listens on: connects are refused at once."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_breaker_opens_then_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.failure()
+    breaker.allow()  # still closed
+    breaker.failure()
+    with pytest.raises(CircuitOpen) as refused:
+        breaker.allow()
+    assert 0 < refused.value.retry_after <= 0.05
+    time.sleep(0.06)
+    breaker.allow()  # the half-open probe
+    with pytest.raises(CircuitOpen):
+        breaker.allow()  # only one probe at a time
+    breaker.failure()
+    assert breaker.status()["state"] == "open" and breaker.trips == 2
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.success()
+    assert breaker.status()["state"] == "closed" and breaker.rejected == 2
+
+
+def test_unreachable_target_fails_fast(dead_port):
+    target = build_registry(
+        {}, "127.0.0.1", dead_port, breaker_failures=2, breaker_reset=30
+    ).default
+    for _ in range(2):
+        with pytest.raises(ConnectionRefusedError):
+            target.send(b"VGL@ 101\r", 1, 1.0)
+    target.pool.acquire = None  # any connect attempt would now fail loudly
+    with pytest.raises(CircuitOpen):
+        target.send(b"VGL@ 101\r", 1, 1.0)
+    assert target.status()["breaker"] == {
+        "state": "open",
+        "failures": 2,
+        "trips": 1,
+        "rejected": 1,
+        "retry_after": 30.0,
+    }
+
+
+def test_full_queue_sheds_commands(enabler):
+    (host, port), _ = enabler
+    target = build_registry({}, host, port, max_queued=0).default
+    with pytest.raises(Overloaded):
+        target.send(b"VGL@ 101\r", 1, 1.0)
+    assert target.status()["shed"] == 1 and target.queued == 0
+
+
+@pytest.mark.parametrize("noticed", [True, False])
+def test_stale_pooled_connection_is_replaced(monkeypatch, noticed):
+    """An enabler that hangs up after every reply, like one that rebooted.
+
+    Either the close is seen when the connection is taken from the pool, or
+    (``noticed=False``) only when the command is sent, and it is resent once.
+    """
+    if not noticed:
+        monkeypatch.setattr("app.targets._drain", lambda sock: True)
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            with conn:
+                conn.recv(4096)
+                conn.sendall(b"1\r")
+
+    threading.Thread(target=serve, daemon=True).start()
+    target = build_registry({}, *srv.getsockname()).default
+    try:
+        for _ in range(3):
+            assert target.send(b"VGL@ 101\r", 1, 1.0) == ["1"]
+            time.sleep(0.05)  # let the close arrive before the next command
+    finally:
+        srv.close()
+    assert target.pool.opened == 3 and target.pool.stale == 2
+    assert target.breaker.failures == 0
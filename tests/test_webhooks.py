@@ -0,0 +1,152 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.webhooks import WebhookDispatcher, WebhookEndpoint, compile_webhooks
+
+
+class _Hook(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        status = server.statuses.pop(0) if server.statuses else 200
+        server.requests.append((self.client_address[1], status, body["events"]))
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        if status == 200:
+            server.received.release()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def hook_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Hook)
+    server.requests, server.statuses = [], []
+    server.received = threading.Semaphore(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _dispatcher(**spec):
+    endpoints, errors = compile_webhooks({"webhooks": {"local": spec}})
+    assert errors == {}
+    dispatcher = WebhookDispatcher()
+    dispatcher.load(endpoints)
+    return dispatcher
+
+
+def test_events_are_batched_on_one_connection(hook_server):
+    dispatcher = _dispatcher(url=hook_server.url, batch_ms=100, types=["button"])
+    try:
+        for station in range(5):
+            dispatcher.publish({"type": "button", "station": station})
+        assert dispatcher.publish({"type": "load_module"}) == 0
+        assert hook_server.received.acquire(timeout=5)
+        dispatcher.publish({"type": "button", "station": 9})
+        assert hook_server.received.acquire(timeout=5)
+    finally:
+        dispatcher.stop()
+
+    (port1, _, first), (port2, _, second) = hook_server.requests
+    assert [e["station"] for e in first] == [0, 1, 2, 3, 4]
+    assert second == [{"type": "button", "station": 9}]
+    assert port1 == port2  # the connection was kept alive
+
+
+def test_failed_batches_are_retried(hook_server):
+    hook_server.statuses = [503, 429]
+    dispatcher = _dispatcher(
+        url=hook_server.url, batch_ms=0, backoff_base=0.01, match={"station": [23]}
+    )
+    try:
+        dispatcher.publish({"type": "button", "station": 24})
+        dispatcher.publish({"type": "button", "station": 23})
+        assert hook_server.received.acquire(timeout=5)
+    finally:
+        dispatcher.stop()
+    assert [status for _, status, _ in hook_server.requests] == [503, 429, 200]
+    assert hook_server.requests[-1][2] == [{"type": "button", "station": 23}]
+
+
+def test_rejected_batches_are_not_retried(hook_server):
+    hook_server.statuses = [400]
+    dispatcher = _dispatcher(url=hook_server.url, batch_ms=0, retries=3)
+    try:
+        dispatcher.publish({"type": "button"})
+        for _ in range(100):
+            failed = dispatcher.stats()["local"]["failed"]
+            if failed:
+                break
+            threading.Event().wait(0.02)
+    finally:
+        dispatcher.stop()
+    assert failed == 1
+    assert [status for _, status, _ in hook_server.requests] == [400]
+
+
+def test_full_queue_drops_oldest_events():
+    endpoint = WebhookEndpoint("slow", "http://127.0.0.1:9/", queue_size=2)
+    for n in range(3):
+        endpoint.put({"n": n})  # not started: nothing is delivered
+    assert endpoint.dropped == 1
+    assert [e["n"] for e in endpoint._next_batch()] == [1, 2]
+
+
+def test_reload_keeps_unchanged_and_moves_queued_events():
+    spec = {"url": "http://127.0.0.1:9/", "batch_ms": 60000, "enabled": True}
+    dispatcher = WebhookDispatcher()
+    dispatcher.load(compile_webhooks({"webhooks": {"a": spec, "b": spec}})[0])
+    a, b = dispatcher._endpoints["a"], dispatcher._endpoints["b"]
+    dispatcher.publish({"n": 1})
+    dispatcher.publish({"n": 2})
+    try:
+        changed = {**spec, "batch_ms": 50000}
+        dispatcher.load(compile_webhooks({"webhooks": {"a": spec, "b": changed}})[0])
+        assert dispatcher._endpoints["a"] is a
+        new_b = dispatcher._endpoints["b"]
+        assert new_b is not b and new_b.window == 50
+        # The old endpoint's queue (and anything published to it late) moved
+        b.put({"n": 3})
+        assert [e["n"] for e in new_b._queue] == [1, 2, 3]
+        assert dispatcher.stats()["a"]["queued"] == 2
+    finally:
+        dispatcher.stop()
+
+
+def test_stop_ends_retries(hook_server):
+    hook_server.statuses = [503] * 10
+    dispatcher = _dispatcher(url=hook_server.url, batch_ms=0, backoff_base=0.2)
+    endpoint = dispatcher._endpoints["local"]
+    dispatcher.publish({"type": "button"})
+    # The first retry is immediate; stop during the next backoff
+    for _ in range(100):
+        if len(hook_server.requests) == 2:
+            break
+        threading.Event().wait(0.02)
+    dispatcher.stop()
+    endpoint._thread.join(1)
+    assert not endpoint._thread.is_alive()
+    threading.Event().wait(0.3)
+    assert len(hook_server.requests) == 2
+
+
+def test_invalid_subscriptions_are_reported():
+    endpoints, errors = compile_webhooks(
+        {
+            "webhooks": {
+                "ftp": {"url": "ftp://x/"},
+                "typo": {"url": "http://x/", "bogus": 1},
+            }
+        }
+    )
+    assert endpoints == {} and sorted(errors) == ["ftp", "typo"]